@@ -0,0 +1 @@
+"""Performance benchmarks with fake LLM, Notion and MCP backends (see benchmarks/run.py)."""
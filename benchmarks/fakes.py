@@ -0,0 +1,287 @@
+"""
+Fake backends for the benchmark suite.
+
+Each fake mimics the subset of its real client that the agent uses and
+injects latency (fixed, uniform or lognormal) and errors at a configurable
+rate, so the agent's own overhead can be measured without network access:
+
+- FakeGenAIClient: `models.generate_content`, `aio.models.generate_content`
+  and `aio.models.generate_content_stream` of google-genai.
+- FakeNotionClient: `pages.retrieve`, `pages.create` and
+  `data_sources.query` of notion-client.
+- FakeMCPClientManager: an MCPClientManager whose transports connect to
+  in-process FakeMCPSession objects instead of real servers.
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from src.mcp_client import MCPClientManager, MCPServerConnection
+
+
+class FakeBackendError(Exception):
+    """Injected failure; `code`/`status` make it look like a retryable 503 or a 429."""
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
+        self.status = code
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Latency distribution and error rate of a fake backend.
+
+    Attributes:
+        mean_s: Mean latency in seconds.
+        jitter_s: Spread (uniform: +/- jitter, lognormal: standard deviation).
+        distribution: "fixed", "uniform" or "lognormal".
+        error_rate: Fraction of calls that raise FakeBackendError.
+        error_code: Status code of injected errors (503 is retried by the gateway, 429 is a rate limit).
+        seed: Seed for reproducible runs.
+    """
+
+    mean_s: float = 0.0
+    jitter_s: float = 0.0
+    distribution: str = "fixed"
+    error_rate: float = 0.0
+    error_code: int = 503
+    seed: Optional[int] = None
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        if self.distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        self._rng = random.Random(self.seed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "mean_s": self.mean_s,
+            "jitter_s": self.jitter_s,
+            "distribution": self.distribution,
+            "error_rate": self.error_rate,
+            "error_code": self.error_code,
+            "seed": self.seed,
+        }
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.mean_s <= 0:
+                return 0.0
+            if self.distribution == "uniform":
+                return max(0.0, self._rng.uniform(self.mean_s - self.jitter_s, self.mean_s + self.jitter_s))
+            if self.distribution == "lognormal" and self.jitter_s > 0:
+                # Parameters of the underlying normal for the requested mean and standard deviation
+                variance = (self.jitter_s / self.mean_s) ** 2
+                sigma = (max(1e-12, math.log1p(variance))) ** 0.5
+                mu = math.log(self.mean_s) - sigma ** 2 / 2
+                return self._rng.lognormvariate(mu, sigma)
+            return self.mean_s
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def wait(self, what: str) -> None:
+        """Sleep for one latency sample, then maybe raise."""
+        time.sleep(self.sample())
+        if self.should_fail():
+            raise FakeBackendError(f"Injected {what} failure", self.error_code)
+
+    async def wait_async(self, what: str) -> None:
+        await asyncio.sleep(self.sample())
+        if self.should_fail():
+            raise FakeBackendError(f"Injected {what} failure", self.error_code)
+
+
+def tool_then_answer(prompt: str) -> str:
+    """Default reply policy: request one tool, then answer once the observation is in the prompt."""
+    if "[Stap " in prompt:
+        return "Klaar: de tekst is omgedraaid."
+    return '{"action": "reverse_text", "args": {"text": "benchmark"}}'
+
+
+class FakeGenAIClient:
+    """google-genai compatible client with injected latency."""
+
+    def __init__(
+        self,
+        profile: Optional[LatencyProfile] = None,
+        reply: Callable[[str], str] = tool_then_answer,
+        stream_chunks: int = 4,
+    ):
+        self.profile = profile or LatencyProfile()
+        self.reply = reply
+        self.stream_chunks = max(1, stream_chunks)
+        self.calls = 0
+        self._lock = threading.Lock()
+        client = self
+
+        class _Models:
+            def generate_content(self, model, contents):
+                client._count()
+                client.profile.wait("genai")
+                return SimpleNamespace(text=client.reply(str(contents)))
+
+        class _AsyncModels:
+            async def generate_content(self, model, contents):
+                client._count()
+                await client.profile.wait_async("genai")
+                return SimpleNamespace(text=client.reply(str(contents)))
+
+            async def generate_content_stream(self, model, contents):
+                client._count()
+                await client.profile.wait_async("genai")
+                text = client.reply(str(contents))
+
+                async def _stream():
+                    size = max(1, len(text) // client.stream_chunks)
+                    for start in range(0, len(text), size):
+                        yield SimpleNamespace(text=text[start:start + size])
+
+                return _stream()
+
+        self.models = _Models()
+        self.aio = SimpleNamespace(models=_AsyncModels())
+
+    def _count(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+
+def _project_page(index: int) -> Dict[str, Any]:
+    page_id = f"project-{index}"
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id}",
+        "properties": {
+            "Project name": {"title": [{"plain_text": f"Project {index}"}]},
+            "Status": {"status": {"name": "Active"}},
+            "Code": {"rich_text": [{"plain_text": f"PRO-{index:03d}"}]},
+        },
+    }
+
+
+class FakeNotionClient:
+    """notion-client compatible client with an in-memory workspace and injected latency."""
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, projects: int = 20):
+        self.profile = profile or LatencyProfile()
+        self.project_pages = [_project_page(i) for i in range(projects)]
+        self.created: List[Dict[str, Any]] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+        client = self
+
+        class _Pages:
+            def retrieve(self, page_id: str) -> Dict[str, Any]:
+                client._call("pages.retrieve")
+                for page in client.project_pages:
+                    if page["id"] == page_id:
+                        return page
+                return _project_page(0) | {"id": page_id}
+
+            def create(self, parent: Dict[str, Any], properties: Dict[str, Any]) -> Dict[str, Any]:
+                client._call("pages.create")
+                page_id = uuid.uuid4().hex
+                page = {"id": page_id, "url": f"https://notion.so/{page_id}", "parent": parent, "properties": properties}
+                with client._lock:
+                    client.created.append(page)
+                return page
+
+        class _DataSources:
+            def query(self, data_source_id: str, **query: Any) -> Dict[str, Any]:
+                client._call("data_sources.query")
+                return {"results": list(client.project_pages)}
+
+        self.pages = _Pages()
+        self.data_sources = _DataSources()
+
+    def _call(self, what: str) -> None:
+        with self._lock:
+            self.calls += 1
+        self.profile.wait(f"notion {what}")
+
+
+class FakeMCPSession:
+    """In-process stand-in for an MCP ClientSession with a fixed tool list."""
+
+    def __init__(self, server: str, profile: LatencyProfile, tools: int = 5):
+        self.server = server
+        self.profile = profile
+        self.tool_names = [f"tool_{i}" for i in range(tools)]
+
+    async def initialize(self) -> None:
+        await self.profile.wait_async(f"mcp {self.server} initialize")
+
+    async def list_tools(self) -> Any:
+        await self.profile.wait_async(f"mcp {self.server} list_tools")
+        return SimpleNamespace(tools=[
+            SimpleNamespace(
+                name=name,
+                description=f"Fake tool {name} on {self.server}",
+                inputSchema={"type": "object", "properties": {"value": {"type": "string"}}},
+                annotations={"readOnlyHint": True},
+            )
+            for name in self.tool_names
+        ])
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        await self.profile.wait_async(f"mcp {self.server} call_tool")
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps({"tool": name, "args": arguments}))])
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class FakeMCPClientManager(MCPClientManager):
+    """
+    MCPClientManager connecting every configured server to a FakeMCPSession.
+
+    Server configuration, connect, tool discovery and the tool wrappers are the
+    real code paths; only the transport is replaced.
+    """
+
+    def __init__(self, config_path: str, profile: Optional[LatencyProfile] = None, tools_per_server: int = 5):
+        super().__init__(config_path)
+        self.profile = profile or LatencyProfile()
+        self.tools_per_server = tools_per_server
+
+    async def _connect_fake(self, connection: MCPServerConnection) -> None:
+        session = FakeMCPSession(connection.config.name, self.profile, self.tools_per_server)
+        await session.initialize()
+        connection.session = session
+        connection.connected = True
+
+    async def _connect_stdio(self, connection: MCPServerConnection) -> None:
+        await self._connect_fake(connection)
+
+    async def _connect_http(self, connection: MCPServerConnection) -> None:
+        await self._connect_fake(connection)
+
+    async def shutdown(self) -> None:
+        self.servers.clear()
+        self._initialized = False
+
+
+def write_mcp_config(path: str, servers: int) -> str:
+    """Write an mcp_servers.json with `servers` fake stdio servers; returns the path."""
+    config = {
+        "servers": [
+            {"name": f"fake{i}", "transport": "stdio", "command": "fake-mcp-server", "enabled": True}
+            for i in range(servers)
+        ]
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(config, handle)
+    return path
@@ -0,0 +1,436 @@
+"""
+Benchmark runner.
+
+Measures the agent's hot paths against the fake backends in
+`benchmarks/fakes.py` and writes the results as JSON so runs can be compared:
+
+- process:        end-to-end GeminiAgent.process (sequential and concurrent)
+- swarm:          SwarmOrchestrator.execute
+- memory:         MemoryManager load, add_entry and get_context_window at growing history sizes
+- tool_loading:   tool manifest scan (cold and warm) and registry build
+- mcp_initialize: MCPClientManager.initialize and one MCP tool call
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --only memory tool_loading
+    python -m benchmarks.run --llm-latency 0.3 --llm-jitter 0.1 --llm-distribution lognormal --llm-error-rate 0.02
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json --threshold 0.2
+
+Rate limiting, tracing and the LLM response cache are disabled during a run
+so the numbers reflect the code paths, not throttling or earlier runs.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from benchmarks.fakes import (
+    FakeGenAIClient,
+    FakeMCPClientManager,
+    FakeNotionClient,
+    LatencyProfile,
+    write_mcp_config,
+)
+from src.config import settings
+from src.mission_runner import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+# Timing metrics compared against a baseline
+COMPARED_METRICS = ("mean_ms", "p50_ms", "p95_ms")
+
+
+@dataclass
+class BenchConfig:
+    """Iterations, sizes and backend profiles of one run."""
+
+    iterations: int = 20
+    warmup: int = 2
+    concurrency: int = 8
+    history_sizes: Tuple[int, ...] = (100, 1000, 10000)
+    mcp_servers: int = 3
+    llm: LatencyProfile = field(default_factory=lambda: LatencyProfile(mean_s=0.05))
+    notion: LatencyProfile = field(default_factory=lambda: LatencyProfile(mean_s=0.02))
+    mcp: LatencyProfile = field(default_factory=lambda: LatencyProfile(mean_s=0.01))
+    workdir: str = ""
+
+
+def summarize(samples: Sequence[float], errors: int = 0) -> Dict[str, Any]:
+    """Latency statistics (milliseconds) of a list of durations in seconds."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "mean_ms": round(1000 * total / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(1000 * percentile(ordered, 50), 3),
+        "p95_ms": round(1000 * percentile(ordered, 95), 3),
+        "min_ms": round(1000 * ordered[0], 3) if ordered else 0.0,
+        "max_ms": round(1000 * ordered[-1], 3) if ordered else 0.0,
+        "ops_per_s": round(len(ordered) / total, 2) if total else 0.0,
+    }
+
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int = 0) -> Dict[str, Any]:
+    """Call `fn(i)` warmup + iterations times; failures are counted, not timed."""
+    for i in range(warmup):
+        try:
+            fn(-1 - i)
+        except Exception:
+            pass
+    samples: List[float] = []
+    errors = 0
+    for i in range(iterations):
+        start = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, errors)
+
+
+@contextmanager
+def override_settings(**values: Any) -> Iterator[None]:
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+# Scenarios
+
+
+def bench_process(config: BenchConfig) -> Dict[str, Any]:
+    from src.agent import GeminiAgent
+
+    # Memory and sessions live in config.workdir (see run_benchmarks)
+    agent = GeminiAgent()
+    agent.client = FakeGenAIClient(config.llm)
+    agent.notion.client = FakeNotionClient(config.notion)
+    try:
+        results = {"sequential": measure(
+            lambda i: agent.process(f"Draai de tekst van bericht {i} om"), config.iterations, config.warmup
+        )}
+
+        async def batch() -> Tuple[List[float], int, float]:
+            # `concurrency` sessions in flight on one agent instance
+            in_flight = asyncio.Semaphore(config.concurrency)
+
+            async def one(i: int) -> float:
+                async with in_flight:
+                    start = time.perf_counter()
+                    await agent.process_async(f"Draai de tekst van sessie {i} om")
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(one(i) for i in range(max(config.iterations, config.concurrency))), return_exceptions=True
+            )
+            latencies = [o for o in outcomes if isinstance(o, float)]
+            return latencies, len(outcomes) - len(latencies), time.perf_counter() - start
+
+        latencies, errors, wall = asyncio.run_coroutine_threadsafe(batch(), agent._ensure_loop()).result()
+        concurrent = summarize(latencies, errors)
+        concurrent["wall_s"] = round(wall, 3)
+        concurrent["throughput_per_s"] = round(len(latencies) / wall, 2) if wall else 0.0
+        results["concurrent"] = concurrent
+        results["llm_calls"] = agent.client.calls
+    finally:
+        agent.shutdown()
+    return results
+
+
+def bench_swarm(config: BenchConfig) -> Dict[str, Any]:
+    from src.swarm import SwarmOrchestrator
+
+    swarm = SwarmOrchestrator()
+    fake = FakeGenAIClient(config.llm, reply=lambda prompt: "Done.")
+    for agent in (swarm.router, *swarm.workers.values()):
+        agent.client = fake
+
+    def run(i: int) -> None:
+        swarm.execute("Write a function and review it for security issues", verbose=False)
+        swarm.reset()
+
+    return {"execute": measure(run, config.iterations, config.warmup), "llm_calls": fake.calls}
+
+
+def _write_history(path: Path, size: int) -> None:
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Bericht {i}: " + "lorem ipsum " * 10, "metadata": {}}
+        for i in range(size)
+    ]
+    path.write_text(json.dumps({"summary": "", "history": history}), encoding="utf-8")
+
+
+def bench_memory(config: BenchConfig) -> Dict[str, Any]:
+    from src.memory import MemoryManager
+
+    results: Dict[str, Any] = {}
+    for size in config.history_sizes:
+        path = Path(config.workdir) / f"memory_{size}.json"
+        _write_history(path, size)
+        load = measure(lambda i: MemoryManager(memory_file=str(path)), max(1, config.iterations // 4))
+        memory = MemoryManager(memory_file=str(path))
+        add_entry = measure(
+            lambda i: memory.add_entry("user", f"Nieuw bericht {i}"), config.iterations, config.warmup
+        )
+        window = measure(
+            lambda i: memory.get_context_window(system_prompt="Je bent de Emerson Agent.", max_messages=10),
+            config.iterations,
+            config.warmup,
+        )
+        results[f"history_{size}"] = {"load": load, "add_entry": add_entry, "get_context_window": window}
+    return results
+
+
+def bench_tool_loading(config: BenchConfig) -> Dict[str, Any]:
+    from src.tool_manifest import LazyTool, ToolManifest
+
+    tools_dir = ROOT / "src" / "tools"
+    manifest_path = Path(config.workdir) / "tool_manifest.json"
+
+    def cold(i: int) -> None:
+        manifest_path.unlink(missing_ok=True)
+        ToolManifest(tools_dir, cache_path=str(manifest_path)).load()
+
+    def warm(i: int) -> None:
+        ToolManifest(tools_dir, cache_path=str(manifest_path)).load()
+
+    def registry(i: int) -> None:
+        {spec.name: LazyTool(spec) for spec in ToolManifest(tools_dir, cache_path=str(manifest_path)).load()}
+
+    iterations = max(1, config.iterations // 2)
+    return {
+        "manifest_cold": measure(cold, iterations),
+        "manifest_warm": measure(warm, iterations, warmup=1),
+        "registry_build": measure(registry, iterations, warmup=1),
+    }
+
+
+def bench_mcp_initialize(config: BenchConfig) -> Dict[str, Any]:
+    config_path = write_mcp_config(str(Path(config.workdir) / "mcp_servers.json"), config.mcp_servers)
+    managers: List[FakeMCPClientManager] = []
+
+    def initialize(i: int) -> None:
+        manager = FakeMCPClientManager(config_path, config.mcp)
+        asyncio.run(manager.initialize())
+        managers.append(manager)
+
+    with override_settings(MCP_ENABLED=True):
+        init = measure(initialize, max(1, config.iterations // 2))
+        tools = managers[-1].get_all_tools_as_callables() if managers else {}
+        tool = next(iter(tools.values()), None)
+        call = measure(lambda i: asyncio.run(tool(value=str(i))), config.iterations) if tool else summarize([])
+    return {"initialize": init, "tool_call": call, "servers": config.mcp_servers, "tools": len(tools)}
+
+
+SCENARIOS: Dict[str, Callable[[BenchConfig], Dict[str, Any]]] = {
+    "process": bench_process,
+    "swarm": bench_swarm,
+    "memory": bench_memory,
+    "tool_loading": bench_tool_loading,
+    "mcp_initialize": bench_mcp_initialize,
+}
+
+
+def run_benchmarks(config: BenchConfig, only: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Run the selected scenarios (all by default).
+
+    Returns:
+        {"meta": {...}, "results": {scenario: {...}}}
+    """
+    names = list(only or SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {unknown}. Choose from {list(SCENARIOS)}")
+
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        config.workdir = config.workdir or workdir
+        with override_settings(
+            LLM_CACHE_ENABLED=False,
+            LLM_RATE_LIMIT_RPS=0.0,
+            TRACE_ENABLED=False,
+            METRICS_PORT=0,
+            MCP_ENABLED=False,
+            TOOL_MANIFEST_PATH=str(Path(config.workdir) / "agent_tool_manifest.json"),
+            LLM_CACHE_PATH=str(Path(config.workdir) / "llm_responses.sqlite3"),
+            NOTION_LOG_JOURNAL=str(Path(config.workdir) / "notion_log_journal.jsonl"),
+            MEMORY_FILE=str(Path(config.workdir) / "agent_memory.json"),
+            SESSION_DIR=str(Path(config.workdir) / "sessions"),
+            TRACE_JSONL_PATH="",
+        ):
+            for name in names:
+                print(f"🚀 Benchmark: {name}")
+                start = time.perf_counter()
+                results[name] = SCENARIOS[name](config)
+                print(f"   ✅ {name} in {time.perf_counter() - start:.1f}s")
+
+    return {"meta": _meta(config), "results": results}
+
+
+def _meta(config: BenchConfig) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    profiles = {name: getattr(config, name).as_dict() for name in ("llm", "notion", "mcp")}
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "iterations": config.iterations,
+        "concurrency": config.concurrency,
+        "history_sizes": list(config.history_sizes),
+        "profiles": profiles,
+    }
+
+
+def save_results(report: Dict[str, Any], path: Optional[str] = None) -> Path:
+    target = Path(path) if path else RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return target
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """Map "scenario.case" to its stats dict (anything with a mean_ms)."""
+    flat: Dict[str, Dict[str, Any]] = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict) and "mean_ms" in value:
+            flat[name] = value
+        elif isinstance(value, dict):
+            flat.update(_flatten(value, name))
+    return flat
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2, min_delta_ms: float = 1.0
+) -> List[Dict[str, Any]]:
+    """
+    Compare two reports.
+
+    Args:
+        current: Report of this run.
+        baseline: Earlier report.
+        threshold: Relative slowdown that counts as a regression (0.2 = 20%).
+        min_delta_ms: Absolute slowdowns below this are treated as noise.
+
+    Returns:
+        One row per (case, metric) present in both reports, with `regression` set.
+    """
+    now, before = _flatten(current.get("results", {})), _flatten(baseline.get("results", {}))
+    rows = []
+    for case in sorted(set(now) & set(before)):
+        for metric in COMPARED_METRICS:
+            old, new = before[case].get(metric), now[case].get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            change = (new - old) / old if old else 0.0
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 3),
+                "regression": change > threshold and new - old > min_delta_ms,
+            })
+    return rows
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"\n{'case':<48} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>10} {'errors':>7}")
+    for case, stats in _flatten(report["results"]).items():
+        print(f"{case:<48} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['ops_per_s']:>10.1f} {stats['errors']:>7}")
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"\n{'case':<48} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in rows:
+        flag = " ❌" if row["regression"] else ""
+        print(
+            f"{row['case']:<48} {row['metric']:<8} {row['baseline']:>10.2f} {row['current']:>10.2f} "
+            f"{row['change']:>+8.0%}{flag}"
+        )
+
+
+def _profile(args: argparse.Namespace, name: str, seed: Optional[int]) -> LatencyProfile:
+    return LatencyProfile(
+        mean_s=getattr(args, f"{name}_latency"),
+        jitter_s=getattr(args, f"{name}_jitter"),
+        distribution=getattr(args, f"{name}_distribution"),
+        error_rate=getattr(args, f"{name}_error_rate"),
+        seed=seed,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the agent benchmarks against fake backends.")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--history-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--mcp-servers", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Few iterations and small histories (smoke run)")
+    parser.add_argument("--seed", type=int, default=None)
+    for name, latency in (("llm", 0.05), ("notion", 0.02), ("mcp", 0.01)):
+        parser.add_argument(f"--{name}-latency", type=float, default=latency, help="Mean latency in seconds")
+        parser.add_argument(f"--{name}-jitter", type=float, default=0.0)
+        parser.add_argument(f"--{name}-distribution", choices=("fixed", "uniform", "lognormal"), default="fixed")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+    parser.add_argument("--out", default=None, help="Results file (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as regression")
+    args = parser.parse_args(argv)
+
+    config = BenchConfig(
+        iterations=3 if args.quick else args.iterations,
+        warmup=0 if args.quick else 2,
+        concurrency=args.concurrency,
+        history_sizes=(50, 500) if args.quick else tuple(args.history_sizes),
+        mcp_servers=args.mcp_servers,
+        llm=_profile(args, "llm", args.seed),
+        notion=_profile(args, "notion", args.seed),
+        mcp=_profile(args, "mcp", args.seed),
+    )
+    report = run_benchmarks(config, args.only)
+    path = save_results(report, args.out)
+    print_summary(report)
+    print(f"\n📦 Results saved to {path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.threshold)
+        print_comparison(rows)
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
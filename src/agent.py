@@ -1,35 +1,89 @@
 import json
 import time
-import os
-import sys
 import asyncio
 import inspect
-import importlib.util
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
-from google import genai
 from src.config import settings
 from src.memory import MemoryManager
+from src.sessions import SessionStore
 from src.notion_client import EmersonNotionClient
 from src.escalation import EscalationHandler, EscalationResult
+from src.context_cache import ContextCache
+from src.retrieval import ContextRetriever, estimate_tokens
+from src.tool_index import ToolIndex
+from src.tool_cache import ToolResultCache, make_key, policy_for
+from src.llm_cache import get_llm_cache
+from src.llm_gateway import DummyClient, get_gateway
+from src.renderers import render_results
+from src.singleflight import flights
+from src.cascade import CascadeRouter
+from src.fast_path import IntentMatcher
+from src.tracing import span, start_span, tracer
+from src.metrics import AGENT_TURNS, PROMPT_TOKENS, TOOL_LATENCY, dump as dump_metrics, start_http_server
+from src.streaming import ActionStreamDetector, StreamTimings
+from src.tool_manifest import LazyTool, ToolManifest
 from src.models import Action
 
 
+@dataclass
+class ToolOutcome:
+    """Result of one requested tool action within a turn."""
+
+    name: str
+    args: Dict[str, Any]
+    status: str  # ok, error, blocked, cancelled, not_found
+    output: Any = None
+
+    def observation(self) -> str:
+        if self.status == "ok":
+            return f"Tool '{self.name}' output: {self.output}"
+        if self.status == "error":
+            return f"Tool '{self.name}' fout: {self.output}"
+        if self.status == "blocked":
+            return f"Tool '{self.name}' geblokkeerd: overschrijdt de veiligheidslimieten."
+        if self.status == "cancelled":
+            return f"Tool '{self.name}' geannuleerd door gebruiker."
+        return f"Tool {self.name} niet gevonden."
+
+
 class GeminiAgent:
     """
     Emerson Agent: Een AI-assistent voor Emerson Agency.
     Gebruikt Notion als Single Source of Truth en past de 10 Non-Negotiables toe.
     """
 
-    def __init__(self):
+    def __init__(self, memory: Optional[MemoryManager] = None, sessions: Optional[SessionStore] = None):
+        """
+        Args:
+            memory: Default memory shared with other agents (e.g. in an AgentPool); its owner closes it.
+            sessions: Session store shared with other agents; its owner closes it.
+        """
         self.settings = settings
-        self.memory = MemoryManager()
+        self._owns_memory = memory is None
+        self._owns_sessions = sessions is None
+        self.memory = MemoryManager() if memory is None else memory
+        # Geheugen per session_id; zonder session_id gebruikt de agent self.memory
+        self.sessions = SessionStore() if sessions is None else sessions
         self.mcp_manager = None
         
         # Emerson Components
         self.notion = EmersonNotionClient()
+        # Log events die een vorige run niet naar Notion kon schrijven
+        self.notion.log_sink.resume_journal()
         self.escalation = EscalationHandler()
+        self.context_cache = ContextCache()
+        self.context_retriever = ContextRetriever()
+        self.tool_index = ToolIndex()
+        self.tool_cache = ToolResultCache()
+        self.cascade = CascadeRouter()
+        self.fast_path = IntentMatcher(project_names=lambda: [p.name for p in self.notion.list_projects()])
 
         # Dynamically load all tools from src/tools/ directory
         self.available_tools: Dict[str, Callable[..., Any]] = self._load_tools()
@@ -40,32 +94,21 @@ class GeminiAgent:
         print(f"🪐 Initializing {self.settings.AGENT_NAME} (Emerson Edition)...")
         print(f"   📦 Tools discovered: {len(self.available_tools)}")
 
-        # Initialize GenAI Client
-        running_under_pytest = "PYTEST_CURRENT_TEST" in os.environ or "pytest" in sys.modules
-        if running_under_pytest:
-            class _DummyClient:
-                class _Models:
-                    def generate_content(self, model, contents):
-                        class _R:
-                            text = "I have completed the task"
-                        return _R()
-                def __init__(self):
-                    self.models = self._Models()
-            self.client = _DummyClient()
-        else:
-            try:
-                self.client = genai.Client(api_key=self.settings.GOOGLE_API_KEY)
-            except Exception as e:
-                print(f"⚠️ genai client not initialized: {e}")
-                class _DummyClientFallback:
-                    class _Models:
-                        def generate_content(self, model, contents):
-                            class _R:
-                                text = "I have completed the task"
-                            return _R()
-                    def __init__(self):
-                        self.models = self._Models()
-                self.client = _DummyClientFallback()
+        # Gedeelde GenAI client via de process-brede gateway (rate limiting, retries, hedging)
+        self.gateway = get_gateway()
+        self.client = self.gateway.client
+
+        # Sync tools draaien in een thread pool zodat de event loop vrij blijft
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=self.settings.AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool"
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+        if self.settings.METRICS_PORT:
+            # Eén endpoint per proces, ook als er meerdere agents draaien
+            start_http_server()
 
     def _initialize_mcp(self) -> None:
         try:
@@ -92,29 +135,24 @@ class GeminiAgent:
         return self._call_gemini(prompt)
 
     def _load_tools(self) -> Dict[str, Callable[..., Any]]:
-        tools = {}
+        tools: Dict[str, Callable[..., Any]] = {}
         tools_dir = Path(__file__).parent / "tools"
         if not tools_dir.exists():
             return tools
 
-        for tool_file in tools_dir.glob("*.py"):
-            if tool_file.name.startswith("_"):
+        # Registry uit de (gecachte) AST manifest; modules worden pas bij de eerste call geïmporteerd
+        failed = set()
+        for spec in ToolManifest(tools_dir).load():
+            if spec.load_error:
+                # Niet registreren: het model zou anders tools kiezen die alleen een laadfout geven
+                if spec.module not in failed:
+                    print(f"⚠️ Failed to load tools from {spec.module}.py: {spec.load_error}")
+                    failed.add(spec.module)
                 continue
-            module_name = tool_file.stem
-            try:
-                spec = importlib.util.spec_from_file_location(f"src.tools.{module_name}", tool_file)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    for name, obj in inspect.getmembers(module, inspect.isfunction):
-                        if not name.startswith("_") and obj.__module__ == f"src.tools.{module_name}":
-                            tools[name] = obj
-            except Exception as e:
-                print(f"⚠️ Failed to load tools from {tool_file.name}: {e}")
+            tools[spec.name] = LazyTool(spec)
         return tools
 
-    def _load_context(self) -> str:
-        context_parts = []
+    def _context_dirs(self) -> List[Path]:
         root_dir = Path(__file__).parent.parent
         dirs_to_check = [
             root_dir / ".context", 
@@ -124,32 +162,160 @@ class GeminiAgent:
         
         # Voeg Obsidian Context toe als geconfigureerd
         if self.settings.OBSIDIAN_VAULT_PATH:
-            vault_context = Path(self.settings.OBSIDIAN_VAULT_PATH) / "_Agents" / "Emerson" / "Context"
-            if vault_context.exists():
-                dirs_to_check.append(vault_context)
-        
-        for d in dirs_to_check:
-            if d.exists():
-                for context_file in sorted(d.glob("*.md")):
-                    try:
-                        content = context_file.read_text(encoding="utf-8")
-                        context_parts.append(f"\n--- {context_file.name} (from {d.name}) ---\n{content}")
-                    except Exception:
-                        pass
-        return "\n".join(context_parts)
-
-    def _get_tool_descriptions(self) -> str:
+            dirs_to_check.append(Path(self.settings.OBSIDIAN_VAULT_PATH) / "_Agents" / "Emerson" / "Context")
+        return dirs_to_check
+
+    def _load_context(self, query: Optional[str] = None) -> str:
+        # Served from memory; the cache only re-reads files whose mtime/size changed
+        dirs = self._context_dirs()
+        if not query or not self.settings.CONTEXT_RETRIEVAL_ENABLED:
+            return self.context_cache.get_text(dirs)
+
+        # Alleen relevante chunks (plus vastgepinde regels) binnen het token budget
+        files, version = self.context_cache.snapshot(dirs)
+        self.context_retriever.build(files, version=version)
+        return self.context_retriever.render(query)
+
+    def _get_tool_descriptions(self, query: Optional[str] = None) -> str:
+        if query and self.settings.TOOL_SELECTION_ENABLED:
+            # Wordt alleen opnieuw opgebouwd als de tool registry verandert
+            self.tool_index.build(self.available_tools)
+            return self.tool_index.render(query)
+
         descriptions = []
         for name, fn in self.available_tools.items():
+            if getattr(fn, "load_error", ""):
+                continue
             doc = (fn.__doc__ or "No description provided.").strip().replace("\n", " ")
             descriptions.append(f"- {name}: {doc}")
         return "\n".join(descriptions)
 
+    def _replay_safe(self, text: str) -> bool:
+        """True als een antwoord alleen read-only acties bevat en dus opnieuw afgespeeld mag worden."""
+        for name, _args in self._extract_tool_calls(text):
+            policy = policy_for(self.available_tools.get(name))
+            if policy is None or not policy.cacheable or policy.invalidates:
+                return False
+        return True
+
+    def _cached_reply(self, prompt: str) -> Optional[str]:
+        # Antwoorden van de dummy client horen niet in de persistente cache
+        if isinstance(self.client, DummyClient):
+            return None
+        cached = get_llm_cache().get(self.settings.GEMINI_MODEL_NAME, prompt)
+        if cached is not None and not self._replay_safe(cached):
+            return None
+        return cached
+
+    def _store_reply(self, prompt: str, text: str) -> None:
+        # Een plan met muterende acties mag niet uit de cache opnieuw uitgevoerd worden
+        if not isinstance(self.client, DummyClient) and self._replay_safe(text):
+            get_llm_cache().put(self.settings.GEMINI_MODEL_NAME, prompt, text)
+
+    def _validate_local_reply(self, reply: str) -> Optional[str]:
+        """Escalatie-reden als een lokaal antwoord op JSON lijkt maar geen geldige actie is."""
+        if not reply.lstrip().startswith(("{", "[", "```")):
+            return None
+        calls = self._extract_tool_calls(reply)
+        if not calls:
+            return "parse_failure"
+        if any(name not in self.available_tools for name, _args in calls):
+            return "unknown_tool"
+        return None
+
+    def _local_reply(self, prompt: str) -> Optional[str]:
+        """Goedkope eerste poging via het lokale model (cascade); None = escaleren naar Gemini."""
+        if not self.cascade.enabled():
+            return None
+        return self.cascade.try_local(prompt, self._validate_local_reply)
+
+    async def _local_reply_async(self, prompt: str) -> Optional[str]:
+        if not self.cascade.enabled():
+            return None
+        return await self._run_blocking(self._local_reply, prompt)
+
     def _call_gemini(self, prompt: str) -> str:
-        response_obj = self.client.models.generate_content(
-            model=self.settings.GEMINI_MODEL_NAME,
-            contents=prompt,
-        )
+        with span("llm.gemini", prompt_chars=len(prompt)) as trace:
+            cached = self._cached_reply(prompt)
+            if cached is not None:
+                trace.set(source="cache")
+                return cached
+            local = self._local_reply(prompt)
+            if local is not None:
+                trace.set(source="local")
+                return local
+            start = time.perf_counter()
+            response_obj = self.gateway.generate(self.settings.GEMINI_MODEL_NAME, prompt, client=self.client)
+            self.cascade.record_gemini(time.perf_counter() - start)
+            text = self._response_text(response_obj)
+            self._store_reply(prompt, text)
+            trace.set(source="gemini", reply_chars=len(text))
+            return text
+
+    async def _call_gemini_async(self, prompt: str) -> str:
+        aio = getattr(self.client, "aio", None)
+        if aio is None:
+            # Client zonder async API: blokkerende call naar de thread pool
+            return await self._run_blocking(self._call_gemini, prompt)
+        with span("llm.gemini", prompt_chars=len(prompt)) as trace:
+            cached = self._cached_reply(prompt)
+            if cached is not None:
+                trace.set(source="cache")
+                return cached
+            local = await self._local_reply_async(prompt)
+            if local is not None:
+                trace.set(source="local")
+                return local
+            start = time.perf_counter()
+            response_obj = await self.gateway.generate_async(
+                self.settings.GEMINI_MODEL_NAME, prompt, client=self.client
+            )
+            self.cascade.record_gemini(time.perf_counter() - start)
+            text = self._response_text(response_obj)
+            self._store_reply(prompt, text)
+            trace.set(source="gemini", reply_chars=len(text))
+            return text
+
+    async def _stream_gemini_async(self, prompt: str) -> AsyncIterator[str]:
+        models = getattr(getattr(self.client, "aio", None), "models", None)
+        stream_fn = getattr(models, "generate_content_stream", None)
+        if stream_fn is None:
+            # Geen streaming beschikbaar: één chunk met het volledige antwoord
+            yield await self._call_gemini_async(prompt)
+            return
+        # Geen `with span` rond yields: de generator kan in een andere context hervat worden
+        trace = start_span("llm.gemini_stream", prompt_chars=len(prompt))
+        try:
+            cached = self._cached_reply(prompt)
+            if cached is not None:
+                trace.set(source="cache")
+                yield cached
+                return
+            local = await self._local_reply_async(prompt)
+            if local is not None:
+                trace.set(source="local")
+                yield local
+                return
+            parts: List[str] = []
+            async for chunk in self.gateway.stream_async(
+                self.settings.GEMINI_MODEL_NAME, prompt, client=self.client
+            ):
+                text = getattr(chunk, "text", None)
+                if text:
+                    parts.append(text)
+                    yield text
+            # Alleen volledig ontvangen antwoorden cachen
+            self._store_reply(prompt, "".join(parts).strip())
+            trace.set(source="gemini", reply_chars=sum(len(part) for part in parts))
+        except Exception as e:
+            trace.set(error=f"{type(e).__name__}: {e}"[:200])
+            trace.end("error")
+            raise
+        finally:
+            trace.end()
+
+    @staticmethod
+    def _response_text(response_obj: Any) -> str:
         # Safely handle cases where the API or dummy client returns None or a structure without a text attribute
         text = getattr(response_obj, "text", None)
         if text is None:
@@ -166,23 +332,51 @@ class GeminiAgent:
                 text = str(text)
         return text.strip()
 
-    def _extract_tool_call(self, response_text: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    def _parse_json_reply(self, response_text: str) -> Any:
         cleaned = response_text.strip()
+        # Handle potential markdown code blocks
+        if "```json" in cleaned:
+            cleaned = cleaned.split("```json")[1].split("```")[0].strip()
+        elif "```" in cleaned:
+            cleaned = cleaned.split("```")[1].split("```")[0].strip()
         try:
-            # Handle potential markdown code blocks
-            if "```json" in cleaned:
-                cleaned = cleaned.split("```json")[1].split("```")[0].strip()
-            elif "```" in cleaned:
-                cleaned = cleaned.split("```")[1].split("```")[0].strip()
-                
-            payload = json.loads(cleaned)
-            if isinstance(payload, dict):
-                action = payload.get("action") or payload.get("tool")
-                args = payload.get("args") or payload.get("input") or {}
-                return str(action), args if isinstance(args, dict) else {}
+            return json.loads(cleaned)
         except json.JSONDecodeError:
-            pass
-        return None, {}
+            return None
+
+    @staticmethod
+    def _as_tool_call(payload: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if not isinstance(payload, dict):
+            return None
+        action = payload.get("action") or payload.get("tool")
+        if not action:
+            return None
+        args = payload.get("args") or payload.get("input") or {}
+        return str(action), args if isinstance(args, dict) else {}
+
+    def _tool_calls_from_payload(self, payload: Any) -> List[Tuple[str, Dict[str, Any]]]:
+        """Accept one action object, a list of action objects, or {"actions": [...]}."""
+        if isinstance(payload, dict) and isinstance(payload.get("actions"), list):
+            payload = payload["actions"]
+        items = payload if isinstance(payload, list) else [payload]
+        calls = [self._as_tool_call(item) for item in items]
+        return [call for call in calls if call is not None]
+
+    @staticmethod
+    def _signals_final(payload: Any) -> bool:
+        """True if the action payload marks its result as the answer ("final": true)."""
+        if isinstance(payload, dict):
+            return payload.get("final") is True
+        return isinstance(payload, list) and bool(payload) and all(
+            isinstance(item, dict) and item.get("final") is True for item in payload
+        )
+
+    def _extract_tool_calls(self, response_text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return self._tool_calls_from_payload(self._parse_json_reply(response_text))
+
+    def _extract_tool_call(self, response_text: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        calls = self._extract_tool_calls(response_text)
+        return calls[0] if calls else (None, {})
 
     def _confirm_action(self, action: Action) -> bool:
         """Vraag gebruiker om bevestiging (Simulatie via console voor nu)."""
@@ -191,82 +385,481 @@ class GeminiAgent:
         # In een echte productie-agent zou dit wachten op een UI input of bericht
         return True # Mocked: Altijd 'Ja' voor demo doeleinden
 
-    def process(self, message: str) -> str:
+    async def _run_blocking(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable in the agent's thread pool (in a copy of the current context)."""
+        loop = asyncio.get_running_loop()
+        # Context kopiëren zodat spans in de worker thread onder de huidige span vallen
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._tool_executor, partial(context.run, fn, *args, **kwargs))
+
+    async def _execute_tool(self, tool_fn: Callable[..., Any], tool_args: Dict[str, Any]) -> Any:
+        """Await async tools directly, run sync tools in the thread pool."""
+        if inspect.iscoroutinefunction(tool_fn) or getattr(tool_fn, "is_async", False):
+            result = await tool_fn(**tool_args)
+        else:
+            result = await self._run_blocking(tool_fn, **tool_args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _check_escalation(self, tool_name: str, tool_args: Dict[str, Any]) -> Optional[ToolOutcome]:
+        """Escalation check per action; returns an outcome when the action may not run."""
+        action = Action(
+            type=tool_name,
+            description=f"Uitvoeren van tool {tool_name} met {tool_args}",
+            amount=tool_args.get("amount", 0.0),
+            sensitive=tool_args.get("sensitive", False)
+        )
+        
+        check = self.escalation.check_action(action)
+        if check == EscalationResult.BLOCK:
+            return ToolOutcome(tool_name, tool_args, "blocked")
+        elif check == EscalationResult.CONFIRM:
+            if not self._confirm_action(action):
+                return ToolOutcome(tool_name, tool_args, "cancelled")
+        return None
+
+    async def _run_tool_call(
+        self, tool_name: str, tool_args: Dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> ToolOutcome:
+        start = time.perf_counter()
+        # Door het model verzonnen namen niet als label gebruiken (onbegrensde cardinaliteit)
+        label = tool_name if tool_name in self.available_tools else "unknown"
+        with span(f"tool.{label}", tool=label) as trace:
+            outcome = await self._dispatch_tool(tool_name, tool_args, semaphore, trace)
+            TOOL_LATENCY.observe(time.perf_counter() - start, tool=label, status=outcome.status)
+            trace.set(outcome=outcome.status)
+            if outcome.status == "error":
+                trace.end("error")
+            return outcome
+
+    async def _dispatch_tool(
+        self, tool_name: str, tool_args: Dict[str, Any], semaphore: asyncio.Semaphore, trace: Any
+    ) -> ToolOutcome:
+        tool_fn = self.available_tools.get(tool_name)
+        if not tool_fn:
+            return ToolOutcome(tool_name, tool_args, "not_found")
+
+        # Idempotente tools: hergebruik een recent resultaat met dezelfde argumenten
+        policy = policy_for(tool_fn)
+        use_cache = policy is not None and self.settings.TOOL_CACHE_ENABLED
+        cache_key = make_key(tool_name, tool_args)
+        if use_cache and policy.cacheable:
+            hit, cached = self.tool_cache.get(cache_key)
+            if hit:
+                trace.set(cached=True)
+                return ToolOutcome(tool_name, tool_args, "ok", cached)
+
+        async def execute() -> Any:
+            async with semaphore:
+                return await self._execute_tool(tool_fn, tool_args)
+
+        try:
+            if policy is not None and policy.cacheable:
+                # Idempotente tool: gelijktijdige identieke calls delen één uitvoering
+                observation = await flights.do_async(cache_key, execute)
+            else:
+                observation = await execute()
+        except Exception as e:
+            return ToolOutcome(tool_name, tool_args, "error", e)
+
+        if use_cache:
+            if policy.invalidates:
+                self.tool_cache.invalidate(policy.invalidates)
+            if policy.cacheable:
+                self.tool_cache.put(cache_key, observation, policy.ttl, policy.tags)
+
+        # Niet-blokkerend: de log sink schrijft op de achtergrond naar Notion
+        self.notion.log_event("P2", f"Tool executed: {tool_name}", {"args": tool_args})
+        return ToolOutcome(tool_name, tool_args, "ok", observation)
+
+    async def _act(self, tool_calls: List[Tuple[str, Dict[str, Any]]]) -> List[ToolOutcome]:
         """
-        Main Emerson processing loop:
-        1. Context laden (Rules, Notion OS)
-        2. Intent parsing
-        3. Escalation check
-        4. Tool execution
-        5. Logging
+        Run the actions of one turn. Escalation is checked per action (sequentially,
+        so confirmations don't interleave); the allowed actions are independent and
+        run concurrently, bounded by AGENT_MAX_PARALLEL_TOOLS.
         """
-        self.memory.add_entry("user", message)
-        context_knowledge = self._load_context()
-        tool_list = self._get_tool_descriptions()
+        outcomes: List[Optional[ToolOutcome]] = [
+            self._check_escalation(name, args) for name, args in tool_calls
+        ]
+        semaphore = asyncio.Semaphore(self.settings.AGENT_MAX_PARALLEL_TOOLS)
+
+        async def run(i: int) -> None:
+            name, args = tool_calls[i]
+            outcomes[i] = await self._run_tool_call(name, args, semaphore)
 
-        system_prompt = (
+        await asyncio.gather(*(run(i) for i, outcome in enumerate(outcomes) if outcome is None))
+        return [outcome for outcome in outcomes if outcome is not None]
+
+    def _build_system_prompt(self, message: str) -> str:
+        with span("agent.context_load") as trace:
+            context_knowledge = self._load_context(message)
+            trace.set(chars=len(context_knowledge))
+        with span("agent.tool_select") as trace:
+            tool_list = self._get_tool_descriptions(message)
+            trace.set(chars=len(tool_list))
+
+        return (
             f"{context_knowledge}\n\n"
             "Je bent de Emerson Agent. Volg de regels in .emerson/rules.md strikt.\n"
             "Beschikbare tools:\n"
             f"{tool_list}\n\n"
             "Als je een tool nodig hebt, reageer dan ALLEEN met een JSON object:\n"
             '{"action": "<tool_name>", "args": {"param": "value"}}\n'
+            "Voor meerdere onafhankelijke acties mag je een JSON lijst van zulke objecten sturen; "
+            "die worden tegelijk uitgevoerd.\n"
+            'Is het resultaat van de actie(s) zelf het antwoord voor de gebruiker, voeg dan "final": true '
+            "toe aan elk object; heb je daarna nog een actie nodig die van het resultaat afhangt, laat het weg.\n"
             "Koppel taken altijd aan projecten. Koppel financials aan project + klant.\n"
             "Bevestig acties met Notion links."
         )
 
-        context_messages = self.memory.get_context_window(
-            system_prompt=system_prompt,
-            max_messages=10,
-            summarizer=self.summarize_memory
+    @staticmethod
+    def _observation_prompt(system_prompt: str, message: str, observations: List[str], final: bool) -> str:
+        blocks = "\n\n".join(
+            f"[Stap {i}]\n{block}" for i, block in enumerate(observations, 1)
         )
-        # Flatten context for the model
-        context_str = "\n".join([f"{m['role']}: {m['content']}" for m in context_messages])
-        
-        reply = self._call_gemini(f"{system_prompt}\n\n{context_str}\nUser: {message}")
-        tool_name, tool_args = self._extract_tool_call(reply)
-
-        if tool_name:
-            # Escalation Check
-            action = Action(
-                type=tool_name,
-                description=f"Uitvoeren van tool {tool_name} met {tool_args}",
-                amount=tool_args.get("amount", 0.0),
-                sensitive=tool_args.get("sensitive", False)
+        if final:
+            instruction = "Format het resultaat voor de gebruiker, inclusief links."
+        else:
+            instruction = (
+                "Heb je nog tools nodig (bijv. acties die afhangen van deze resultaten), reageer dan "
+                "ALLEEN met JSON (een object of een lijst). Anders: format het resultaat voor de "
+                "gebruiker, inclusief links."
             )
-            
-            check = self.escalation.check_action(action)
-            if check == EscalationResult.BLOCK:
-                return "❌ Actie geblokkeerd: Dit overschrijdt de veiligheidslimieten."
-            elif check == EscalationResult.CONFIRM:
-                if not self._confirm_action(action):
-                    return "🚫 Actie geannuleerd door gebruiker."
-
-            # Execute Tool
-            tool_fn = self.available_tools.get(tool_name)
-            if tool_fn:
-                try:
-                    observation = tool_fn(**tool_args)
-                    self.notion.log_event("P2", f"Tool executed: {tool_name}", {"args": tool_args})
-                    
-                    # Final thinking turn to format the result
-                    final_prompt = f"{system_prompt}\n\nTask: {message}\nTool '{tool_name}' output: {observation}\n\nFormat het resultaat voor de gebruiker, inclusief links."
-                    return self._call_gemini(final_prompt)
-                except Exception as e:
-                    return f"Fout bij uitvoeren tool: {e}"
-            else:
-                return f"Tool {tool_name} niet gevonden."
+        return f"{system_prompt}\n\nTask: {message}\n{blocks}\n\n{instruction}"
+
+    def _render_locally(self, outcomes: List[ToolOutcome]) -> Optional[str]:
+        """Format structured tool results without a second model call, if every tool has a renderer."""
+        if not self.settings.TOOL_RENDERERS_ENABLED or not outcomes:
+            return None
+        if any(o.status != "ok" for o in outcomes):
+            return None
+        return render_results((o.name, o.args, o.output) for o in outcomes)
+
+    @staticmethod
+    def _denied_reply(outcomes: List[ToolOutcome]) -> Optional[str]:
+        """Reply directly when none of the requested actions was allowed to run."""
+        if not outcomes or any(o.status not in ("blocked", "cancelled") for o in outcomes):
+            return None
+        if any(o.status == "blocked" for o in outcomes):
+            return "❌ Actie geblokkeerd: Dit overschrijdt de veiligheidslimieten."
+        return "🚫 Actie geannuleerd door gebruiker."
+
+    def _memory_token_budget(self) -> Optional[int]:
+        """Token budget of the memory window for the configured model (None: last 10 messages)."""
+        budgets = self.settings.MEMORY_TOKEN_BUDGETS
+        budget = budgets.get(self.settings.GEMINI_MODEL_NAME, self.settings.MEMORY_TOKEN_BUDGET)
+        return budget if budget > 0 else None
+
+    async def _session_memory(self, session_id: Optional[str]) -> MemoryManager:
+        """Memory of the session (loaded from disk on first use), or the default memory."""
+        if session_id is None:
+            return self.memory
+        return await self._run_blocking(self.sessions.get, session_id)
 
+    async def _prepare_turn(self, message: str, memory: MemoryManager) -> Tuple[str, str]:
+        """Store the message and build (system_prompt, first prompt) for a turn."""
+        with span("agent.prompt_build") as trace:
+            await self._run_blocking(memory.add_entry, "user", message)
+            system_prompt = self._build_system_prompt(message)
+
+            # De summarizer doet een (sync) Gemini call: op de achtergrond, of anders buiten de event loop
+            with span("agent.memory_window") as window_trace:
+                summarize_calls = memory.summarize_calls
+                token_budget = self._memory_token_budget()
+                context_messages = await self._run_blocking(
+                    memory.get_context_window,
+                    system_prompt=system_prompt,
+                    max_messages=None if token_budget else 10,
+                    summarizer=self.summarize_memory,
+                    background=self.settings.MEMORY_SUMMARIZE_BACKGROUND,
+                    token_budget=token_budget,
+                    recall_query=message,
+                    recall_k=self.settings.RECALL_TOP_K if self.settings.RECALL_ENABLED else 0,
+                )
+                window_tokens = sum(estimate_tokens(m["content"]) for m in context_messages)
+                window_trace.set(
+                    summarize_calls=memory.summarize_calls - summarize_calls,
+                    window_tokens=window_tokens,
+                    window_messages=len(context_messages),
+                    recall_hits=memory.last_recall_hits,
+                )
+            # Flatten context for the model
+            context_str = "\n".join([f"{m['role']}: {m['content']}" for m in context_messages])
+            prompt = f"{system_prompt}\n\n{context_str}\nUser: {message}"
+            prompt_tokens = estimate_tokens(prompt)
+            trace.set(prompt_chars=len(prompt), prompt_tokens=prompt_tokens, history_messages=len(context_messages))
+            model = self.settings.GEMINI_MODEL_NAME
+            PROMPT_TOKENS.observe(prompt_tokens, model=model, part="prompt")
+            PROMPT_TOKENS.observe(window_tokens, model=model, part="memory_window")
+        return system_prompt, prompt
+
+    async def process_async(self, message: str, session_id: Optional[str] = None) -> str:
+        """
+        Main Emerson processing loop (asyncio-native):
+        1. Context laden (Rules, Notion OS)
+        2. Intent parsing
+        3. Escalation check (per actie)
+        4. Tool execution (onafhankelijke acties parallel)
+        5. Logging
+        6. Herhalen tot een antwoord of AGENT_MAX_STEPS
+
+        Safe to call concurrently for many sessions on one agent instance.
+
+        Args:
+            message: The user message.
+            session_id: Conversation whose memory is used; None uses the agent's default memory.
+        """
+        with span("agent.process", message_chars=len(message)) as trace:
+            start = time.perf_counter()
+            memory = await self._session_memory(session_id)
+            fast_reply = await self._try_fast_path(message, memory)
+            if fast_reply is not None:
+                trace.set(path="fast_path", reply_chars=len(fast_reply))
+                AGENT_TURNS.observe(time.perf_counter() - start, path="fast_path")
+                return fast_reply
+            try:
+                reply = await self._plan_and_act(message, memory)
+                trace.set(path="llm", reply_chars=len(reply))
+                return reply
+            finally:
+                elapsed = time.perf_counter() - start
+                AGENT_TURNS.observe(elapsed, path="llm")
+                if self.settings.FAST_PATH_ENABLED:
+                    self.fast_path.record_miss(elapsed)
+
+    async def _try_fast_path(self, message: str, memory: MemoryManager) -> Optional[str]:
+        """Vaste formuleringen (daily check, projectstatus) direct naar de tool, zonder LLM call."""
+        if not self.settings.FAST_PATH_ENABLED:
+            return None
+        start = time.perf_counter()
+        with span("agent.fast_path") as trace:
+            # Kan de projectnamen uit Notion laden, dus buiten de event loop
+            match = await self._run_blocking(self.fast_path.match, message, self.available_tools)
+            trace.set(hit=match is not None, rule=match.rule if match else None)
+        if match is None:
+            return None
+
+        outcomes = await self._act([(match.tool, match.args)])
+        denied = self._denied_reply(outcomes)
+        if denied is None and (not outcomes or outcomes[0].status != "ok"):
+            return None  # Tool faalde: laat het LLM-pad het afhandelen
+
+        await self._run_blocking(memory.add_entry, "user", message)
+        reply = denied or self._render_locally(outcomes) or str(outcomes[0].output)
+        self.fast_path.record_hit(match.rule, time.perf_counter() - start)
         return reply
 
+    async def _plan_and_act(self, message: str, memory: MemoryManager) -> str:
+        system_prompt, prompt = await self._prepare_turn(message, memory)
+        reply = await self._call_gemini_async(prompt)
+
+        observations: List[str] = []
+        max_steps = max(1, self.settings.AGENT_MAX_STEPS)
+        for step in range(max_steps):
+            tool_calls = self._extract_tool_calls(reply)
+            if not tool_calls:
+                return reply
+
+            outcomes = await self._act(tool_calls)
+            denied = self._denied_reply(outcomes)
+            if denied:
+                return denied
+            # Alleen lokaal formatteren als het model geen volgende stap meer kan willen:
+            # de actie is als antwoord gemarkeerd, of dit is de laatste stap
+            final_action = self._signals_final(self._parse_json_reply(reply))
+            rendered = self._render_locally(outcomes) if final_action or step == max_steps - 1 else None
+            if rendered:
+                return rendered
+
+            # Alle resultaten van deze stap in één observatie-blok
+            observations.append("\n".join(outcome.observation() for outcome in outcomes))
+            final = step == max_steps - 1
+            with span("agent.format", step=step + 1, final=final):
+                reply = await self._call_gemini_async(
+                    self._observation_prompt(system_prompt, message, observations, final)
+                )
+
+        return reply
+
+    async def process_stream_async(
+        self, message: str, timings: Optional[StreamTimings] = None, session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of process_async.
+
+        Plain-text answers are yielded chunk by chunk as the model streams them.
+        Tool actions are dispatched as soon as a complete JSON action object has
+        streamed, while the rest of the generation is still arriving.
+
+        Args:
+            message: The user message.
+            timings: Optional StreamTimings that receives time-to-first-token and
+                     time-to-first-tool-start.
+            session_id: Conversation whose memory is used; None uses the agent's default memory.
+        """
+        timings = timings or StreamTimings()
+        timings.start()
+        try:
+            memory = await self._session_memory(session_id)
+            fast_reply = await self._try_fast_path(message, memory)
+            if fast_reply is not None:
+                timings.mark_first_token()
+                yield fast_reply
+                return
+
+            system_prompt, prompt = await self._prepare_turn(message, memory)
+            semaphore = asyncio.Semaphore(self.settings.AGENT_MAX_PARALLEL_TOOLS)
+            observations: List[str] = []
+            max_steps = max(1, self.settings.AGENT_MAX_STEPS)
+
+            for step in range(max_steps + 1):
+                detector = ActionStreamDetector()
+                outcomes: List[Optional[ToolOutcome]] = []
+                final_flags: List[bool] = []
+                tasks: List[Tuple[int, "asyncio.Task[ToolOutcome]"]] = []
+
+                if step == max_steps:
+                    # Laatste stap: geen tools meer, antwoord direct doorstromen
+                    async for chunk in self._stream_gemini_async(prompt):
+                        timings.mark_first_token()
+                        yield chunk
+                    return
+
+                def dispatch(payloads: List[Any]) -> None:
+                    for payload in payloads:
+                        final_flags.append(self._signals_final(payload))
+                        for name, args in self._tool_calls_from_payload(payload):
+                            denied = self._check_escalation(name, args)
+                            outcomes.append(denied)
+                            if denied is None:
+                                timings.mark_tool_start()
+                                task = asyncio.create_task(self._run_tool_call(name, args, semaphore))
+                                tasks.append((len(outcomes) - 1, task))
+
+                async for chunk in self._stream_gemini_async(prompt):
+                    text, payloads = detector.feed(chunk)
+                    if text:
+                        timings.mark_first_token()
+                        yield text
+                    dispatch(payloads)
+
+                text, payloads = detector.finish()
+                if text:
+                    timings.mark_first_token()
+                    yield text
+                dispatch(payloads)
+                if not outcomes:
+                    if detector.mode == "json":
+                        # JSON zonder geldige actie: toon het ruwe antwoord
+                        timings.mark_first_token()
+                        yield detector.raw.strip()
+                    return
+
+                for index, task in tasks:
+                    outcomes[index] = await task
+                finished = [outcome for outcome in outcomes if outcome is not None]
+                denied_reply = self._denied_reply(finished)
+                if denied_reply:
+                    timings.mark_first_token()
+                    yield denied_reply
+                    return
+                final_action = bool(final_flags) and all(final_flags)
+                rendered = self._render_locally(finished) if final_action or step == max_steps - 1 else None
+                if rendered:
+                    timings.mark_first_token()
+                    yield rendered
+                    return
+
+                observations.append("\n".join(outcome.observation() for outcome in finished))
+                prompt = self._observation_prompt(
+                    system_prompt, message, observations, final=step >= max_steps - 1
+                )
+        finally:
+            timings.finish()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start (once) the background event loop that serves the sync API."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="agent-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def process(self, message: str, session_id: Optional[str] = None) -> str:
+        """Synchronous wrapper around process_async."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self.process_async(message, session_id), loop)
+        return future.result()
+
+    def process_stream(
+        self, message: str, timings: Optional[StreamTimings] = None, session_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """Synchronous generator around process_stream_async."""
+        loop = self._ensure_loop()
+        stream = self.process_stream_async(message, timings, session_id)
+        try:
+            while True:
+                try:
+                    chunk = asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        finally:
+            asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
     def run(self, task: str):
         print(f"🚀 Emerson Agent Start: {task}")
         result = self.process(task)
         print(f"📦 Resultaat: {result}")
 
     def shutdown(self):
+        self.context_cache.close()
+        # Gedeeld geheugen wordt gesloten door de agent die het heeft aangemaakt
+        if self._owns_memory:
+            self.memory.close()
+        if self._owns_sessions:
+            self.sessions.close()
+        self.notion.flush_logs(self.settings.NOTION_LOG_FLUSH_TIMEOUT)
+        tracer.flush()
+        trace_stats = tracer.stats()
+        if trace_stats["traces"] and self.settings.TRACE_JSONL_PATH:
+            print(f"📊 Traces: {trace_stats['traces']} opgeslagen in {self.settings.TRACE_JSONL_PATH}")
+        if self.settings.METRICS_DUMP_PATH:
+            dump_metrics(self.settings.METRICS_DUMP_PATH)
+        llm_cache = get_llm_cache()
+        fast_stats = self.fast_path.stats.summary()
+        if fast_stats["hits"]:
+            print(
+                f"📊 Fast path: {fast_stats['hits']} hits ({fast_stats['hit_rate']:.0%}), "
+                f"geschatte besparing {fast_stats['saved_s']}s"
+            )
+        cascade_stats = self.cascade.stats()
+        if cascade_stats["local_answers"] or cascade_stats["escalations"]:
+            print(
+                f"📊 Cascade: {cascade_stats['local_answers']} lokaal beantwoord, "
+                f"escalatie-ratio {cascade_stats['escalation_rate']:.0%} {cascade_stats['escalations']}"
+            )
+        if llm_cache.hits + llm_cache.misses:
+            llm_stats = llm_cache.stats()
+            print(
+                f"📊 LLM cache: {llm_stats['hits']}/{llm_stats['hits'] + llm_stats['misses']} hits "
+                f"({llm_stats['hit_ratio']:.0%}), {llm_stats['entries']} entries"
+            )
         if self.mcp_manager:
             self.mcp_manager.shutdown()
+        with self._loop_lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                if self._loop_thread is not None:
+                    self._loop_thread.join(timeout=5)
+                self._loop.close()
+            self._loop = None
+        self._tool_executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -5,10 +5,11 @@ Provides common functionality for agent execution, context management,
 and communication with the Gemini API.
 """
 
-import os
 from typing import Any, Dict, List, Optional
-from google import genai
 from src.config import settings
+from src.llm_cache import get_llm_cache
+from src.llm_gateway import DummyClient, get_gateway
+from src.tracing import span
 
 
 class BaseAgent:
@@ -31,34 +32,15 @@ class BaseAgent:
         self.system_prompt = system_prompt
         self.conversation_history: List[Dict[str, str]] = []
         
-        # Initialize Gemini client
-        running_under_pytest = "PYTEST_CURRENT_TEST" in os.environ
-        if running_under_pytest:
-            # Dummy client for testing
-            class _DummyClient:
-                class _Models:
-                    def generate_content(self, model, contents):
-                        class _R:
-                            text = f"[{role}] Task completed"
-                        return _R()
-                def __init__(self):
-                    self.models = self._Models()
-            self.client = _DummyClient()
+        # All agents share one client through the process-wide gateway
+        self.gateway = get_gateway()
+        if self.gateway.offline:
+            # Dummy client for testing / missing API key
+            self.client = DummyClient(f"[{role}] Task completed")
         else:
-            try:
-                self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-            except Exception as e:
-                print(f"⚠️ {role} agent: genai client not initialized: {e}")
-                # Fallback to dummy client
-                class _DummyClient:
-                    class _Models:
-                        def generate_content(self, model, contents):
-                            class _R:
-                                text = f"[{role}] Task completed"
-                            return _R()
-                    def __init__(self):
-                        self.models = self._Models()
-                self.client = _DummyClient()
+            self.client = self.gateway.client
+        # Responses of the dummy client are never cached
+        self._use_llm_cache = not isinstance(self.client, DummyClient)
     
     def execute(self, task: str, context: Optional[List[Dict[str, str]]] = None) -> str:
         """
@@ -83,13 +65,20 @@ class BaseAgent:
         
         full_prompt = "".join(prompt_parts)
         
-        # Call Gemini API
+        # Call Gemini API (identical prompts are served from the response cache)
+        cache = get_llm_cache() if self._use_llm_cache else None
         try:
-            response = self.client.models.generate_content(
-                model=settings.GEMINI_MODEL_NAME,
-                contents=full_prompt
-            )
-            result = getattr(response, "text", str(response)).strip()
+            with span("agent.execute", role=self.role, prompt_chars=len(full_prompt)) as trace:
+                result = cache.get(settings.GEMINI_MODEL_NAME, full_prompt) if cache else None
+                trace.set(cached=result is not None)
+                if result is None:
+                    response = self.gateway.generate(
+                        settings.GEMINI_MODEL_NAME, full_prompt, client=self.client
+                    )
+                    result = getattr(response, "text", str(response)).strip()
+                    if cache:
+                        cache.put(settings.GEMINI_MODEL_NAME, full_prompt, result)
+                trace.set(reply_chars=len(result))
             
             # Store in conversation history
             self.conversation_history.append({
@@ -0,0 +1,168 @@
+"""
+Model cascade: try a local OpenAI-compatible model first, escalate to Gemini.
+
+Most agent turns are cheap: classify the intent and emit a tool-call JSON, or
+format a tool result. Those are sent to the local backend configured for
+`src/tools/openai_proxy.py` (Ollama, llama.cpp, ...) first. The turn escalates
+to Gemini when:
+
+- the prompt is too long for the local tier (`CASCADE_MAX_LOCAL_TOKENS`);
+- the local call fails or returns nothing;
+- the reply cannot be parsed (broken JSON, unknown tool);
+- the mean token probability is below `CASCADE_MIN_CONFIDENCE` (when the
+  backend returns logprobs).
+
+Per-tier latency and the escalation rate are recorded in `stats()`.
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.retrieval import estimate_tokens
+
+# (prompt) -> (reply, confidence or None); raises on failure
+LocalModel = Callable[[str], Tuple[str, Optional[float]]]
+# (reply) -> None if acceptable, otherwise the escalation reason
+Validator = Callable[[str], Optional[str]]
+
+
+def _default_local_model(prompt: str) -> Tuple[str, Optional[float]]:
+    from src.tools.openai_proxy import _chat_completion
+
+    return _chat_completion(
+        prompt,
+        model=settings.CASCADE_LOCAL_MODEL or None,
+        temperature=0.0,
+        max_tokens=settings.CASCADE_LOCAL_MAX_TOKENS,
+        logprobs=True,
+        timeout=settings.CASCADE_LOCAL_TIMEOUT,
+    )
+
+
+@dataclass
+class TierStats:
+    """Call count and latencies of one tier."""
+
+    calls: int = 0
+    failures: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        self.calls += 1
+        if not ok:
+            self.failures += 1
+        self.latencies.append(seconds)
+        del self.latencies[:-1000]
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency_s": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p95_latency_s": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else 0.0,
+        }
+
+
+class CascadeRouter:
+    """
+    Routes a prompt to the local tier and decides whether to escalate.
+
+    Example usage:
+        cascade = CascadeRouter()
+        reply = cascade.try_local(prompt, validate)
+        if reply is None:
+            reply = call_gemini(prompt)
+    """
+
+    def __init__(
+        self,
+        local_model: Optional[LocalModel] = None,
+        max_local_tokens: Optional[int] = None,
+        min_confidence: Optional[float] = None,
+    ):
+        """
+        Args:
+            local_model: Local tier callable. Defaults to the OpenAI-compatible backend.
+            max_local_tokens: Longest prompt (estimated tokens) sent to the local tier.
+                Defaults to settings.CASCADE_MAX_LOCAL_TOKENS.
+            min_confidence: Minimum mean token probability. Defaults to settings.CASCADE_MIN_CONFIDENCE.
+        """
+        self.local_model = local_model or _default_local_model
+        self.max_local_tokens = settings.CASCADE_MAX_LOCAL_TOKENS if max_local_tokens is None else max_local_tokens
+        self.min_confidence = settings.CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.tiers: Dict[str, TierStats] = {"local": TierStats(), "gemini": TierStats()}
+        self.escalations: Counter = Counter()
+        self.local_answers = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.CASCADE_ENABLED and bool(settings.OPENAI_BASE_URL)
+
+    def _escalate(self, reason: str) -> None:
+        with self._lock:
+            self.escalations[reason] += 1
+
+    def try_local(self, prompt: str, validate: Optional[Validator] = None) -> Optional[str]:
+        """
+        Ask the local tier; blocking (run it in a worker thread from async code).
+
+        Args:
+            prompt: Full prompt.
+            validate: Optional reply check returning an escalation reason or None.
+
+        Returns:
+            The local reply, or None when the turn must escalate to Gemini.
+        """
+        if estimate_tokens(prompt) > self.max_local_tokens:
+            self._escalate("long_context")
+            return None
+
+        start = time.perf_counter()
+        try:
+            reply, confidence = self.local_model(prompt)
+        except Exception as e:
+            with self._lock:
+                self.tiers["local"].record(time.perf_counter() - start, ok=False)
+            print(f"⚠️ Local model unavailable, escalating to Gemini: {e}")
+            self._escalate("local_error")
+            return None
+        with self._lock:
+            self.tiers["local"].record(time.perf_counter() - start)
+
+        reply = (reply or "").strip()
+        if not reply:
+            self._escalate("empty")
+            return None
+        if confidence is not None and confidence < self.min_confidence:
+            self._escalate("low_confidence")
+            return None
+        reason = validate(reply) if validate else None
+        if reason:
+            self._escalate(reason)
+            return None
+
+        with self._lock:
+            self.local_answers += 1
+        return reply
+
+    def record_gemini(self, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.tiers["gemini"].record(seconds, ok)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            escalated = sum(self.escalations.values())
+            attempts = self.local_answers + escalated
+            return {
+                "local": self.tiers["local"].summary(),
+                "gemini": self.tiers["gemini"].summary(),
+                "local_answers": self.local_answers,
+                "escalations": dict(self.escalations),
+                "escalation_rate": escalated / attempts if attempts else 0.0,
+            }
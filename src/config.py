@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -36,6 +36,15 @@ class Settings(BaseSettings):
     # Agent Configuration
     AGENT_NAME: str = "AntigravityAgent"
     DEBUG_MODE: bool = False
+    AGENT_TOOL_WORKERS: int = Field(
+        default=8, description="Thread pool size for running sync tools and blocking I/O in process_async"
+    )
+    AGENT_MAX_STEPS: int = Field(
+        default=4, description="Maximum number of plan/act iterations (tool turns) per message"
+    )
+    AGENT_MAX_PARALLEL_TOOLS: int = Field(
+        default=4, description="Maximum number of independent tool actions executed concurrently"
+    )
 
     # External LLM (OpenAI-compatible) Configuration
     OPENAI_BASE_URL: str = Field(
@@ -53,6 +62,58 @@ class Settings(BaseSettings):
 
     # Memory Configuration
     MEMORY_FILE: str = "agent_memory.json"
+    MEMORY_BACKEND: str = Field(
+        default="journal", description="'journal' (append-only JSONL next to MEMORY_FILE) or 'json' (rewrite per change)"
+    )
+    MEMORY_FSYNC: str = Field(
+        default="interval", description="Journal fsync policy: 'always', 'interval' or 'never'"
+    )
+    MEMORY_FSYNC_INTERVAL: float = Field(default=1.0, description="Seconds between journal fsyncs for 'interval'")
+    MEMORY_LOAD_TAIL: int = Field(
+        default=2000, description="Messages loaded into RAM at startup; older ones stay on disk (0 = all)"
+    )
+    MEMORY_COMPACT_MIN_BYTES: int = Field(
+        default=1_048_576, description="Dead journal bytes (old summaries, cleared history) before compaction"
+    )
+    MEMORY_SUMMARIZE_BACKGROUND: bool = Field(
+        default=True, description="Summarize evicted history off the request path; replies use the last finished summary"
+    )
+    MEMORY_SUMMARIZE_WORKERS: int = Field(default=2, description="Threads for background summaries (process-wide)")
+    MEMORY_SUMMARIZE_CLOSE_TIMEOUT: float = Field(
+        default=30.0, description="Seconds to wait for a running background summary on shutdown"
+    )
+    MEMORY_TOKEN_BUDGET: int = Field(
+        default=4000, description="Estimated tokens for summary + history in the prompt (0 = last 10 messages)"
+    )
+    MEMORY_TOKEN_BUDGETS: Dict[str, int] = Field(
+        default_factory=dict, description="Per-model overrides of MEMORY_TOKEN_BUDGET, e.g. {\"gemini-2.5-pro\": 16000}"
+    )
+
+    # Recall Configuration
+    RECALL_ENABLED: bool = Field(
+        default=True, description="Index past memory entries and inject relevant ones that fell out of the window"
+    )
+    RECALL_TOP_K: int = Field(default=3, description="Maximum number of recalled messages per context window")
+    RECALL_MAX_DF: float = Field(
+        default=0.05, description="Query features present in more than this fraction of messages are skipped"
+    )
+    RECALL_MAX_POSTINGS: int = Field(
+        default=2000, description="Newest messages visited per query feature (bounds the cost of a lookup)"
+    )
+    RECALL_MIN_SCORE: float = Field(default=0.15, description="Minimum cosine similarity of a recalled message")
+    RECALL_SNIPPET_CHARS: int = Field(default=300, description="Characters of each message kept in the recall index")
+    RECALL_LOAD_TAIL: int = Field(
+        default=50_000, description="Newest recall entries indexed at startup; older ones are not recalled (0 = all)"
+    )
+
+    # Session Configuration
+    SESSION_DIR: str = Field(
+        default=".cache/sessions", description="One memory file per session_id is kept in this directory"
+    )
+    SESSION_MAX_HOT: int = Field(default=256, description="Sessions kept in RAM (least recently used are evicted)")
+    SESSION_IDLE_TIMEOUT: float = Field(
+        default=1800.0, description="Seconds before an idle session is dropped from RAM (0 = never)"
+    )
 
     # MCP Configuration
     MCP_ENABLED: bool = Field(default=False, description="Enable MCP integration")
@@ -79,9 +140,174 @@ class Settings(BaseSettings):
     NOTION_DATABASE_LOGS: str = "197daeb1-7fbf-446d-a81b-b3ec716196be"
     NOTION_DATABASE_PROMPTS: str = "4384cf24-c692-413d-ba06-93c935cae521"
 
+    # Notion Log Sink Configuration
+    NOTION_LOG_ASYNC: bool = Field(
+        default=True, description="Write log events from a background sink instead of on the request path"
+    )
+    NOTION_LOG_WINDOW: float = Field(default=0.5, description="Seconds during which identical log events are coalesced")
+    NOTION_LOG_RATE_LIMIT: float = Field(default=3.0, description="Maximum Notion log writes per second")
+    NOTION_LOG_JOURNAL: str = Field(
+        default=".cache/notion_log_journal.jsonl",
+        description="Local journal for log events that could not be written to Notion (replayed on start)",
+    )
+    NOTION_LOG_RETRY_INTERVAL: float = Field(
+        default=30.0, description="Seconds before retrying Notion after a failed log write"
+    )
+    NOTION_LOG_FLUSH_TIMEOUT: float = Field(default=5.0, description="Seconds to wait for the log queue on shutdown")
+
     # Obsidian Configuration
     OBSIDIAN_VAULT_PATH: str = Field(default="", description="The absolute path to the Obsidian Vault")
 
+    # Context Cache Configuration
+    CONTEXT_CACHE_CHECK_INTERVAL: float = Field(
+        default=1.0,
+        description="Minimum seconds between mtime/size revalidations of cached context files",
+    )
+    CONTEXT_CACHE_WATCH: bool = Field(
+        default=True,
+        description="Use a filesystem watcher (watchdog/inotify) for context invalidation when available",
+    )
+
+    # Context Retrieval Configuration
+    CONTEXT_RETRIEVAL_ENABLED: bool = Field(
+        default=True,
+        description="Inject only relevant context chunks instead of the full context corpus",
+    )
+    CONTEXT_TOKEN_BUDGET: int = Field(
+        default=1500, description="Estimated token budget for retrieved (non-pinned) context chunks"
+    )
+    CONTEXT_TOP_K: int = Field(default=8, description="Maximum number of retrieved context chunks")
+    CONTEXT_CHUNK_MAX_TOKENS: int = Field(
+        default=400, description="Soft maximum size of a single context chunk in estimated tokens"
+    )
+    CONTEXT_PINNED_FILES: List[str] = Field(
+        default_factory=lambda: [".emerson/rules.md"],
+        description="Context files that are always included, as '<dir>/<file>'",
+    )
+
+    # Tool Discovery Configuration
+    TOOL_MANIFEST_PATH: str = Field(
+        default=".cache/tool_manifest.json",
+        description="Cache file for the AST-scanned tool manifest (keyed on tool file hashes)",
+    )
+
+    # Tool Selection Configuration
+    TOOL_SELECTION_ENABLED: bool = Field(
+        default=True, description="Render only the tools relevant to the message into the prompt"
+    )
+    TOOL_TOP_K: int = Field(default=12, description="Maximum number of ranked (non-pinned) tools per prompt")
+    TOOL_PINNED: List[str] = Field(
+        default_factory=lambda: ["get_project_status", "create_task", "daily_check", "search_projects"],
+        description="Core tools that are always included in the prompt",
+    )
+
+    # Tool Result Cache Configuration
+    TOOL_CACHE_ENABLED: bool = Field(default=True, description="Cache results of tools declared cacheable")
+    TOOL_CACHE_MAX_ENTRIES: int = Field(default=512, description="LRU capacity of the tool result cache")
+    TOOL_CACHE_MCP_TTL: float = Field(
+        default=30.0, description="TTL in seconds for MCP tools annotated readOnlyHint/idempotentHint"
+    )
+
+    # Result Rendering Configuration
+    TOOL_RENDERERS_ENABLED: bool = Field(
+        default=True,
+        description="Format structured tool results with local renderers instead of a second LLM call",
+    )
+
+    # Fast Path Configuration
+    FAST_PATH_ENABLED: bool = Field(
+        default=True, description="Answer common fixed-phrase intents with a direct tool call, without the LLM"
+    )
+    FAST_PATH_MIN_CONFIDENCE: float = Field(
+        default=0.85, description="Minimum match confidence (incl. fuzzy project-name similarity) for the fast path"
+    )
+    FAST_PATH_PROJECT_TTL: float = Field(default=300.0, description="Seconds the known project names are cached")
+
+    # Model Cascade Configuration
+    CASCADE_ENABLED: bool = Field(
+        default=False,
+        description="Try the local OpenAI-compatible model (OPENAI_BASE_URL) before escalating to Gemini",
+    )
+    CASCADE_LOCAL_MODEL: str = Field(default="", description="Local tier model; defaults to OPENAI_MODEL")
+    CASCADE_MAX_LOCAL_TOKENS: int = Field(
+        default=3000, description="Prompts longer than this (estimated tokens) go straight to Gemini"
+    )
+    CASCADE_MIN_CONFIDENCE: float = Field(
+        default=0.6, description="Minimum mean token probability of a local reply (when logprobs are available)"
+    )
+    CASCADE_LOCAL_MAX_TOKENS: int = Field(default=512, description="Maximum tokens generated by the local tier")
+    CASCADE_LOCAL_TIMEOUT: float = Field(default=15.0, description="Timeout in seconds for a local tier call")
+
+    # LLM Gateway Configuration
+    LLM_RATE_LIMIT_RPS: float = Field(default=5.0, description="Requests per second per model (token bucket rate, 0 = unlimited)")
+    LLM_RATE_LIMIT_BURST: float = Field(default=10.0, description="Token bucket capacity per model")
+    LLM_MAX_RETRIES: int = Field(default=3, description="Retries for rate-limited (429), 5xx and connection errors")
+    LLM_RETRY_BASE_DELAY: float = Field(default=0.5, description="Base delay in seconds of the jittered exponential backoff")
+    LLM_RETRY_MAX_DELAY: float = Field(default=8.0, description="Maximum backoff delay in seconds")
+    LLM_HEDGE_ENABLED: bool = Field(
+        default=False, description="Send a duplicate request when one runs longer than the model's latency percentile"
+    )
+    LLM_HEDGE_PERCENTILE: float = Field(default=95.0, description="Latency percentile after which a request is hedged")
+    LLM_HEDGE_MIN_SAMPLES: int = Field(default=20, description="Latency samples needed before hedging kicks in")
+
+    # LLM Response Cache Configuration
+    LLM_CACHE_ENABLED: bool = Field(
+        default=True, description="Serve identical LLM requests (model + prompt + params) from a local cache"
+    )
+    LLM_CACHE_PATH: str = Field(default=".cache/llm_responses.sqlite3", description="SQLite file of the LLM response cache")
+    LLM_CACHE_MAX_BYTES: int = Field(
+        default=50 * 1024 * 1024, description="Total size of cached responses before LRU eviction"
+    )
+
+    # Mission Batch Runner Configuration
+    MISSION_CONCURRENCY: int = Field(default=4, description="Missions in flight in the mission batch runner")
+    MISSION_ARTIFACTS_DIR: str = Field(
+        default="artifacts/missions", description="Output directory for mission results and the run report"
+    )
+
+    # Single-Flight Configuration
+    SINGLEFLIGHT_ENABLED: bool = Field(
+        default=True, description="Let concurrent identical idempotent calls (tools, Notion reads) share one execution"
+    )
+
+    # Tracing Configuration
+    TRACE_ENABLED: bool = Field(
+        default=False, description="Record nested spans of agent phases (context load, Gemini, tools, Notion)"
+    )
+    TRACE_SAMPLE_RATE: float = Field(
+        default=1.0, description="Fraction of traces (root spans) that is recorded"
+    )
+    TRACE_BUFFER_SIZE: int = Field(
+        default=10000, description="Finished spans kept in memory for export"
+    )
+    TRACE_JSONL_PATH: str = Field(
+        default=".cache/traces.jsonl", description="Finished traces are appended here as JSON lines ('' = memory only)"
+    )
+
+    # Metrics Configuration
+    METRICS_PORT: int = Field(
+        default=0, description="Serve Prometheus metrics on http://METRICS_HOST:METRICS_PORT/metrics (0 = no endpoint)"
+    )
+    METRICS_HOST: str = Field(default="127.0.0.1", description="Bind address of the metrics endpoint")
+    METRICS_DUMP_PATH: str = Field(
+        default="", description="Write the metrics in Prometheus text format to this file on agent shutdown ('' = off)"
+    )
+
+    # Server Configuration
+    SERVER_HOST: str = Field(default="127.0.0.1", description="Bind address of the HTTP server (src.server)")
+    SERVER_PORT: int = Field(default=8080, description="Port of the HTTP server")
+    SERVER_AGENT_POOL_SIZE: int = Field(default=2, description="Warm GeminiAgent instances kept by the server")
+    SERVER_SWARM_POOL_SIZE: int = Field(default=1, description="Warm swarms kept by the server (0 = /swarm disabled)")
+    SERVER_MAX_CONCURRENCY: int = Field(default=16, description="Requests executing at once")
+    SERVER_MAX_QUEUE: int = Field(
+        default=64, description="Requests waiting for a slot; beyond this the server answers 503"
+    )
+    SERVER_DRAIN_TIMEOUT: float = Field(
+        default=30.0, description="Seconds to wait for in-flight requests on shutdown"
+    )
+    SERVER_READ_TIMEOUT: float = Field(default=30.0, description="Seconds to receive a complete request")
+    SERVER_MAX_BODY_BYTES: int = Field(default=1_048_576, description="Largest accepted request body")
+
     # Escalation Settings
     BUDGET_THRESHOLD: float = 500.0
     CRITICAL_THRESHOLD: float = 2000.0
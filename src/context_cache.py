@@ -0,0 +1,286 @@
+"""
+In-process cache for the agent's markdown context corpus.
+
+`GeminiAgent._load_context` used to glob and re-read every `*.md` file in the
+context directories on every request. This module keeps the parsed files and
+the assembled prompt text in memory and only goes back to disk when a file
+actually changed:
+
+- Without a watcher, files are revalidated on `(mtime, size)` at most once per
+  `CONTEXT_CACHE_CHECK_INTERVAL` seconds. Directory mtimes are used to detect
+  added or removed files without re-globbing.
+- When `watchdog` is installed (inotify on Linux), filesystem events mark the
+  cache dirty and the hot path does not touch the disk at all.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+
+@dataclass
+class ContextFile:
+    """A single cached context file."""
+
+    path: Path
+    source: str  # Name of the directory the file was found in
+    content: str
+    mtime_ns: int
+    size: int
+
+    def render(self) -> str:
+        """Render the file the way it is injected into the system prompt."""
+        return f"\n--- {self.path.name} (from {self.source}) ---\n{self.content}"
+
+
+class ContextCache:
+    """
+    Holds the assembled context text and invalidates it per file.
+
+    Example usage:
+        cache = ContextCache()
+        text = cache.get_text([Path(".context"), Path(".emerson")])
+        print(cache.stats())
+    """
+
+    def __init__(
+        self,
+        check_interval: Optional[float] = None,
+        use_watcher: Optional[bool] = None,
+    ):
+        """
+        Initialize the context cache.
+
+        Args:
+            check_interval: Minimum seconds between disk revalidations.
+                            Defaults to settings.CONTEXT_CACHE_CHECK_INTERVAL.
+            use_watcher: Start a filesystem watcher when `watchdog` is available.
+                         Defaults to settings.CONTEXT_CACHE_WATCH.
+        """
+        self.check_interval = (
+            settings.CONTEXT_CACHE_CHECK_INTERVAL if check_interval is None else check_interval
+        )
+        self.use_watcher = settings.CONTEXT_CACHE_WATCH if use_watcher is None else use_watcher
+
+        self._dirs: Tuple[Path, ...] = ()
+        self._listings: Dict[Path, Tuple[int, List[Path]]] = {}
+        self._files: Dict[Path, ContextFile] = {}
+        self._text: Optional[str] = None
+        self._dirty = True
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self._observer: Any = None
+        self._watch_complete = False
+
+        # Incremented whenever the set or content of cached files changes
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.file_reads = 0
+        self.revalidations = 0
+
+    def get_files(self, dirs: Sequence[Path]) -> List[ContextFile]:
+        """
+        Return the cached context files for the given directories, in prompt order.
+
+        Args:
+            dirs: Directories to scan for `*.md` files. Missing directories are skipped.
+
+        Returns:
+            List of ContextFile objects ordered by directory, then file name.
+        """
+        with self._lock:
+            self._refresh(tuple(Path(d) for d in dirs))
+            files = []
+            for d in self._dirs:
+                for path in self._listings.get(d, (0, []))[1]:
+                    cached = self._files.get(path)
+                    if cached is not None:
+                        files.append(cached)
+            return files
+
+    def snapshot(self, dirs: Sequence[Path]) -> Tuple[List[ContextFile], int]:
+        """
+        Return the cached files together with the cache version they belong to.
+
+        Args:
+            dirs: Directories to scan for `*.md` files.
+
+        Returns:
+            Tuple of (files, version).
+        """
+        with self._lock:
+            files = self.get_files(dirs)
+            return files, self.version
+
+    def get_text(self, dirs: Sequence[Path]) -> str:
+        """
+        Return the assembled context text for the given directories.
+
+        Args:
+            dirs: Directories to scan for `*.md` files.
+
+        Returns:
+            The concatenated context, formatted for the system prompt.
+        """
+        with self._lock:
+            files = self.get_files(dirs)
+            if self._text is None:
+                self._text = "\n".join(f.render() for f in files)
+            return self._text
+
+    def invalidate(self) -> None:
+        """Force a revalidation against the disk on the next lookup."""
+        self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit/miss counters and the watcher state. A hit is a
+            lookup that was served without reading any file.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "file_reads": self.file_reads,
+            "revalidations": self.revalidations,
+            "files": len(self._files),
+            "version": self.version,
+            "watching": self._observer is not None,
+        }
+
+    def close(self) -> None:
+        """Stop the filesystem watcher, if any."""
+        with self._lock:
+            self._stop_watcher()
+
+    def _refresh(self, dirs: Tuple[Path, ...]) -> None:
+        """Revalidate the cache against the disk when needed."""
+        if dirs != self._dirs:
+            self._dirs = dirs
+            self._dirty = True
+            if self.use_watcher:
+                self._start_watcher()
+
+        now = time.monotonic()
+        if not self._dirty:
+            watched = self._observer is not None and self._watch_complete
+            if watched or now - self._last_check < self.check_interval:
+                self.hits += 1
+                return
+
+        self._dirty = False
+        self._last_check = now
+        self.revalidations += 1
+
+        reads_before = self.file_reads
+        changed = False
+        seen: set = set()
+
+        for d in dirs:
+            try:
+                dir_mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                if self._listings.pop(d, None) is not None:
+                    changed = True
+                continue
+
+            listing = self._listings.get(d)
+            if listing is None or listing[0] != dir_mtime:
+                self._listings[d] = (dir_mtime, sorted(d.glob("*.md")))
+                changed = True
+
+            for path in self._listings[d][1]:
+                seen.add(path)
+                if self._revalidate_file(path, d.name):
+                    changed = True
+
+        for path in list(self._files):
+            if path not in seen:
+                del self._files[path]
+                changed = True
+
+        if changed:
+            self.version += 1
+            self._text = None
+
+        if self.file_reads > reads_before:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def _revalidate_file(self, path: Path, source: str) -> bool:
+        """Reload a single file if its mtime or size changed. Returns True on change."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self._files.pop(path, None) is not None
+
+        cached = self._files.get(path)
+        if cached and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+            return False
+
+        try:
+            content = path.read_text(encoding="utf-8")
+        except Exception:
+            return self._files.pop(path, None) is not None
+
+        self.file_reads += 1
+        self._files[path] = ContextFile(
+            path=path,
+            source=source,
+            content=content,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+        )
+        return True
+
+    def _start_watcher(self) -> None:
+        """Watch the context directories for changes when watchdog is installed."""
+        self._stop_watcher()
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+
+        cache = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                cache._dirty = True
+
+        try:
+            observer = Observer()
+            handler = _Handler()
+            # Directories that don't exist yet can't be watched, keep polling for those
+            self._watch_complete = True
+            for d in self._dirs:
+                if d.exists():
+                    observer.schedule(handler, str(d), recursive=False)
+                else:
+                    self._watch_complete = False
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            print(f"⚠️ Context watcher not started, falling back to polling: {e}")
+            self._observer = None
+
+    def _stop_watcher(self) -> None:
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+            self._observer = None
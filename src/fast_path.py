@@ -0,0 +1,215 @@
+"""
+Deterministic fast path for common intents.
+
+Many messages are fixed phrases that map to exactly one tool: "Wat staat er
+vandaag op de planning?" is `daily_check`, "status van project Aura" is
+`get_project_status`. The IntentMatcher recognises these with regex patterns
+and fuzzy-matches project names against the known Notion projects, so the
+agent can call the tool directly without any LLM call. Anything that does not
+match with high confidence falls through to the normal plan/act loop.
+"""
+
+import difflib
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from src.config import settings
+
+# Confidence of a pattern match whose project name could not be checked
+# against the known projects (e.g. Notion unreachable)
+_UNVERIFIED_CONFIDENCE = 0.9
+
+
+@dataclass
+class IntentMatch:
+    """A message resolved to a single tool call."""
+
+    tool: str
+    args: Dict[str, Any]
+    confidence: float
+    rule: str
+
+
+@dataclass
+class IntentRule:
+    """Regex patterns for one tool; named group `project` (if any) is fuzzy-matched."""
+
+    name: str
+    tool: str
+    patterns: List[Pattern[str]]
+    project_arg: Optional[str] = None
+    query_arg: Optional[str] = None
+
+
+def _compile(*patterns: str) -> List[Pattern[str]]:
+    return [re.compile(p, re.IGNORECASE) for p in patterns]
+
+
+DEFAULT_RULES: List[IntentRule] = [
+    IntentRule(
+        name="daily_check",
+        tool="daily_check",
+        patterns=_compile(
+            r"^(wat staat er )?(vandaag )?op (de|mijn) planning( vandaag)?\s*\??$",
+            r"^(geef (me )?)?(het |een )?dagelijks(e)? (overzicht|check)\s*[.!?]?$",
+            r"^daily check\s*[.!?]?$",
+            r"^wat moet ik vandaag doen\s*\??$",
+        ),
+    ),
+    IntentRule(
+        name="project_status",
+        tool="get_project_status",
+        patterns=_compile(
+            r"^(wat is (de )?)?status (van|voor) (het )?project (?P<project>[\w .&'-]+?)\s*\??$",
+            r"^hoe staat (het )?project (?P<project>[\w .&'-]+?) ervoor\s*\??$",
+            r"^projectstatus (?P<project>[\w .&'-]+?)\s*\??$",
+        ),
+        project_arg="project_name",
+    ),
+    IntentRule(
+        name="search_projects",
+        tool="search_projects",
+        patterns=_compile(r"^zoek (naar )?project(en)? (?P<query>[\w .&'-]+?)\s*\??$"),
+        query_arg="query",
+    ),
+]
+
+
+@dataclass
+class FastPathStats:
+    """Hit rate and latency of the fast path versus the LLM path."""
+
+    hits: int = 0
+    misses: int = 0
+    fast_seconds: float = 0.0
+    slow_seconds: float = 0.0
+    slow_turns: int = 0
+    by_rule: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        avg_fast = self.fast_seconds / self.hits if self.hits else 0.0
+        avg_slow = self.slow_seconds / self.slow_turns if self.slow_turns else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_fast_s": round(avg_fast, 4),
+            "avg_llm_s": round(avg_slow, 4),
+            # Estimated: every fast-path hit would otherwise have cost an average LLM turn
+            "saved_s": round(max(0.0, avg_slow - avg_fast) * self.hits, 3) if self.slow_turns else None,
+            "by_rule": dict(self.by_rule),
+        }
+
+
+class IntentMatcher:
+    """
+    Matches messages against intent rules and known project names.
+
+    Example usage:
+        matcher = IntentMatcher(project_names=lambda: ["Aura", "Building Emerson"])
+        match = matcher.match("status van project aura")
+        # IntentMatch(tool="get_project_status", args={"project_name": "Aura"}, ...)
+    """
+
+    def __init__(
+        self,
+        project_names: Optional[Callable[[], List[str]]] = None,
+        rules: Optional[List[IntentRule]] = None,
+        min_confidence: Optional[float] = None,
+    ):
+        """
+        Args:
+            project_names: Returns the known project names (cached for FAST_PATH_PROJECT_TTL).
+            rules: Intent rules. Defaults to DEFAULT_RULES.
+            min_confidence: Threshold for a hit. Defaults to settings.FAST_PATH_MIN_CONFIDENCE.
+        """
+        self.project_names = project_names
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.min_confidence = settings.FAST_PATH_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.stats = FastPathStats()
+        self._names: List[str] = []
+        self._names_loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _known_projects(self) -> List[str]:
+        if self.project_names is None:
+            return []
+        with self._lock:
+            fresh = (
+                self._names_loaded_at is not None
+                and time.monotonic() - self._names_loaded_at < settings.FAST_PATH_PROJECT_TTL
+            )
+            if fresh:
+                return self._names
+        try:
+            names = [str(name) for name in self.project_names() if name]
+        except Exception as e:
+            print(f"⚠️ Fast path: could not load project names: {e}")
+            names = []
+        with self._lock:
+            self._names, self._names_loaded_at = names, time.monotonic()
+        return names
+
+    def _resolve_project(self, candidate: str) -> Optional[Tuple[str, float]]:
+        """Return (canonical name, confidence) or None if no known project is close enough."""
+        known = self._known_projects()
+        if not known:
+            return candidate, _UNVERIFIED_CONFIDENCE
+        lowered = {name.lower(): name for name in known}
+        if candidate.lower() in lowered:
+            return lowered[candidate.lower()], 1.0
+        close = difflib.get_close_matches(candidate.lower(), list(lowered), n=1, cutoff=self.min_confidence)
+        if not close:
+            return None
+        ratio = difflib.SequenceMatcher(None, candidate.lower(), close[0]).ratio()
+        return lowered[close[0]], ratio
+
+    def match(self, message: str, available_tools: Optional[Dict[str, Any]] = None) -> Optional[IntentMatch]:
+        """
+        Resolve a message to a single tool call.
+
+        Args:
+            message: The user message.
+            available_tools: Registered tools; rules for missing tools are skipped.
+
+        Returns:
+            IntentMatch when confident enough, otherwise None.
+        """
+        text = " ".join(message.strip().split())
+        for rule in self.rules:
+            if available_tools is not None and rule.tool not in available_tools:
+                continue
+            for pattern in rule.patterns:
+                found = pattern.match(text)
+                if not found:
+                    continue
+                args: Dict[str, Any] = {}
+                confidence = 1.0
+                if rule.project_arg:
+                    resolved = self._resolve_project(found.group("project").strip())
+                    if resolved is None:
+                        return None
+                    args[rule.project_arg], confidence = resolved
+                if rule.query_arg:
+                    args[rule.query_arg] = found.group("query").strip()
+                if confidence < self.min_confidence:
+                    return None
+                return IntentMatch(rule.tool, args, confidence, rule.name)
+        return None
+
+    def record_hit(self, rule: str, seconds: float) -> None:
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.fast_seconds += seconds
+            self.stats.by_rule[rule] = self.stats.by_rule.get(rule, 0) + 1
+
+    def record_miss(self, seconds: float) -> None:
+        """Record a message that took the LLM path, with its total latency."""
+        with self._lock:
+            self.stats.misses += 1
+            self.stats.slow_seconds += seconds
+            self.stats.slow_turns += 1
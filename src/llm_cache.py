@@ -0,0 +1,231 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+The same prompts recur constantly (daily checks, repeated swarm tasks, memory
+summaries) and each one pays the full model latency. Responses are stored in a
+local SQLite database keyed on a hash of the model name, the normalized prompt
+and the generation parameters. The database is bounded by
+`LLM_CACHE_MAX_BYTES` and evicted least-recently-used first.
+
+Caching can be switched off globally with `LLM_CACHE_ENABLED=false` or for a
+block of code with the `bypass()` context manager:
+
+    with bypass():
+        fresh = agent.process("Genereer een nieuw idee")
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import settings
+from src.metrics import record_cache
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextlib.contextmanager
+def bypass() -> Iterator[None]:
+    """Skip the response cache (no lookups, no stores) inside this block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic differences still hit."""
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the content address of a request.
+
+    Args:
+        model: Model name.
+        prompt: Full prompt text (including any system prompt).
+        params: Generation parameters that influence the response.
+
+    Returns:
+        Hex SHA-256 digest.
+    """
+    payload = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache with size-bounded LRU eviction.
+
+    Example usage:
+        cache = get_llm_cache()
+        text = cache.get("gemini-2.0-flash-exp", prompt)
+        if text is None:
+            text = call_model(prompt)
+            cache.put("gemini-2.0-flash-exp", prompt, text)
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: SQLite database file. Defaults to settings.LLM_CACHE_PATH.
+            max_bytes: Maximum total size of stored responses. Defaults to settings.LLM_CACHE_MAX_BYTES.
+        """
+        self.path = Path(path or settings.LLM_CACHE_PATH)
+        self.max_bytes = settings.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,"
+                    " size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM response cache unavailable: {e}")
+                return None
+        return self._conn
+
+    @staticmethod
+    def active() -> bool:
+        """Whether lookups/stores should happen in the current context."""
+        return settings.LLM_CACHE_ENABLED and not _bypass.get()
+
+    def get(self, model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Returns:
+            The cached response text, or None on a miss (or when caching is bypassed).
+        """
+        if not self.active():
+            return None
+        key = make_key(model, prompt, params)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    record_cache("llm", False)
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM response cache read failed: {e}")
+                return None
+            self.hits += 1
+            record_cache("llm", True)
+            return row[0]
+
+    def put(self, model: str, prompt: str, response: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Store a response and evict the least recently used ones beyond max_bytes."""
+        if not self.active() or not response:
+            return
+        key = make_key(model, prompt, params)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now),
+                )
+                self.stores += 1
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        entries, total = 0, 0
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                entries, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide cache for the configured LLM_CACHE_PATH."""
+    path = str(Path(settings.LLM_CACHE_PATH).resolve())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = LLMResponseCache(path)
+        return cache
@@ -0,0 +1,430 @@
+"""
+Process-wide LLM gateway.
+
+All agents (GeminiAgent, the swarm's BaseAgent workers) share one genai client
+and send their requests through this gateway, which adds:
+
+- a token-bucket rate limiter per model (`LLM_RATE_LIMIT_RPS` / `LLM_RATE_LIMIT_BURST`);
+- jittered exponential retry for rate limits (429), 5xx and connection errors;
+- optional hedged requests: when a request is still running after the observed
+  p95 latency of its model and the rate limiter has a token to spare, a
+  duplicate is sent and the first successful response wins.
+
+Example usage:
+    gateway = get_gateway()
+    response = gateway.generate("gemini-2.0-flash-exp", prompt)
+    response = await gateway.generate_async("gemini-2.0-flash-exp", prompt)
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from google import genai
+
+from src.config import settings
+from src.metrics import LLM_ERRORS, LLM_LATENCY
+
+
+class DummyClient:
+    """Offline stand-in for genai.Client (tests or missing API key)."""
+
+    class _Response:
+        def __init__(self, text: str):
+            self.text = text
+
+    class _Models:
+        def __init__(self, text: str):
+            self._text = text
+
+        def generate_content(self, model, contents):
+            return DummyClient._Response(self._text)
+
+    class _AsyncModels:
+        def __init__(self, text: str):
+            self._text = text
+
+        async def generate_content(self, model, contents):
+            return DummyClient._Response(self._text)
+
+        async def generate_content_stream(self, model, contents):
+            async def _stream():
+                yield DummyClient._Response(self._text)
+            return _stream()
+
+    class _Aio:
+        def __init__(self, text: str):
+            self.models = DummyClient._AsyncModels(text)
+
+    def __init__(self, text: str = "I have completed the task"):
+        self.models = self._Models(text)
+        self.aio = self._Aio(text)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `acquire` waits until a token is available."""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Tokens added per second (<= 0 disables limiting).
+            burst: Bucket capacity.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> float:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class LatencyTracker:
+    """Sliding window of request latencies used for the hedging threshold."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100.0)))
+        return ordered[index]
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors and connection problems are retried; anything else is not."""
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    text = str(exc)
+    return any(marker in text for marker in ("429", "RESOURCE_EXHAUSTED", "UNAVAILABLE", "503"))
+
+
+class LLMGateway:
+    """Shared client, per-model rate limiting, retries and hedging for all LLM calls."""
+
+    def __init__(self, client: Any = None):
+        """
+        Args:
+            client: genai-compatible client. Defaults to one shared genai.Client
+                (or DummyClient under pytest / without a working API key).
+        """
+        self._client = client
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.throttled_s = 0.0
+
+    # Client
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                self._client = self._build_client()
+            return self._client
+
+    @staticmethod
+    def _build_client() -> Any:
+        if "PYTEST_CURRENT_TEST" in os.environ or "pytest" in sys.modules:
+            return DummyClient()
+        try:
+            return genai.Client(api_key=settings.GOOGLE_API_KEY)
+        except Exception as e:
+            print(f"⚠️ genai client not initialized: {e}")
+            return DummyClient()
+
+    @property
+    def offline(self) -> bool:
+        """True when the shared client is the DummyClient."""
+        return isinstance(self.client, DummyClient)
+
+    # Limits and statistics
+
+    def _bucket(self, model: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(model)
+            # Rebuilt when the configured limits change at runtime
+            if bucket is None or (bucket.rate, bucket.burst) != (
+                settings.LLM_RATE_LIMIT_RPS, settings.LLM_RATE_LIMIT_BURST
+            ):
+                bucket = self._buckets[model] = TokenBucket(
+                    settings.LLM_RATE_LIMIT_RPS, settings.LLM_RATE_LIMIT_BURST
+                )
+            return bucket
+
+    def _tracker(self, model: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latency.get(model)
+            if tracker is None:
+                tracker = self._latency[model] = LatencyTracker()
+            return tracker
+
+    def _hedge_after(self, model: str) -> Optional[float]:
+        if not settings.LLM_HEDGE_ENABLED:
+            return None
+        return self._tracker(model).percentile(settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_SAMPLES)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        delay = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _record(
+        self, requests: int = 0, retries: int = 0, hedges: int = 0, hedge_wins: int = 0, throttled_s: float = 0.0
+    ) -> None:
+        # Called from worker threads and the event loop alike
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.hedges += hedges
+            self.hedge_wins += hedge_wins
+            self.throttled_s += throttled_s
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "throttled_s": round(self.throttled_s, 3),
+            }
+
+    # Sync API
+
+    def generate(self, model: str, contents: Any, client: Any = None) -> Any:
+        """
+        Blocking generate_content with rate limiting, retries and hedging.
+
+        Args:
+            model: Model name.
+            contents: Prompt.
+            client: Client override (defaults to the shared client).
+
+        Returns:
+            The client's response object.
+        """
+        client = client or self.client
+        call = lambda: client.models.generate_content(model=model, contents=contents)
+        return self._with_retries(model, lambda: self._hedged(model, call))
+
+    def _with_retries(self, model: str, attempt_fn: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            self._record(requests=1, throttled_s=self._bucket(model).acquire())
+            try:
+                return attempt_fn()
+            except Exception as e:
+                LLM_ERRORS.inc(model=model)
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                self._record(retries=1)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+
+    def _timed(self, model: str, call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start
+        self._tracker(model).record(elapsed)
+        LLM_LATENCY.observe(elapsed, model=model)
+        return result
+
+    def _hedged(self, model: str, call: Callable[[], Any]) -> Any:
+        hedge_after = self._hedge_after(model)
+        if hedge_after is None:
+            return self._timed(model, call)
+
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+            executor = self._hedge_executor
+        primary = executor.submit(self._timed, model, call)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or not self._bucket(model).try_acquire():
+            # Finished in time, or no token to spare: a hedge would exceed the rate limit
+            return primary.result()
+
+        self._record(requests=1, hedges=1)
+        hedge = executor.submit(self._timed, model, call)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._record(hedge_wins=1)
+                    # The other attempt keeps running in the pool; its result is discarded
+                    return future.result()
+        # Both attempts failed
+        return primary.result()
+
+    # Async API
+
+    async def generate_async(self, model: str, contents: Any, client: Any = None) -> Any:
+        """
+        Async generate_content with rate limiting, retries and hedging.
+
+        Clients without an `aio` API are called in a worker thread.
+        """
+        client = client or self.client
+        aio_models = getattr(getattr(client, "aio", None), "models", None)
+        if aio_models is None:
+            return await asyncio.to_thread(self.generate, model, contents, client)
+
+        attempt = 0
+        while True:
+            self._record(requests=1, throttled_s=await self._bucket(model).acquire_async())
+            try:
+                return await self._hedged_async(
+                    model, lambda: aio_models.generate_content(model=model, contents=contents)
+                )
+            except Exception as e:
+                LLM_ERRORS.inc(model=model)
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                self._record(retries=1)
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    async def _timed_async(self, model: str, call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = await call()
+        elapsed = time.perf_counter() - start
+        self._tracker(model).record(elapsed)
+        LLM_LATENCY.observe(elapsed, model=model)
+        return result
+
+    async def _hedged_async(self, model: str, call: Callable[[], Any]) -> Any:
+        hedge_after = self._hedge_after(model)
+        if hedge_after is None:
+            return await self._timed_async(model, call)
+
+        primary = asyncio.ensure_future(self._timed_async(model, call))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not self._bucket(model).try_acquire():
+            # Finished in time, or no token to spare: a hedge would exceed the rate limit
+            return await primary
+
+        self._record(requests=1, hedges=1)
+        hedge = asyncio.ensure_future(self._timed_async(model, call))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._record(hedge_wins=1)
+                        return task.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+        # Both attempts failed
+        return primary.result()
+
+    async def stream_async(self, model: str, contents: Any, client: Any = None) -> AsyncIterator[Any]:
+        """
+        Streamed generate_content (the client must provide aio.models.generate_content_stream).
+
+        Opening the stream is rate limited and retried; once chunks flow, errors
+        propagate because a partial answer cannot be retried transparently.
+        """
+        client = client or self.client
+        stream_fn = client.aio.models.generate_content_stream
+        attempt = 0
+        while True:
+            self._record(requests=1, throttled_s=await self._bucket(model).acquire_async())
+            try:
+                stream = await stream_fn(model=model, contents=contents)
+                break
+            except Exception as e:
+                LLM_ERRORS.inc(model=model)
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                self._record(retries=1)
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+        async for chunk in stream:
+            yield chunk
+
+    def close(self) -> None:
+        with self._lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Return the process-wide gateway."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
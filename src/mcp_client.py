@@ -14,11 +14,15 @@ This module implements:
 import asyncio
 import json
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 from src.config import settings, MCPServerConfig
+from src.tracing import span
+from src.metrics import MCP_LATENCY
 
 
 @dataclass
@@ -30,6 +34,7 @@ class MCPTool:
     server_name: str
     input_schema: Dict[str, Any]
     original_name: str  # Name as defined in MCP server
+    annotations: Dict[str, Any] = field(default_factory=dict)  # e.g. readOnlyHint, idempotentHint
 
     def get_prefixed_name(self, prefix: str = "") -> str:
         """Get the tool name with optional prefix."""
@@ -287,6 +292,9 @@ class MCPClientManager:
             tools_response = await connection.session.list_tools()
 
             for tool in tools_response.tools:
+                annotations = getattr(tool, "annotations", None)
+                if annotations is not None and hasattr(annotations, "model_dump"):
+                    annotations = annotations.model_dump(exclude_none=True)
                 mcp_tool = MCPTool(
                     name=tool.name,
                     description=tool.description or "No description provided",
@@ -295,6 +303,7 @@ class MCPClientManager:
                     if hasattr(tool, "inputSchema")
                     else {},
                     original_name=tool.name,
+                    annotations=annotations if isinstance(annotations, dict) else {},
                 )
                 connection.tools.append(mcp_tool)
 
@@ -356,36 +365,54 @@ class MCPClientManager:
             - Tool invocation via MCP protocol
             - Result extraction and formatting
             - Error handling
+
+            Failures raise instead of returning an error string, so the agent
+            reports them as a failed tool call and never caches them.
             """
             if not connection.connected or not connection.session:
-                return f"Error: MCP server '{connection.config.name}' is not connected"
-
-            try:
-                result = await connection.session.call_tool(
-                    tool.original_name, arguments=kwargs
-                )
-
-                # Extract content from result
-                if hasattr(result, "content") and result.content:
-                    contents = []
-                    for content in result.content:
-                        if hasattr(content, "text"):
-                            contents.append(content.text)
-                        elif hasattr(content, "data"):
-                            contents.append(f"[Binary data: {len(content.data)} bytes]")
-                    return "\n".join(contents) if contents else str(result)
-
-                # Check for structured content
-                if hasattr(result, "structuredContent") and result.structuredContent:
-                    return result.structuredContent
-
-                return str(result)
-
-            except Exception as e:
-                return f"Error calling MCP tool '{tool.original_name}': {e}"
+                raise RuntimeError(f"MCP server '{connection.config.name}' is not connected")
+
+            started = time.perf_counter()
+            status = "ok"
+            with span(f"mcp.{tool.original_name}", server=connection.config.name) as trace:
+                try:
+                    result = await connection.session.call_tool(
+                        tool.original_name, arguments=kwargs
+                    )
+                    failed = getattr(result, "isError", False) is True
+
+                    # Extract content from result
+                    if hasattr(result, "content") and result.content:
+                        contents = []
+                        for content in result.content:
+                            if hasattr(content, "text"):
+                                contents.append(content.text)
+                            elif hasattr(content, "data"):
+                                contents.append(f"[Binary data: {len(content.data)} bytes]")
+                        text = "\n".join(contents) if contents else str(result)
+                        if failed:
+                            raise RuntimeError(text)
+                        return text
+
+                    if failed:
+                        raise RuntimeError(str(result))
+
+                    # Check for structured content
+                    if hasattr(result, "structuredContent") and result.structuredContent:
+                        return result.structuredContent
+
+                    return str(result)
+
+                except Exception as e:
+                    status = "error"
+                    trace.end("error")
+                    raise RuntimeError(f"Error calling MCP tool '{tool.original_name}': {e}") from e
+                finally:
+                    MCP_LATENCY.observe(time.perf_counter() - started, server=connection.config.name, status=status)
 
         # Set function metadata for agent tool discovery
         tool_wrapper.__name__ = tool.get_prefixed_name(self.tool_prefix)
+        tool_wrapper.mcp_tool = tool
         tool_wrapper.__doc__ = f"""[MCP:{connection.config.name}] {tool.description}
 
 Server: {connection.config.name}
@@ -496,6 +523,9 @@ class MCPClientManagerSync:
     def __init__(self, config_path: Optional[str] = None):
         self._async_manager = MCPClientManager(config_path)
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # The private loop can only run one coroutine at a time; tools may be
+        # called from several agent worker threads concurrently.
+        self._run_lock = threading.Lock()
 
     def _get_loop(self) -> asyncio.AbstractEventLoop:
         """Get or create an event loop."""
@@ -520,11 +550,14 @@ class MCPClientManagerSync:
 
             def make_sync_wrapper(afn):
                 def sync_wrapper(**kwargs):
-                    loop = self._get_loop()
-                    return loop.run_until_complete(afn(**kwargs))
+                    with self._run_lock:
+                        loop = self._get_loop()
+                        return loop.run_until_complete(afn(**kwargs))
 
                 sync_wrapper.__name__ = afn.__name__
                 sync_wrapper.__doc__ = afn.__doc__
+                sync_wrapper.mcp_tool = getattr(afn, "mcp_tool", None)
+                sync_wrapper.__tool_cache__ = getattr(afn, "__tool_cache__", None)
                 return sync_wrapper
 
             sync_callables[name] = make_sync_wrapper(async_fn)
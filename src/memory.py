@@ -1,62 +1,142 @@
-import json
-import os
+import threading
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Any, Callable, Dict, List, Optional
 from src.config import settings
+from src.memory_store import MemoryStore, create_store
+from src.metrics import MEMORY_SAVE, MEMORY_SUMMARIZE
+from src.recall import RecallHit, RecallIndex, recall_path_for
+from src.retrieval import estimate_tokens
+
+@dataclass
+class _SummaryJob:
+    """Messages evicted past the watermark, to be folded into the summary."""
+
+    generation: int
+    end: int
+    messages: List[Dict[str, Any]]
+    previous_summary: str
+
+
+def message_tokens(entry: Dict[str, Any]) -> int:
+    """Estimated tokens of a history message, computed once and cached in its metadata."""
+    metadata = entry.get("metadata")
+    if not isinstance(metadata, dict):
+        metadata = entry["metadata"] = {}
+    tokens = metadata.get("tokens")
+    if not isinstance(tokens, int):
+        tokens = metadata["tokens"] = estimate_tokens(f"{entry.get('role', '')}: {entry.get('content', '')}")
+    return tokens
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, keeping the start."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * 4 - 12)].rstrip() + " …[ingekort]"
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _summary_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for background summaries (each manager runs at most one at a time)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MEMORY_SUMMARIZE_WORKERS, thread_name_prefix="memory-summarize"
+            )
+        return _executor
 
 
 class MemoryManager:
-    """Simple JSON-file based memory manager for the agent."""
+    """Memory manager for the agent, persisted through a pluggable MemoryStore."""
 
-    def __init__(self, memory_file: str = settings.MEMORY_FILE):
-        self.memory_file = memory_file
+    def __init__(
+        self,
+        memory_file: Optional[str] = None,
+        store: Optional[MemoryStore] = None,
+        tail: Optional[int] = None,
+        recall: Optional[RecallIndex] = None,
+    ):
+        """
+        Args:
+            memory_file: Memory file (defaults to settings.MEMORY_FILE); the journal backend keeps its JSONL journal next to it
+                         (`agent_memory.json` -> `agent_memory.jsonl`) and migrates the JSON file once.
+            store: Storage backend. Defaults to settings.MEMORY_BACKEND for memory_file.
+            tail: Load only the most recent messages (0 = all). Defaults to settings.MEMORY_LOAD_TAIL.
+            recall: Long-term recall index over past messages. Defaults to a sidecar next to memory_file
+                    (`agent_memory.recall.jsonl`) when settings.RECALL_ENABLED.
+        """
+        self.memory_file = memory_file or settings.MEMORY_FILE
+        self.store = store or create_store(self.memory_file)
+        self.tail = settings.MEMORY_LOAD_TAIL if tail is None else tail
         self.summary: str = ""
         self._memory: List[Dict[str, Any]] = []
+        # Absolute index of the first message in RAM (older ones stay on disk with tail loading)
+        self.history_offset = 0
+        # Absolute index up to which messages are folded into the summary (None: unknown, legacy file)
+        self.summarized_upto: Optional[int] = 0
+        self.summarize_calls = 0
+        # Estimated tokens of the last context window (system prompt, summary and messages)
+        self.last_window_tokens = 0
+        self.last_recall_hits = 0
+        self._generation = 0  # Bumped by clear_memory so stale summaries are discarded
+        self._summarizing: Optional[Future] = None
+        # Guards history/summary when the agent serves concurrent requests
+        self._lock = threading.RLock()
         self._load_memory()
+        if recall is None and settings.RECALL_ENABLED:
+            backfill = [
+                (self.history_offset + i, m.get("role", ""), str(m.get("content", "")))
+                for i, m in enumerate(self._memory)
+            ]
+            recall = RecallIndex(recall_path_for(self.memory_file), backfill=backfill)
+            recall.open_in_background()
+        self.recall = recall
 
     def _load_memory(self):
-        """Loads memory from the JSON file if it exists."""
-        self.summary = ""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                if isinstance(data, dict):
-                    self.summary = data.get("summary", "") or ""
-                    history = data.get("history", [])
-                    self._memory = history if isinstance(history, list) else []
-                elif isinstance(data, list):
-                    # Backward compatibility for legacy memory files
-                    self._memory = data
-                else:
-                    print(f"Warning: Unexpected memory format in {self.memory_file}. Starting fresh.")
-                    self._memory = []
-            except json.JSONDecodeError:
-                print(f"Warning: Could not decode memory file {self.memory_file}. Starting fresh.")
-                self._memory = []
-        else:
-            self._memory = []
+        """Loads memory (or its most recent `tail` messages) from the store."""
+        stored = self.store.load(self.tail)
+        self.summary = stored.summary
+        self._memory = stored.history
+        self.history_offset = stored.offset
+        self.summarized_upto = stored.summarized_upto
 
     def save_memory(self):
-        """Saves the current memory state to the JSON file."""
-        payload = {
-            "summary": self.summary,
-            "history": self._memory,
-        }
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
+        """Makes all changes so far durable (the store writes each change as it happens)."""
+        with self._lock, MEMORY_SAVE.time():
+            self.store.flush()
+
+    def close(self):
+        """Waits for a background summary, then flushes and releases the store and recall index."""
+        self.wait_for_summary(settings.MEMORY_SUMMARIZE_CLOSE_TIMEOUT)
+        self.store.close()
+        if self.recall is not None:
+            self.recall.close()
 
     def add_entry(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None):
         """Adds a new interaction to memory."""
         entry = {
             "role": role,
             "content": content,
-            "metadata": metadata or {}
+            "metadata": dict(metadata or {})
         }
-        self._memory.append(entry)
-        self.save_memory()
+        message_tokens(entry)
+        with MEMORY_SAVE.time():
+            with self._lock:
+                self._memory.append(entry)
+                seq = self.history_offset + len(self._memory) - 1
+                ticket = self.store.append_nowait(entry)
+            # Wait for durability outside the lock, so concurrent writers share one group commit
+            self.store.wait(ticket)
+        if self.recall is not None:
+            self.recall.add(seq, role, content)
 
     def get_history(self) -> List[Dict[str, Any]]:
-        """Returns the full conversation history."""
+        """Returns the conversation history in RAM (the last MEMORY_LOAD_TAIL messages after a restart)."""
         return self._memory
 
     def _default_summarizer(self, old_messages: List[Dict[str, Any]], previous_summary: str) -> str:
@@ -76,58 +156,235 @@ class MemoryManager:
     def get_context_window(
         self,
         system_prompt: str,
-        max_messages: int,
-        summarizer: Optional[Callable[[List[Dict[str, Any]], str], str]] = None
+        max_messages: Optional[int] = None,
+        summarizer: Optional[Callable[[List[Dict[str, Any]], str], str]] = None,
+        background: bool = False,
+        token_budget: Optional[int] = None,
+        recall_query: Optional[str] = None,
+        recall_k: int = 0,
     ) -> List[Dict[str, str]]:
         """
-        Returns the context window, applying a summary buffer when history exceeds max_messages.
+        Returns the context window, applying a summary buffer when history exceeds the window.
+
+        The window holds the most recent messages that fit both max_messages and
+        token_budget. With a token budget the summary is packed first (cut to at
+        most half the budget), then messages from newest to oldest while they fit;
+        a newest message that is larger than the whole budget is cut to fit.
+        Per-message token estimates are cached in the message metadata, and the
+        estimated size of the resulting window is kept in `last_window_tokens`.
+
+        The summary covers history up to the `summarized_upto` watermark; only
+        messages evicted since the last summary are passed to the summarizer
+        and folded into the existing summary. Without a token budget, messages
+        past the watermark that are not yet summarized stay in the window verbatim.
+
+        With a recall_query, up to recall_k older messages that no longer fit the
+        window are looked up in the recall index and injected after the summary
+        (cut to at most a quarter of the token budget). The recall block is
+        reserved before the messages are packed, and the resulting boundary is
+        used for the summary as well, so every message is either summarized or
+        in the window.
 
         Args:
             system_prompt: The system prompt to prepend.
             max_messages: Maximum number of recent history messages to keep verbatim.
-            summarizer: Callable that receives (old_messages, previous_summary) and returns a summary string.
+            summarizer: Callable that receives (newly_evicted_messages, previous_summary) and returns a summary string.
+            background: Summarize on a background thread and build this window from the last
+                        completed summary instead of waiting for the summarizer.
+            token_budget: Estimated tokens available for the summary and history messages
+                          (the system prompt is not counted).
+            recall_query: Text to look up relevant earlier messages for (usually the new user message).
+            recall_k: Maximum number of recalled messages (0 = no recall).
 
         Raises:
-            ValueError: If system_prompt is empty, max_messages is invalid, or summarizer returns non-string.
+            ValueError: If system_prompt is empty, neither limit is given or a limit is invalid,
+                        or summarizer returns non-string.
             TypeError: If summarizer does not accept the required arguments.
         """
         if not system_prompt:
             raise ValueError("system_prompt is required to build the context window.")
-        if max_messages < 1:
+        if max_messages is None and token_budget is None:
+            raise ValueError("max_messages or token_budget is required.")
+        if max_messages is not None and max_messages < 1:
             raise ValueError("max_messages must be at least 1.")
+        if token_budget is not None and token_budget < 1:
+            raise ValueError("token_budget must be at least 1.")
 
-        history = self.get_history()
-        system_message = {"role": "system", "content": system_prompt}
+        summarizer_fn = summarizer or self._default_summarizer
+        hits: List[RecallHit] = []
+        if self.recall is not None and recall_query and recall_k > 0:
+            with self._lock:
+                widest = self._window_start(max_messages, token_budget)
+            # Only messages that cannot be in the window, whatever the recall block takes
+            hits = self.recall.search(recall_query, recall_k, before=widest)
+        self.last_recall_hits = len(hits)
+        recall_text = self._recall_text(hits, token_budget)
+        reserved = estimate_tokens(recall_text) if recall_text else 0
 
-        if len(history) <= max_messages:
-            return [system_message, *history]
+        # One boundary for the summary, the recall reserve and the window: every
+        # message before it is summarized, every message from it is in the window
+        with self._lock:
+            boundary = self._window_start(max_messages, token_budget, reserved)
+        job = self._summary_job(boundary)
+        if job is not None:
+            if background:
+                self._summarize_in_background(summarizer_fn, job)
+            else:
+                self._run_summary_job(summarizer_fn, job)
 
-        summarizer_fn = summarizer or self._default_summarizer
-        messages_to_summarize = [dict(msg) for msg in history[:-max_messages]]
-        recent_history = [dict(msg) for msg in history[-max_messages:]]
+        with self._lock:
+            return self._build_context_window(system_prompt, boundary, token_budget, recall_text)
+
+    @staticmethod
+    def _recall_text(hits: List[RecallHit], token_budget: Optional[int]) -> str:
+        if not hits:
+            return ""
+        lines = "\n".join(f"- {hit.role}: {hit.text}" for hit in sorted(hits, key=lambda hit: hit.seq))
+        text = f"Relevant earlier messages:\n{lines}"
+        return _truncate(text, max(1, token_budget // 4)) if token_budget is not None else text
+
+    def _summary_text(self, token_budget: Optional[int]) -> str:
+        if not self.summary or token_budget is None:
+            return self.summary
+        return _truncate(self.summary, token_budget // 2)
+
+    def _window_start(self, max_messages: Optional[int], token_budget: Optional[int], reserved: int = 0) -> int:
+        """Absolute index of the oldest message that fits the window (`reserved` tokens already taken)."""
+        history = self._memory
+        limit = max(0, len(history) - max_messages) if max_messages is not None else 0
+        if token_budget is None:
+            return self.history_offset + limit
+        remaining = token_budget - reserved - estimate_tokens(self._summary_text(token_budget))
+        start = len(history)
+        while start > limit:
+            tokens = message_tokens(history[start - 1])
+            if tokens > remaining:
+                break
+            remaining -= tokens
+            start -= 1
+        if start == len(history) and history:
+            start -= 1  # The newest message is always kept (cut to fit when building the window)
+        return self.history_offset + start
+
+    def _summary_job(self, boundary: int) -> Optional[_SummaryJob]:
+        """The messages evicted past the watermark, or None when the summary is up to date."""
+        with self._lock:
+            if self.summarized_upto is None:
+                # Summary from a file without a watermark: assume it covers everything evicted so far
+                self.summarized_upto = max(0, boundary) if self.summary else 0
+            if boundary <= self.summarized_upto or self._summarizing is not None:
+                return None
+            # Messages older than the loaded tail are no longer in RAM and cannot be folded in anymore
+            start = max(self.summarized_upto, self.history_offset)
+            messages = [dict(msg) for msg in self._memory[start - self.history_offset:boundary - self.history_offset]]
+            self.summarize_calls += 1
+            return _SummaryJob(self._generation, boundary, messages, self.summary)
 
+    def _run_summary_job(
+        self,
+        summarizer_fn: Callable[[List[Dict[str, Any]], str], str],
+        job: _SummaryJob,
+    ) -> None:
+        MEMORY_SUMMARIZE.inc()
         try:
-            new_summary = summarizer_fn(messages_to_summarize, self.summary)
+            new_summary = summarizer_fn(job.messages, job.previous_summary)
         except TypeError as exc:
             raise TypeError("Summarizer must accept two arguments: (old_messages, previous_summary).") from exc
 
         if not isinstance(new_summary, str):
             raise ValueError("Summarizer must return a string.")
 
-        previous_summary = self.summary
-        self.summary = new_summary.strip()
-        if self.summary != previous_summary:
-            self.save_memory()
+        with self._lock:
+            if job.generation != self._generation or job.end <= (self.summarized_upto or 0):
+                return  # Memory was cleared or another summary got there first
+            self.summary = new_summary.strip()
+            self.summarized_upto = job.end
+            self.store.set_summary(self.summary, job.end)
 
-        summary_message = {
-            "role": "system",
-            "content": f"Previous Summary: {self.summary}"
-        }
+    def _summarize_in_background(
+        self,
+        summarizer_fn: Callable[[List[Dict[str, Any]], str], str],
+        job: _SummaryJob,
+    ) -> None:
+        def run() -> None:
+            try:
+                self._run_summary_job(summarizer_fn, job)
+            except Exception as e:
+                # The next turn retries from the same watermark
+                print(f"⚠️ Background summarization failed: {e}")
+            finally:
+                with self._lock:
+                    self._summarizing = None
+
+        with self._lock:
+            self._summarizing = _summary_executor().submit(run)
 
-        return [system_message, summary_message, *recent_history]
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a running background summary; returns False on timeout."""
+        future = self._summarizing
+        if future is None:
+            return True
+        try:
+            future.result(timeout)
+        except FutureTimeoutError:
+            return False
+        return True
+
+    def _build_context_window(
+        self,
+        system_prompt: str,
+        window_start: int,
+        token_budget: Optional[int],
+        recall_text: str = "",
+    ) -> List[Dict[str, str]]:
+        history = self.get_history()
+        system_message = {"role": "system", "content": system_prompt}
+        reserved = estimate_tokens(recall_text) if recall_text else 0
+
+        if token_budget is None:
+            # Verbatim from the watermark while a summary is still catching up
+            window_start = min(self.summarized_upto or 0, window_start)
+        recent_start = max(window_start, self.history_offset) - self.history_offset
+        recent_history = [dict(msg) for msg in history[recent_start:]]
+
+        summary = ""
+        if recent_start > 0 or self.history_offset > 0:
+            summary = self._summary_text(token_budget)
+        if summary and token_budget is not None and len(recent_history) > 1:
+            # A summary that grew since the boundary was packed gives way to the packed messages
+            room = token_budget - reserved - sum(message_tokens(m) for m in recent_history)
+            if estimate_tokens(summary) > room:
+                summary = _truncate(summary, max(1, room))
+        remaining = token_budget - reserved - estimate_tokens(summary) if token_budget is not None else 0
+        if len(recent_history) == 1 and token_budget is not None and message_tokens(recent_history[0]) > remaining:
+            # The newest message alone exceeds the budget: keep its start
+            newest = recent_history[0]
+            newest["content"] = _truncate(str(newest.get("content", "")), max(1, remaining))
+            newest["metadata"] = {**(newest.get("metadata") or {}), "tokens": estimate_tokens(newest["content"])}
+            recent_history = [newest]
+
+        window = [system_message]
+        if summary:
+            window.append({
+                "role": "system",
+                "content": f"Previous Summary: {summary}"
+            })
+        if recall_text:
+            window.append({"role": "system", "content": recall_text})
+        window.extend(recent_history)
+        self.last_window_tokens = estimate_tokens(system_prompt) + sum(
+            estimate_tokens(m["content"]) if m["role"] == "system" else message_tokens(m) for m in window[1:]
+        )
+        return window
 
     def clear_memory(self):
         """Clears the agent's memory."""
-        self._memory = []
-        self.summary = ""
-        self.save_memory()
+        with self._lock:
+            self._memory = []
+            self.summary = ""
+            self.history_offset = 0
+            self.summarized_upto = 0
+            self._generation += 1
+            self.store.clear()
+            if self.recall is not None:
+                self.recall.clear()
@@ -0,0 +1,528 @@
+"""
+Storage backends for MemoryManager.
+
+- JSONFileStore: the original format. Every change rewrites the whole file
+  (`{"summary": ..., "history": [...]}`), so each turn costs O(history).
+- JournalStore: an append-only JSONL journal. Each change is one small record
+  (`append`, `summary` or `clear`); a writer thread group-commits queued
+  records with a single write (and fsync, depending on the policy), compacts
+  the journal in the background once dead records (superseded summaries,
+  cleared history) outweigh the live ones, and `load(tail=N)` reads the file
+  backwards so only the last N messages are parsed at startup. A legacy
+  `agent_memory.json` next to the journal is migrated on first load.
+
+fsync policies:
+    "always"    add_entry returns once its record is on disk; concurrent writers share one fsync.
+    "interval"  records are written right away, fsync at most every MEMORY_FSYNC_INTERVAL seconds.
+    "never"     leave flushing to the OS (survives a process crash, not a power loss).
+
+Example usage:
+    store = JournalStore("agent_memory.jsonl", legacy_path="agent_memory.json")
+    stored = store.load(tail=2000)
+    store.append({"role": "user", "content": "Hallo", "metadata": {}})
+    store.close()
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.config import settings
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_APPEND = b'{"op":"append"'
+_SUMMARY = b'{"op":"summary"'
+_CLEAR = b'{"op":"clear"'
+
+
+@dataclass
+class StoredMemory:
+    """What a store loaded: the summary and (the tail of) the history."""
+
+    summary: str = ""
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    offset: int = 0  # Absolute index of history[0]; > 0 when only the tail was loaded
+    summarized_upto: Optional[int] = 0  # Messages folded into the summary (None: unknown)
+
+
+class MemoryStore:
+    """Interface of a MemoryManager storage backend."""
+
+    def load(self, tail: int = 0) -> StoredMemory:
+        """Load the stored memory; with tail > 0 only the last `tail` messages are returned."""
+        raise NotImplementedError
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Store an entry; returns once it is as durable as the store's policy promises."""
+        self.wait(self.append_nowait(entry))
+
+    def append_nowait(self, entry: Dict[str, Any]) -> Optional[int]:
+        """Queue an entry and return a ticket for wait() (None: nothing to wait for)."""
+        raise NotImplementedError
+
+    def wait(self, ticket: Optional[int]) -> None:
+        """Block until the change behind `ticket` is durable under the store's policy."""
+
+    def set_summary(self, summary: str, summarized_upto: int) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Make every change so far durable."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _read_legacy(path: str) -> Optional[StoredMemory]:
+    """Read an `agent_memory.json` file (dict or legacy list format)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"Warning: Could not decode memory file {path}. Starting fresh.")
+        return StoredMemory()
+    if isinstance(data, dict):
+        history = data.get("history", [])
+        summary = data.get("summary", "") or ""
+        # Files written before the watermark existed only have a summary
+        summarized_upto = data.get("summarized_upto", None if summary else 0)
+        return StoredMemory(summary, history if isinstance(history, list) else [], 0, summarized_upto)
+    if isinstance(data, list):
+        # Backward compatibility for legacy memory files
+        return StoredMemory(history=data)
+    print(f"Warning: Unexpected memory format in {path}. Starting fresh.")
+    return StoredMemory()
+
+
+class JSONFileStore(MemoryStore):
+    """Whole-file JSON storage (rewritten on every change)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._state = StoredMemory()
+        self._lock = threading.Lock()
+
+    def load(self, tail: int = 0) -> StoredMemory:
+        with self._lock:
+            self._state = _read_legacy(self.path) or StoredMemory()
+            history = self._state.history
+            offset = max(0, len(history) - tail) if tail > 0 else 0
+            return StoredMemory(self._state.summary, list(history[offset:]), offset, self._state.summarized_upto)
+
+    def _write(self) -> None:
+        payload = {
+            "summary": self._state.summary,
+            "summarized_upto": self._state.summarized_upto,
+            "history": self._state.history,
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+
+    def append_nowait(self, entry: Dict[str, Any]) -> Optional[int]:
+        with self._lock:
+            self._state.history.append(entry)
+            self._write()
+        return None
+
+    def set_summary(self, summary: str, summarized_upto: int) -> None:
+        with self._lock:
+            self._state.summary = summary
+            self._state.summarized_upto = summarized_upto
+            self._write()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = StoredMemory()
+            self._write()
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def lines_reversed(path: str, block_size: int = 1 << 16) -> Iterator[bytes]:
+    """Yield the complete lines of a file from last to first."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        rest = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+class JournalStore(MemoryStore):
+    """Append-only JSONL journal with group commit, fsync policy and background compaction."""
+
+    def __init__(
+        self,
+        path: str,
+        legacy_path: Optional[str] = None,
+        fsync: Optional[str] = None,
+        fsync_interval: Optional[float] = None,
+        compact_min_bytes: Optional[int] = None,
+        idle_close: float = 2.0,
+    ):
+        """
+        Args:
+            path: The JSONL journal.
+            legacy_path: `agent_memory.json` migrated into the journal when the journal does not exist yet.
+            fsync: "always", "interval" or "never". Defaults to settings.MEMORY_FSYNC.
+            fsync_interval: Seconds between fsyncs for "interval". Defaults to settings.MEMORY_FSYNC_INTERVAL.
+            compact_min_bytes: Dead bytes before compaction is considered. Defaults to settings.MEMORY_COMPACT_MIN_BYTES.
+            idle_close: Seconds without writes before the writer thread exits and closes the file.
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync = fsync or settings.MEMORY_FSYNC
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {self.fsync} (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.fsync_interval = settings.MEMORY_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.compact_min_bytes = settings.MEMORY_COMPACT_MIN_BYTES if compact_min_bytes is None else compact_min_bytes
+        self.idle_close = idle_close
+
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._submitted = 0  # Records queued so far
+        self._written = 0  # Records written to the file
+        self._synced = 0  # Records known to be on disk
+        self._failed: List[Tuple[int, int, OSError]] = []  # Ticket ranges of failed writes
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._seq = 0
+        self._summary_bytes = 0  # Size of the current summary record
+        self._dead_bytes = 0
+        self._file_bytes = 0
+        self._last_fsync = 0.0
+
+        self.commits = 0
+        self.compactions = 0
+
+    # Loading
+
+    def load(self, tail: int = 0) -> StoredMemory:
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate()
+        if not os.path.exists(self.path):
+            self._file_bytes = 0
+            return StoredMemory()
+        self._file_bytes = os.path.getsize(self.path)
+        stored = self._load_tail(tail) if tail > 0 else self._load_full()
+        self._seq = stored.offset + len(stored.history)
+        return stored
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            record = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None  # Torn write of a crashed run
+        return record if isinstance(record, dict) else None
+
+    def _load_full(self) -> StoredMemory:
+        stored = StoredMemory()
+        self._dead_bytes = self._summary_bytes = 0
+        first_seq: Optional[int] = None
+        with open(self.path, "rb") as f:
+            for line in f:
+                record = self._decode(line)
+                if record is None:
+                    continue
+                op = record.get("op")
+                if op == "append":
+                    if first_seq is None:
+                        first_seq = record.get("seq", 0)
+                    stored.history.append(record.get("entry") or {})
+                elif op == "summary":
+                    self._dead_bytes += self._summary_bytes
+                    self._summary_bytes = len(line)
+                    stored.summary = record.get("summary", "")
+                    stored.summarized_upto = record.get("upto")
+                elif op == "clear":
+                    self._dead_bytes = f.tell()
+                    self._summary_bytes = 0
+                    stored, first_seq = StoredMemory(), None
+        stored.offset = first_seq or 0
+        return stored
+
+    def _load_tail(self, tail: int) -> StoredMemory:
+        """Scan backwards until `tail` messages and the latest summary are found (or a clear is hit)."""
+        self._dead_bytes = self._summary_bytes = 0
+        entries: List[Dict[str, Any]] = []
+        summary: Optional[str] = None
+        summarized_upto: Optional[int] = 0
+        first_seq = 0
+        for line in lines_reversed(self.path):
+            if line.startswith(_APPEND):
+                if len(entries) >= tail:
+                    if summary is not None:
+                        break
+                    continue  # Only looking for the summary now
+                record = self._decode(line)
+                if record is not None:
+                    entries.append(record.get("entry") or {})
+                    first_seq = record.get("seq", 0)
+            elif line.startswith(_SUMMARY) and summary is None:
+                record = self._decode(line)
+                if record is not None:
+                    summary = record.get("summary", "")
+                    summarized_upto = record.get("upto")
+                    self._summary_bytes = len(line) + 1
+                    if len(entries) >= tail:
+                        break
+            elif line.startswith(_CLEAR):
+                break
+        entries.reverse()
+        return StoredMemory(summary or "", entries, first_seq if entries else 0, summarized_upto)
+
+    def _migrate(self) -> None:
+        legacy = _read_legacy(self.legacy_path)
+        if legacy is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.migrate"
+        with open(tmp, "wb") as f:
+            for seq, entry in enumerate(legacy.history):
+                f.write(_encode({"op": "append", "seq": seq, "entry": entry}))
+            if legacy.summary:
+                f.write(_encode({"op": "summary", "summary": legacy.summary, "upto": legacy.summarized_upto}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        print(f"📦 Memory migrated: {self.legacy_path} -> {self.path} ({len(legacy.history)} messages)")
+
+    # Writing
+
+    def _submit_locked(self, line: bytes) -> int:
+        """Queue an encoded record (caller holds self._cond) and return its ticket."""
+        self._pending.append(line)
+        self._submitted += 1
+        self._closing = False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-journal", daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+        return self._submitted
+
+    def _submit(self, record: Dict[str, Any]) -> int:
+        line = _encode(record)
+        with self._cond:
+            return self._submit_locked(line)
+
+    def _wait_synced(self, ticket: int) -> None:
+        with self._cond:
+            while self._synced < ticket:
+                self._cond.wait()
+            # Every waiter of a failed batch gets the error, not just the first one to wake
+            for first, last, error in self._failed:
+                if first <= ticket <= last:
+                    raise error
+
+    def wait(self, ticket: Optional[int]) -> None:
+        """With fsync="always", block until the record is on disk; concurrent waiters share one fsync."""
+        if ticket is not None and self.fsync == "always":
+            self._wait_synced(ticket)
+
+    def append_nowait(self, entry: Dict[str, Any]) -> Optional[int]:
+        with self._cond:
+            # Sequence numbers are taken in queue order
+            line = _encode({"op": "append", "seq": self._seq, "entry": entry})
+            self._seq += 1
+            return self._submit_locked(line)
+
+    def set_summary(self, summary: str, summarized_upto: int) -> None:
+        self.wait(self._submit({"op": "summary", "summary": summary, "upto": summarized_upto}))
+
+    def clear(self) -> None:
+        with self._cond:
+            self._seq = 0
+        self.wait(self._submit({"op": "clear"}))
+
+    def flush(self) -> None:
+        """Wait until every queued record is written and fsynced."""
+        with self._cond:
+            if self._submitted == self._synced:
+                return
+            ticket = self._submit_locked(b"")  # Empty marker: forces an fsync for this batch
+        self._wait_synced(ticket)
+
+    def close(self) -> None:
+        """Flush, then stop the writer thread (it restarts on the next change)."""
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "commits": self.commits,
+            "compactions": self.compactions,
+            "file_bytes": self._file_bytes,
+            "dead_bytes": self._dead_bytes,
+        }
+
+    def _run(self) -> None:
+        handle = None
+        while True:
+            with self._cond:
+                if not self._pending and not self._closing:
+                    self._cond.wait(self.idle_close)
+                if not self._pending and handle is None:
+                    self._thread = None
+                    self._cond.notify_all()
+                    return
+                batch, self._pending = self._pending, []
+                last_ticket = self._submitted
+
+            if not batch:
+                # Idle: close the file (fsyncing what "interval" has not synced yet) and exit on the next pass
+                self._close(handle)
+                handle = None
+                with self._cond:
+                    self._synced = self._written
+                    self._cond.notify_all()
+                continue
+
+            error: Optional[OSError] = None
+            synced = False
+            try:
+                if handle is None:
+                    handle = self._open()
+                data = b"".join(batch)
+                handle.write(data)
+                handle.flush()
+                now = time.monotonic()
+                # An empty marker in the batch comes from flush() and forces an fsync
+                if self.fsync == "always" or b"" in batch or (
+                    self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval
+                ):
+                    os.fsync(handle.fileno())
+                    self._last_fsync = now
+                    synced = True
+                else:
+                    synced = self.fsync == "never"
+                self._account(batch, len(data))
+            except OSError as e:
+                print(f"⚠️ Memory journal write failed ({self.path}): {e}")
+                error = e
+
+            with self._cond:
+                self.commits += 1
+                if error is not None:
+                    first = self._written + 1
+                    if self._failed and self._failed[-1][1] == self._written:
+                        first = self._failed.pop()[0]  # Consecutive failures share one range
+                    self._failed.append((first, last_ticket, error))
+                self._written = last_ticket
+                if synced or error is not None:
+                    self._synced = last_ticket
+                self._cond.notify_all()
+
+            if error is None and self._should_compact():
+                self._close(handle)
+                handle = None
+                self._compact()
+
+    def _close(self, handle) -> None:
+        if handle is None:
+            return
+        try:
+            handle.flush()
+            if self.fsync != "never":
+                os.fsync(handle.fileno())
+        except OSError as e:
+            print(f"⚠️ Memory journal sync failed ({self.path}): {e}")
+        finally:
+            handle.close()
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        handle = open(self.path, "ab+")
+        if handle.tell() > 0:
+            handle.seek(-1, os.SEEK_END)
+            if handle.read(1) != b"\n":
+                handle.write(b"\n")  # Terminate a record torn by a crash
+        self._file_bytes = handle.tell()
+        return handle
+
+    def _account(self, batch: List[bytes], size: int) -> None:
+        self._file_bytes += size
+        for line in batch:
+            if line.startswith(_SUMMARY):
+                self._dead_bytes += self._summary_bytes
+                self._summary_bytes = len(line)
+            elif line.startswith(_CLEAR):
+                self._dead_bytes = self._file_bytes
+                self._summary_bytes = 0
+
+    def _should_compact(self) -> bool:
+        return self._dead_bytes >= self.compact_min_bytes and self._dead_bytes * 2 >= self._file_bytes
+
+    def _compact(self) -> None:
+        """Rewrite the journal without superseded summaries and cleared history."""
+        tmp = f"{self.path}.compact"
+        try:
+            summary_line = b""
+            with open(self.path, "rb") as source, open(tmp, "wb") as out:
+                for line in source:
+                    if not line.endswith(b"\n"):
+                        continue
+                    if line.startswith(_APPEND):
+                        out.write(line)
+                    elif line.startswith(_SUMMARY):
+                        summary_line = line
+                    elif line.startswith(_CLEAR):
+                        out.seek(0)
+                        out.truncate()
+                        summary_line = b""
+                out.write(summary_line)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Memory journal compaction failed ({self.path}): {e}")
+            return
+        self._file_bytes = os.path.getsize(self.path)
+        self._summary_bytes = len(summary_line)
+        self._dead_bytes = 0
+        self.compactions += 1
+
+
+def journal_path_for(memory_file: str) -> str:
+    """`agent_memory.json` -> `agent_memory.jsonl`."""
+    if memory_file.endswith(".jsonl"):
+        return memory_file
+    if memory_file.endswith(".json"):
+        return memory_file + "l"
+    return memory_file + ".jsonl"
+
+
+def create_store(memory_file: str, backend: Optional[str] = None) -> MemoryStore:
+    """Build the configured backend (settings.MEMORY_BACKEND) for a memory file."""
+    backend = backend or settings.MEMORY_BACKEND
+    if backend == "json":
+        return JSONFileStore(memory_file)
+    if backend == "journal":
+        return JournalStore(journal_path_for(memory_file), legacy_path=memory_file)
+    raise ValueError(f"Unknown memory backend: {backend} (expected 'journal' or 'json')")
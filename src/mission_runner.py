@@ -0,0 +1,240 @@
+"""
+Mission Batch Runner - run many mission files through one warm agent.
+
+Each mission file (e.g. `mission.md`, `mission_test_*.md`) is sent as a task to
+a single GeminiAgent (or a pool of swarms), with at most `--concurrency`
+missions in flight. Per-mission results and timings are written to the
+artifacts directory together with a JSON report containing throughput and
+p50/p95 latency.
+
+Usage:
+    python -m src.mission_runner "mission_test_*.md" example_mission.md
+    python -m src.mission_runner missions/ --mode swarm --concurrency 2
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import queue
+import re
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+
+@dataclass
+class MissionResult:
+    """Outcome of a single mission run."""
+
+    mission: str
+    path: str
+    status: str  # ok, error
+    output: str
+    latency_s: float
+    started_at: str
+
+
+def discover_missions(patterns: Sequence[str]) -> List[Path]:
+    """
+    Resolve directories and glob patterns to mission files.
+
+    Args:
+        patterns: Directories (all `*.md` inside), glob patterns or file paths.
+
+    Returns:
+        Unique mission paths in sorted order.
+    """
+    found: Dict[Path, None] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.md"))
+        else:
+            matches = sorted(Path(p) for p in glob.glob(pattern))
+        for match in matches:
+            if match.is_file():
+                found[match.resolve()] = None
+    return sorted(found)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Linearly interpolated percentile.
+
+    Args:
+        values: Sample values.
+        pct: Percentile in [0, 100].
+
+    Returns:
+        The percentile, or 0.0 for an empty sample.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+async def run_missions(
+    missions: Sequence[Path],
+    execute: Callable[[str], Awaitable[str]],
+    concurrency: int,
+) -> List[MissionResult]:
+    """
+    Run missions with bounded concurrency.
+
+    Args:
+        missions: Mission files.
+        execute: Async callable that runs one mission text and returns the result.
+        concurrency: Maximum number of missions in flight.
+
+    Returns:
+        Results in mission order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(path: Path) -> MissionResult:
+        async with semaphore:
+            started_at = datetime.now().isoformat(timespec="seconds")
+            start = time.perf_counter()
+            try:
+                text = path.read_text(encoding="utf-8")
+                output, status = await execute(text), "ok"
+            except Exception as e:
+                output, status = f"{type(e).__name__}: {e}", "error"
+            latency = time.perf_counter() - start
+            print(f"{'✅' if status == 'ok' else '❌'} {path.name} ({latency:.2f}s)")
+            return MissionResult(path.stem, str(path), status, str(output), latency, started_at)
+
+    return await asyncio.gather(*(run_one(path) for path in missions))
+
+
+def build_report(results: List[MissionResult], wall_s: float, mode: str, concurrency: int) -> Dict[str, Any]:
+    latencies = [r.latency_s for r in results]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "missions": len(results),
+        "ok": sum(r.status == "ok" for r in results),
+        "errors": sum(r.status == "error" for r in results),
+        "wall_s": round(wall_s, 3),
+        "throughput_per_min": round(len(results) / wall_s * 60, 2) if wall_s > 0 else 0.0,
+        "latency_p50_s": round(percentile(latencies, 50), 3),
+        "latency_p95_s": round(percentile(latencies, 95), 3),
+        "results": [asdict(r) for r in results],
+    }
+
+
+def write_artifacts(results: List[MissionResult], report: Dict[str, Any], out_dir: Path) -> Path:
+    """Write one markdown file per mission plus report.json; returns the report path."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for result in results:
+        safe_name = re.sub(r"[^\w.-]", "_", result.mission)
+        (out_dir / f"{safe_name}.result.md").write_text(
+            f"# Mission: {result.mission}\n\n"
+            f"- **Bron:** `{result.path}`\n"
+            f"- **Status:** {result.status}\n"
+            f"- **Gestart:** {result.started_at}\n"
+            f"- **Latency:** {result.latency_s:.2f}s\n\n"
+            f"## Resultaat\n\n{result.output}\n",
+            encoding="utf-8",
+        )
+    report_path = out_dir / "report.json"
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report_path
+
+
+Executor = Tuple[Callable[[str], Awaitable[str]], Callable[[], None]]
+
+
+def _agent_executor() -> Executor:
+    from src.agent import GeminiAgent
+
+    agent = GeminiAgent()
+    return agent.process_async, agent.shutdown
+
+
+def _swarm_executor(concurrency: int) -> Executor:
+    """One warm swarm per concurrent slot: a swarm keeps per-task state (message bus, histories)."""
+    from src.swarm import SwarmOrchestrator
+
+    pool: "queue.SimpleQueue[SwarmOrchestrator]" = queue.SimpleQueue()
+    for _ in range(max(1, concurrency)):
+        pool.put(SwarmOrchestrator())
+
+    async def execute(task: str) -> str:
+        # run_missions bounds concurrency, so a swarm is always available
+        swarm = pool.get_nowait()
+        try:
+            return await asyncio.to_thread(swarm.execute, task, False)
+        finally:
+            swarm.reset()
+            pool.put(swarm)
+
+    return execute, lambda: None
+
+
+def run_batch(
+    patterns: Sequence[str],
+    mode: str = "agent",
+    concurrency: Optional[int] = None,
+    out_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Discover missions, run them and write the artifacts.
+
+    Args:
+        patterns: Mission files, directories or glob patterns.
+        mode: "agent" (one warm GeminiAgent) or "swarm" (one warm swarm per slot).
+        concurrency: Missions in flight. Defaults to settings.MISSION_CONCURRENCY.
+        out_dir: Artifacts directory. Defaults to settings.MISSION_ARTIFACTS_DIR.
+
+    Returns:
+        The report dict (empty when no missions were found).
+    """
+    concurrency = settings.MISSION_CONCURRENCY if concurrency is None else concurrency
+    missions = discover_missions(patterns)
+    if not missions:
+        print("⚠️ No mission files found.")
+        return {}
+
+    print(f"🚀 Running {len(missions)} mission(s) in {mode} mode (concurrency {concurrency})")
+    # The agent is built outside the event loop: its MCP manager runs its own loop during startup
+    execute, close = _swarm_executor(concurrency) if mode == "swarm" else _agent_executor()
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(run_missions(missions, execute, concurrency))
+        wall_s = time.perf_counter() - start
+    finally:
+        close()
+
+    report = build_report(results, wall_s, mode, concurrency)
+    report_path = write_artifacts(results, report, Path(out_dir or settings.MISSION_ARTIFACTS_DIR))
+    print(
+        f"📊 {report['ok']}/{report['missions']} ok in {report['wall_s']:.2f}s — "
+        f"{report['throughput_per_min']:.1f} missions/min, "
+        f"p50 {report['latency_p50_s']:.2f}s, p95 {report['latency_p95_s']:.2f}s"
+    )
+    print(f"📦 Report: {report_path}")
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run mission files through one warm agent or swarm.")
+    parser.add_argument("missions", nargs="+", help="Mission files, directories or glob patterns")
+    parser.add_argument("--mode", choices=("agent", "swarm"), default="agent")
+    parser.add_argument("--concurrency", type=int, default=None, help="Missions in flight")
+    parser.add_argument("--out", default=None, help="Artifacts directory")
+    args = parser.parse_args(argv)
+    run_batch(args.missions, args.mode, args.concurrency, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from typing import Any, Callable, Dict, List, Optional
 from notion_client import Client
 from src.config import settings
 from src.models import Project, Task, Company, Invoice
+from src.notion_log_sink import LogEvent, NotionLogSink, release_log_sink, shared_log_sink
+from src.singleflight import flights, make_key
+from src.tracing import span, traced
+from src.metrics import NOTION_CALLS, NOTION_LATENCY, NOTION_RATE_LIMITED
 
 logger = logging.getLogger(__name__)
 
@@ -11,12 +16,31 @@ class EmersonNotionClient:
     
     def __init__(self):
         self.client = Client(auth=settings.NOTION_API_KEY)
+        self.log_sink: NotionLogSink = shared_log_sink(self.write_log_page)
+        self._log_sink_released = False
     
+    def _api(self, database: str, operation: str, call: Callable[..., Any], **kwargs) -> Any:
+        """Voert een Notion API call uit en registreert aantal, latency en rate limits (429) per database."""
+        NOTION_CALLS.inc(database=database, operation=operation)
+        start = time.perf_counter()
+        try:
+            return call(**kwargs)
+        except Exception as e:
+            if getattr(e, "status", None) == 429 or getattr(e, "code", None) == "rate_limited":
+                NOTION_RATE_LIMITED.inc(database=database)
+            raise
+        finally:
+            NOTION_LATENCY.observe(time.perf_counter() - start, database=database)
+
     # Core CRUD & Queries
+    @traced("notion.get_project")
     def get_project(self, project_id: str) -> Optional[Project]:
-        """Haalt een specifiek project op."""
+        """Haalt een specifiek project op (gelijktijdige identieke calls delen één request)."""
+        return flights.do(make_key("notion.get_project", project_id), self._get_project, project_id)
+
+    def _get_project(self, project_id: str) -> Optional[Project]:
         try:
-            page = self.client.pages.retrieve(page_id=project_id)
+            page = self._api("projects", "pages.retrieve", self.client.pages.retrieve, page_id=project_id)
             props = page.get("properties", {})
             
             # Map Properties
@@ -40,8 +64,12 @@ class EmersonNotionClient:
             logger.error(f"Error fetching project {project_id}: {e}")
             return None
 
+    @traced("notion.list_projects")
     def list_projects(self, status: str = None) -> List[Project]:
-        """Haalt een lijst van projecten op, optioneel gefilterd op status."""
+        """Haalt een lijst van projecten op, optioneel gefilterd op status (single-flight)."""
+        return flights.do(make_key("notion.list_projects", status=status), self._list_projects, status)
+
+    def _list_projects(self, status: Optional[str]) -> List[Project]:
         query = {}
         if status:
             query["filter"] = {
@@ -49,7 +77,10 @@ class EmersonNotionClient:
                 "status": {"equals": status}
             }
         
-        results = self.client.data_sources.query(data_source_id=settings.NOTION_DATABASE_PROJECTS, **query).get("results", [])
+        results = self._api(
+            "projects", "data_sources.query", self.client.data_sources.query,
+            data_source_id=settings.NOTION_DATABASE_PROJECTS, **query
+        ).get("results", [])
         projects = []
         for page in results:
             props = page.get("properties", {})
@@ -71,6 +102,7 @@ class EmersonNotionClient:
             ))
         return projects
 
+    @traced("notion.create_task")
     def create_task(self, project_id: str, title: str, **kwargs) -> Optional[Task]:
         """Maakt een nieuwe taak aan in Notion, gekoppeld aan een project."""
         properties = {
@@ -82,7 +114,8 @@ class EmersonNotionClient:
             properties["Due Date"] = {"date": {"start": kwargs["due_date"]}}
             
         try:
-            new_page = self.client.pages.create(
+            new_page = self._api(
+                "tasks", "pages.create", self.client.pages.create,
                 parent={"database_id": settings.NOTION_DATABASE_TASKS},
                 properties=properties
             )
@@ -98,15 +131,41 @@ class EmersonNotionClient:
             return None
 
     def log_event(self, priority: str, event: str, details: Dict[str, Any]) -> None:
-        """Logt een event naar de Agent Logs database."""
-        try:
-            self.client.pages.create(
-                parent={"database_id": settings.NOTION_DATABASE_LOGS},
-                properties={
-                    "Event": {"title": [{"text": {"content": event}}]},
-                    "Priority": {"select": {"name": priority}},
-                    "Details": {"rich_text": [{"text": {"content": str(details)}}]}
-                }
-            )
-        except Exception as e:
-            logger.error(f"Error logging event to Notion: {e}")
+        """Logt een event naar de Agent Logs database (via de achtergrond-sink, niet-blokkerend)."""
+        with span("notion.log_event", priority=priority, queued=settings.NOTION_LOG_ASYNC) as trace:
+            if settings.NOTION_LOG_ASYNC:
+                self.log_sink.submit(priority, event, details)
+                return
+            try:
+                self.write_log_page(LogEvent(priority, event, details))
+            except Exception as e:
+                trace.set(error=str(e)[:200])
+                logger.error(f"Error logging event to Notion: {e}")
+
+    @traced("notion.write_log_page")
+    def write_log_page(self, log_event: LogEvent) -> None:
+        """Schrijft één (eventueel samengevoegd) event als pagina; raises bij een fout."""
+        details = str(log_event.details)
+        if log_event.count > 1:
+            details += f" (x{log_event.count})"
+        self._api(
+            "logs", "pages.create", self.client.pages.create,
+            parent={"database_id": settings.NOTION_DATABASE_LOGS},
+            properties={
+                "Event": {"title": [{"text": {"content": log_event.event}}]},
+                "Priority": {"select": {"name": log_event.priority}},
+                "Details": {"rich_text": [{"text": {"content": details}}]}
+            }
+        )
+
+    def flush_logs(self, timeout: Optional[float] = None) -> None:
+        """
+        Schrijft openstaande log events weg (shutdown hook).
+
+        De sink wordt gedeeld door alle clients in het proces; hij stopt pas als de laatste client hem loslaat.
+        """
+        if self._log_sink_released:
+            self.log_sink.flush(timeout)
+            return
+        self._log_sink_released = True
+        release_log_sink(self.log_sink, timeout)
@@ -0,0 +1,314 @@
+"""
+Background sink for Notion log events.
+
+`EmersonNotionClient.log_event` used to create a Notion page on the request
+path for every tool execution. Events are now queued and written by a daemon
+thread:
+
+- identical events arriving within `NOTION_LOG_WINDOW` seconds are coalesced
+  into one page (with a repeat count);
+- pages are created at most `NOTION_LOG_RATE_LIMIT` per second (Notion allows
+  an average of three requests per second);
+- when Notion is unreachable, events are spilled to a local JSONL journal that
+  is replayed once Notion is reachable again and on the next start;
+- `close()` flushes the queue on shutdown.
+"""
+
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import settings
+
+
+@dataclass
+class LogEvent:
+    """A queued Notion log event."""
+
+    priority: str
+    event: str
+    details: Dict[str, Any]
+    count: int = 1
+    timestamp: float = field(default_factory=time.time)
+
+    def key(self) -> Tuple[str, str, str]:
+        return self.priority, self.event, json.dumps(self.details, sort_keys=True, default=str)
+
+
+def coalesce(events: List[LogEvent]) -> List[LogEvent]:
+    """Merge identical events (same priority, event and details), keeping first-seen order."""
+    merged: Dict[Tuple[str, str, str], LogEvent] = {}
+    for event in events:
+        existing = merged.get(event.key())
+        if existing is None:
+            merged[event.key()] = LogEvent(
+                event.priority, event.event, event.details, event.count, event.timestamp
+            )
+        else:
+            existing.count += event.count
+    return list(merged.values())
+
+
+class NotionLogSink:
+    """
+    Queues log events and writes them to Notion from a background thread.
+
+    Example usage:
+        sink = NotionLogSink(client.write_log_page)
+        sink.submit("P2", "Tool executed: daily_check", {"args": {}})
+        sink.close()
+    """
+
+    def __init__(
+        self,
+        write_fn: Callable[[LogEvent], None],
+        journal_path: Optional[str] = None,
+        window: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            write_fn: Writes one event to Notion; must raise when the write failed.
+            journal_path: JSONL spill journal. Defaults to settings.NOTION_LOG_JOURNAL.
+            window: Coalescing window in seconds. Defaults to settings.NOTION_LOG_WINDOW.
+            rate_limit: Maximum writes per second. Defaults to settings.NOTION_LOG_RATE_LIMIT.
+            retry_interval: Seconds to wait before retrying after a failed write.
+                Defaults to settings.NOTION_LOG_RETRY_INTERVAL.
+        """
+        self.write_fn = write_fn
+        self.journal_path = Path(journal_path or settings.NOTION_LOG_JOURNAL)
+        self.window = settings.NOTION_LOG_WINDOW if window is None else window
+        rate = settings.NOTION_LOG_RATE_LIMIT if rate_limit is None else rate_limit
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self.retry_interval = settings.NOTION_LOG_RETRY_INTERVAL if retry_interval is None else retry_interval
+
+        self._pending: List[LogEvent] = []
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flushing = False
+        self._offline_until = 0.0
+        self._last_write = 0.0
+        self._journal_lock = threading.Lock()
+
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    def start(self) -> None:
+        """Start the worker thread (replays the journal first). Idempotent."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="notion-log-sink", daemon=True)
+            self._thread.start()
+
+    def resume_journal(self) -> None:
+        """Start the worker if events journaled by a previous run are waiting to be replayed."""
+        if self._journal_has_events():
+            self.start()
+
+    def submit(self, priority: str, event: str, details: Dict[str, Any]) -> None:
+        """Queue an event without blocking the caller."""
+        with self._cond:
+            self._pending.append(LogEvent(priority, event, dict(details or {})))
+            self.submitted += 1
+            self._cond.notify_all()
+        self.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all queued events now, skipping the coalescing window.
+
+        Returns:
+            True if the queue drained within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    if self._thread is None or not self._thread.is_alive():
+                        return False
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing = False
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush and stop the worker. Events that could not be written end up in the journal."""
+        timeout = settings.NOTION_LOG_FLUSH_TIMEOUT if timeout is None else timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            leftover, self._pending = self._pending, []
+            self._thread = None
+        if leftover:
+            self._spill(coalesce(leftover))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "pending": len(self._pending),
+        }
+
+    # Worker
+
+    def _run(self) -> None:
+        self._replay_journal()
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    # Wake up periodically to retry a non-empty journal
+                    self._cond.wait(self.retry_interval if self._journal_has_events() else None)
+                    if not self._pending and self._journal_has_events() and time.time() >= self._offline_until:
+                        break
+                if not self._pending and self._stopping:
+                    return
+
+                if self._pending:
+                    deadline = self._pending[0].timestamp + self.window
+                    while not (self._stopping or self._flushing) and time.time() < deadline:
+                        self._cond.wait(deadline - time.time())
+
+                batch = coalesce(self._pending)
+                self.coalesced += len(self._pending) - len(batch)
+                self._pending = []
+                self._inflight = len(batch)
+
+            if not batch:
+                self._replay_journal()
+            try:
+                self._write_batch(batch)
+            finally:
+                with self._cond:
+                    self._inflight = 0
+                    self._cond.notify_all()
+
+    def _write_batch(self, batch: List[LogEvent]) -> None:
+        for i, event in enumerate(batch):
+            if time.time() < self._offline_until:
+                self._spill(batch[i:])
+                return
+            wait = self._last_write + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_write = time.monotonic()
+            try:
+                self.write_fn(event)
+            except Exception as e:
+                print(f"⚠️ Notion log write failed, journaling {len(batch) - i} event(s): {e}")
+                self._offline_until = time.time() + self.retry_interval
+                self._spill(batch[i:])
+                return
+            self.written += 1
+        # Notion is reachable again: retry what was journaled earlier
+        if batch and self._journal_has_events():
+            self._replay_journal()
+
+    # Journal
+
+    def _journal_has_events(self) -> bool:
+        try:
+            return self.journal_path.stat().st_size > 0
+        except OSError:
+            return False
+
+    def _spill(self, events: List[LogEvent]) -> None:
+        if not events:
+            return
+        with self._journal_lock:
+            try:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    for event in events:
+                        f.write(json.dumps(asdict(event), ensure_ascii=False, default=str) + "\n")
+                self.spilled += len(events)
+            except OSError as e:
+                print(f"⚠️ Could not journal {len(events)} Notion log event(s): {e}")
+
+    def _replay_journal(self) -> None:
+        """Move journaled events back into the queue (they are re-journaled if writing fails again)."""
+        with self._journal_lock:
+            try:
+                lines = self.journal_path.read_text(encoding="utf-8").splitlines()
+                self.journal_path.unlink()
+            except OSError:
+                return
+        events = []
+        for line in lines:
+            try:
+                events.append(LogEvent(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        if not events:
+            return
+        with self._cond:
+            # Replayed events are old: put them first so they are written right away
+            self._pending[:0] = events
+            self.replayed += len(events)
+            self._cond.notify_all()
+
+
+_sinks: Dict[str, Tuple[NotionLogSink, int]] = {}  # journal path -> (sink, users)
+_sinks_lock = threading.Lock()
+
+
+def shared_log_sink(write_fn: Callable[[LogEvent], None]) -> NotionLogSink:
+    """
+    Return the process-wide sink for the configured journal.
+
+    All EmersonNotionClient instances share one sink so they share one
+    rate limit and one journal. Every call must be paired with
+    release_log_sink; the sink is closed when its last user releases it.
+    """
+    path = str(Path(settings.NOTION_LOG_JOURNAL).resolve())
+    with _sinks_lock:
+        sink, users = _sinks.get(path, (None, 0))
+        if sink is None:
+            sink = NotionLogSink(write_fn, journal_path=path)
+        _sinks[path] = (sink, users + 1)
+        return sink
+
+
+def release_log_sink(sink: NotionLogSink, timeout: Optional[float] = None) -> None:
+    """
+    Release one user of a shared sink: flush its queue, and close it if no other user is left.
+
+    Args:
+        sink: Sink returned by shared_log_sink.
+        timeout: Seconds to wait for the flush/close. Defaults to settings.NOTION_LOG_FLUSH_TIMEOUT.
+    """
+    path = str(sink.journal_path.resolve())
+    with _sinks_lock:
+        registered, users = _sinks.get(path, (None, 0))
+        last = registered is not sink or users <= 1
+        if registered is sink:
+            if last:
+                del _sinks[path]
+            else:
+                _sinks[path] = (sink, users - 1)
+    if last:
+        sink.close(timeout)
+    else:
+        sink.flush(settings.NOTION_LOG_FLUSH_TIMEOUT if timeout is None else timeout)
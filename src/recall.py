@@ -0,0 +1,261 @@
+"""
+Long-term recall over past memory entries.
+
+The summary keeps the gist of old conversation, but details (a project code,
+an earlier decision) are lost once they are folded in. The RecallIndex keeps
+every past message searchable:
+
+- each message becomes a set of hashed word n-gram features (stemmed
+  unigrams and bigrams, see src.retrieval.tokenize) in 2^20 buckets;
+- an inverted index maps each feature bucket to the messages containing it
+  and is updated incrementally on every add;
+- a query only walks the postings of its selective features (features in
+  more than RECALL_MAX_DF of all messages are skipped, and at most the newest
+  RECALL_MAX_POSTINGS messages per feature are visited), so lookups stay
+  bounded as the history grows to hundreds of thousands of messages;
+- candidates are ranked by cosine similarity of their binary feature vectors.
+
+The index is persisted as an append-only JSONL sidecar (sequence number, role
+and a snippet per message), written through one handle that stays open until
+close(). Only the newest RECALL_LOAD_TAIL entries are loaded, in the background
+when the memory is opened; a missing sidecar is backfilled from the loaded
+history.
+
+Example usage:
+    index = RecallIndex("agent_memory.recall.jsonl")
+    index.add(42, "user", "Offerte PRO-202 is verstuurd naar Aura")
+    hits = index.search("wat was er met de offerte voor Aura?", k=3, before=100)
+"""
+
+import json
+import math
+import os
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.memory_store import lines_reversed
+from src.retrieval import tokenize
+
+_FEATURE_MASK = (1 << 20) - 1
+
+
+def features(text: str) -> Set[int]:
+    """Hashed word unigram and bigram features of a text."""
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return {zlib.crc32(gram.encode("utf-8")) & _FEATURE_MASK for gram in grams}
+
+
+@dataclass
+class RecallHit:
+    """A past message relevant to the query."""
+
+    seq: int
+    role: str
+    text: str
+    score: float
+
+
+class RecallIndex:
+    """Incremental inverted index over hashed n-gram features of past messages."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_df: Optional[float] = None,
+        max_postings: Optional[int] = None,
+        min_score: Optional[float] = None,
+        snippet_chars: Optional[int] = None,
+        load_tail: Optional[int] = None,
+        backfill: Optional[Iterable[Tuple[int, str, str]]] = None,
+    ):
+        """
+        Args:
+            path: JSONL sidecar ('' or None = in memory only).
+            max_df: Skip query features present in more than this fraction of messages.
+                    Defaults to settings.RECALL_MAX_DF.
+            max_postings: Newest messages visited per query feature. Defaults to settings.RECALL_MAX_POSTINGS.
+            min_score: Minimum cosine similarity of a hit. Defaults to settings.RECALL_MIN_SCORE.
+            snippet_chars: Characters of each message kept for the prompt. Defaults to settings.RECALL_SNIPPET_CHARS.
+            load_tail: Newest sidecar entries loaded (0 = all). Defaults to settings.RECALL_LOAD_TAIL.
+            backfill: (seq, role, content) of messages to index when the sidecar does not exist yet.
+        """
+        self.path = path or None
+        self.max_df = settings.RECALL_MAX_DF if max_df is None else max_df
+        self.max_postings = max_postings or settings.RECALL_MAX_POSTINGS
+        self.min_score = settings.RECALL_MIN_SCORE if min_score is None else min_score
+        self.snippet_chars = snippet_chars or settings.RECALL_SNIPPET_CHARS
+        self.load_tail = settings.RECALL_LOAD_TAIL if load_tail is None else load_tail
+
+        self._postings: Dict[int, List[int]] = defaultdict(list)  # feature -> item ids, oldest first
+        self._items: List[Tuple[int, str, str, int]] = []  # (seq, role, snippet, feature count)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._handle = None  # Append handle of the sidecar, opened on the first write
+        self._backfill = list(backfill or [])
+        self.searches = 0
+        self.candidates = 0
+
+    # Loading
+
+    def open_in_background(self) -> threading.Thread:
+        """Load the sidecar on a daemon thread; add/search wait for it if they come first."""
+        thread = threading.Thread(target=self._ensure_loaded, name="recall-load", daemon=True)
+        thread.start()
+        return thread
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            backfill, self._backfill = self._backfill, []
+            if self.path and os.path.exists(self.path):
+                self._load_sidecar()
+            else:
+                for seq, role, content in backfill:
+                    self._add_locked(seq, role, content, persist=True)
+
+    def _load_sidecar(self) -> None:
+        records = []
+        # Read from the end so a long history costs no more than the tail that is kept
+        for line in lines_reversed(self.path):
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue  # Torn write of a crashed run
+            if "seq" in record:
+                records.append(record)
+                if len(records) == self.load_tail:
+                    break
+        for record in reversed(records):
+            self._add_locked(record["seq"], record.get("role", ""), record.get("text", ""), persist=False)
+
+    # Updates
+
+    def add(self, seq: int, role: str, content: str) -> None:
+        """Index one message (absolute sequence number `seq`)."""
+        with self._lock:
+            self._ensure_loaded()
+            self._add_locked(seq, role, content, persist=True)
+
+    def _add_locked(self, seq: int, role: str, content: str, persist: bool) -> None:
+        snippet = content[: self.snippet_chars]
+        feats = features(content)
+        if not feats:
+            return
+        item_id = len(self._items)
+        self._items.append((seq, role, snippet, len(feats)))
+        for feature in feats:
+            self._postings[feature].append(item_id)
+        if persist:
+            self._write({"seq": seq, "role": role, "text": snippet})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        try:
+            if self._handle is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._handle = open(self.path, "a", encoding="utf-8")
+            self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._handle.flush()
+        except OSError as e:
+            print(f"⚠️ Could not write recall index {self.path}: {e}")
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError as e:
+                print(f"⚠️ Could not close recall index {self.path}: {e}")
+            self._handle = None
+
+    def close(self) -> None:
+        """Release the sidecar handle (it is reopened on the next add)."""
+        with self._lock:
+            self._close_handle()
+
+    def _reset(self) -> None:
+        self._postings = defaultdict(list)
+        self._items = []
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._reset()
+            self._close_handle()
+            if self.path:
+                try:
+                    with open(self.path, "w", encoding="utf-8"):
+                        pass
+                except OSError as e:
+                    print(f"⚠️ Could not clear recall index {self.path}: {e}")
+
+    # Queries
+
+    def search(self, query: str, k: int, before: Optional[int] = None) -> List[RecallHit]:
+        """
+        Return up to k past messages most similar to the query.
+
+        Args:
+            query: Text to match (usually the new user message).
+            k: Maximum number of hits.
+            before: Only messages with a sequence number below this (e.g. older than the context window).
+        """
+        query_features = features(query)
+        if k <= 0 or not query_features:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            total = len(self._items)
+            if not total:
+                return []
+            max_df = max(1, int(total * self.max_df))
+            shared: Dict[int, int] = defaultdict(int)
+            for feature in query_features:
+                posting = self._postings.get(feature)
+                if not posting or (len(posting) > max_df and total >= 100):
+                    continue  # Too common to tell messages apart
+                for item_id in posting[-self.max_postings:]:
+                    shared[item_id] += 1
+            self.searches += 1
+            self.candidates += len(shared)
+
+            scored = []
+            for item_id, count in shared.items():
+                seq, role, snippet, size = self._items[item_id]
+                if before is not None and seq >= before:
+                    continue
+                score = count / math.sqrt(len(query_features) * size)
+                if score >= self.min_score:
+                    scored.append((score, seq, role, snippet))
+        scored.sort(key=lambda hit: (hit[0], hit[1]), reverse=True)
+        return [RecallHit(seq, role, snippet, round(score, 4)) for score, seq, role, snippet in scored[:k]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "messages": len(self._items),
+                "features": len(self._postings),
+                "searches": self.searches,
+                "avg_candidates": round(self.candidates / self.searches, 1) if self.searches else 0.0,
+            }
+
+
+def recall_path_for(memory_file: str) -> str:
+    """`agent_memory.json` -> `agent_memory.recall.jsonl`."""
+    base = memory_file
+    for suffix in (".jsonl", ".json"):
+        if base.endswith(suffix):
+            base = base[: -len(suffix)]
+            break
+    return f"{base}.recall.jsonl"
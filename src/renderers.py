@@ -0,0 +1,88 @@
+"""
+Deterministic renderers for structured tool results.
+
+After a tool ran, the agent normally makes a second model call that only
+formats the observation for the user. For tools whose output is structured
+(or already user-ready, like the Notion tools that return text with links)
+that call is pure latency, so those results are rendered locally instead.
+
+A renderer receives the tool output and arguments and returns the reply text,
+or None when the output is free-form and should still be formatted by the model:
+
+    @renderer("get_weather")
+    def _render_weather(output, args):
+        return f"{output['city']}: {output['temperature_c']}°C"
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+Renderer = Callable[[Any, Dict[str, Any]], Optional[str]]
+
+_renderers: Dict[str, Renderer] = {}
+_lock = threading.Lock()
+
+
+def register_renderer(tool_name: str, fn: Renderer) -> None:
+    """
+    Register (or replace) the renderer of a tool.
+
+    Args:
+        tool_name: Registered tool name.
+        fn: Callable (output, args) -> reply text or None.
+    """
+    with _lock:
+        _renderers[tool_name] = fn
+
+
+def renderer(*tool_names: str) -> Callable[[Renderer], Renderer]:
+    """Decorator form of register_renderer for one or more tools."""
+    def decorator(fn: Renderer) -> Renderer:
+        for name in tool_names:
+            register_renderer(name, fn)
+        return fn
+    return decorator
+
+
+def get_renderer(tool_name: str) -> Optional[Renderer]:
+    with _lock:
+        return _renderers.get(tool_name)
+
+
+def render_results(results: Iterable[Tuple[str, Dict[str, Any], Any]]) -> Optional[str]:
+    """
+    Render the results of one turn without the model.
+
+    Args:
+        results: (tool name, args, output) of every successful action.
+
+    Returns:
+        The combined reply, or None if any result needs model formatting.
+    """
+    parts = []
+    for name, args, output in results:
+        fn = get_renderer(name)
+        if fn is None:
+            return None
+        try:
+            text = fn(output, args)
+        except Exception as e:
+            print(f"⚠️ Renderer for {name} failed, falling back to model formatting: {e}")
+            return None
+        if not text:
+            return None
+        parts.append(text.strip())
+    return "\n\n".join(parts) if parts else None
+
+
+@renderer("get_project_status", "create_task", "daily_check", "search_projects")
+def _render_notion_text(output: Any, args: Dict[str, Any]) -> Optional[str]:
+    # Notion tools already return user-facing Dutch text including the Notion links
+    return output if isinstance(output, str) else None
+
+
+@renderer("get_weather")
+def _render_weather(output: Any, args: Dict[str, Any]) -> Optional[str]:
+    if not isinstance(output, dict) or not {"city", "temperature_c", "condition"} <= output.keys():
+        return None
+    return f"🌤️ Weer in {output['city']}: {output['temperature_c']}°C, {output['condition']}."
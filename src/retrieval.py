@@ -0,0 +1,310 @@
+"""
+Lightweight lexical retrieval for prompt construction.
+
+Provides a small BM25 index and a context retriever that splits the markdown
+context corpus into heading-delimited chunks and selects only the chunks that
+are relevant to the incoming message, within a token budget. Pinned files
+(e.g. `.emerson/rules.md`) are always included.
+
+No external dependencies: token counts are estimated (~4 characters per token).
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.context_cache import ContextFile
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+# Very common Dutch/English words that carry no retrieval signal
+_STOPWORDS = frozenset(
+    "de het een en van in op is te dat die voor met aan er als zijn om of bij "
+    "the a an and of in on is to that for with at be as or by it this are"
+    .split()
+)
+
+
+def _stem(token: str) -> str:
+    """Strip common English/Dutch plural suffixes ("projects" -> "project", "facturen" -> "factur")."""
+    if len(token) > 5 and token.endswith("en"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens, dropping stopwords and single characters.
+
+    Args:
+        text: Input text.
+
+    Returns:
+        List of (lightly stemmed) tokens.
+    """
+    return [
+        _stem(t) for t in _TOKEN_RE.findall(text.lower())
+        if len(t) > 1 and t not in _STOPWORDS
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a text (~4 characters per token).
+
+    Args:
+        text: Input text.
+
+    Returns:
+        Estimated token count (0 for empty text).
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over pre-tokenized documents.
+
+    Example usage:
+        index = BM25Index([tokenize(doc) for doc in docs])
+        ranked = index.search(tokenize("project status"), top_k=5)
+    """
+
+    def __init__(self, documents: Iterable[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            documents: Token lists, one per document.
+            k1: Term frequency saturation.
+            b: Length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+
+        for doc_id, tokens in enumerate(documents):
+            self._lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self._postings[term].append((doc_id, tf))
+
+        n_docs = len(self._lengths)
+        self._avg_len = (sum(self._lengths) / n_docs) if n_docs else 0.0
+        self._idf = {
+            term: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def search(self, query_tokens: Sequence[str], top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query_tokens: Tokenized query.
+            top_k: Maximum number of results; all matches when None.
+
+        Returns:
+            List of (document index, score) with score > 0, best first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(query_tokens):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in posting:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / (self._avg_len or 1.0))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k] if top_k else ranked
+
+
+@dataclass
+class ContextChunk:
+    """A heading-delimited piece of a context file."""
+
+    file_name: str
+    source: str
+    order: int  # Position in the corpus, used to restore document order
+    text: str
+    tokens: int
+    pinned: bool = False
+
+
+def chunk_markdown(content: str, max_tokens: int) -> List[str]:
+    """
+    Split markdown into chunks at headings, further splitting long sections at blank lines.
+
+    Args:
+        content: Markdown text.
+        max_tokens: Soft upper bound on the estimated tokens per chunk.
+
+    Returns:
+        List of non-empty chunk texts.
+    """
+    sections: List[List[str]] = [[]]
+    for line in content.splitlines():
+        if _HEADING_RE.match(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+
+    chunks: List[str] = []
+    for section in sections:
+        text = "\n".join(section).strip()
+        if not text:
+            continue
+        if estimate_tokens(text) <= max_tokens:
+            chunks.append(text)
+            continue
+
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", text):
+            candidate = f"{current}\n\n{paragraph}" if current else paragraph
+            if current and estimate_tokens(candidate) > max_tokens:
+                chunks.append(current.strip())
+                current = paragraph
+            else:
+                current = candidate
+        if current.strip():
+            chunks.append(current.strip())
+    return chunks
+
+
+class ContextRetriever:
+    """
+    Selects relevant context chunks for a message within a token budget.
+
+    The index is rebuilt only when the ContextCache version changes.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        top_k: Optional[int] = None,
+        pinned_files: Optional[List[str]] = None,
+        chunk_max_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize the retriever.
+
+        Args:
+            token_budget: Max estimated tokens of non-pinned context. Defaults to settings.CONTEXT_TOKEN_BUDGET.
+            top_k: Max number of non-pinned chunks. Defaults to settings.CONTEXT_TOP_K.
+            pinned_files: Files that are always included, as "<dir>/<file>". Defaults to settings.CONTEXT_PINNED_FILES.
+            chunk_max_tokens: Soft max size per chunk. Defaults to settings.CONTEXT_CHUNK_MAX_TOKENS.
+        """
+        self.token_budget = settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.top_k = settings.CONTEXT_TOP_K if top_k is None else top_k
+        self.pinned_files = set(settings.CONTEXT_PINNED_FILES if pinned_files is None else pinned_files)
+        self.chunk_max_tokens = (
+            settings.CONTEXT_CHUNK_MAX_TOKENS if chunk_max_tokens is None else chunk_max_tokens
+        )
+
+        self._version: Optional[int] = None
+        self._chunks: List[ContextChunk] = []
+        self._pinned: List[ContextChunk] = []
+        self._candidates: List[ContextChunk] = []
+        self._index = BM25Index([])
+        self._lock = threading.Lock()
+
+    def _is_pinned(self, context_file: ContextFile) -> bool:
+        return f"{context_file.source}/{context_file.path.name}" in self.pinned_files
+
+    def build(self, files: Sequence[ContextFile], version: Optional[int] = None) -> None:
+        """
+        (Re)build the chunk index, skipping the work if `version` is unchanged.
+
+        Args:
+            files: Context files in prompt order.
+            version: ContextCache version the files belong to.
+        """
+        with self._lock:
+            if version is not None and version == self._version:
+                return
+
+            chunks: List[ContextChunk] = []
+            for order_base, context_file in enumerate(files):
+                pinned = self._is_pinned(context_file)
+                for i, text in enumerate(chunk_markdown(context_file.content, self.chunk_max_tokens)):
+                    chunks.append(ContextChunk(
+                        file_name=context_file.path.name,
+                        source=context_file.source,
+                        order=order_base * 100_000 + i,
+                        text=text,
+                        tokens=estimate_tokens(text),
+                        pinned=pinned,
+                    ))
+
+            # Deduplicate identical chunks across sources, preferring pinned copies
+            seen: set = set()
+            unique: List[ContextChunk] = []
+            for chunk in sorted(chunks, key=lambda c: (not c.pinned, c.order)):
+                digest = hashlib.sha1(" ".join(chunk.text.split()).lower().encode("utf-8")).hexdigest()
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                unique.append(chunk)
+
+            self._chunks = sorted(unique, key=lambda c: c.order)
+            self._pinned = [c for c in self._chunks if c.pinned]
+            self._candidates = [c for c in self._chunks if not c.pinned]
+            self._index = BM25Index([tokenize(c.text) for c in self._candidates])
+            self._version = version
+
+    def select(self, query: str) -> List[ContextChunk]:
+        """
+        Pick pinned chunks plus the top-k relevant chunks that fit the token budget.
+
+        Args:
+            query: The incoming user message.
+
+        Returns:
+            Selected chunks in document order.
+        """
+        with self._lock:
+            selected = list(self._pinned)
+            used = 0
+            for doc_id, _score in self._index.search(tokenize(query)):
+                if len(selected) - len(self._pinned) >= self.top_k:
+                    break
+                chunk = self._candidates[doc_id]
+                if used + chunk.tokens > self.token_budget:
+                    continue
+                selected.append(chunk)
+                used += chunk.tokens
+            return sorted(selected, key=lambda c: c.order)
+
+    def render(self, query: str) -> str:
+        """
+        Render the selected chunks for the system prompt, grouped per file.
+
+        Args:
+            query: The incoming user message.
+
+        Returns:
+            Context text in the same format as the full-corpus prompt.
+        """
+        parts: List[str] = []
+        current: Optional[Tuple[str, str]] = None
+        for chunk in self.select(query):
+            if (chunk.source, chunk.file_name) != current:
+                current = (chunk.source, chunk.file_name)
+                parts.append(f"\n--- {chunk.file_name} (from {chunk.source}) ---")
+            parts.append(chunk.text)
+        return "\n".join(parts)
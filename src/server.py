@@ -0,0 +1,428 @@
+"""
+Long-running HTTP service with a warm agent pool.
+
+`python src/agent.py` answers one question and exits, so every task pays the
+full startup (tool manifest, MCP connections, Notion client). This server
+starts the agents once and keeps them warm:
+
+- POST /process  {"message": "...", "session_id": "...", "stream": false}  -> {"reply": "..."}
+  With "stream": true the reply is sent as chunked text/plain while the model
+  streams (tool actions are dispatched as soon as they are complete).
+- POST /swarm    {"task": "..."}                       -> {"result": "..."}
+- GET  /health   pool size, in-flight and queued requests, draining flag
+- GET  /metrics  Prometheus metrics (src.metrics)
+
+At most SERVER_MAX_CONCURRENCY requests run at once; up to SERVER_MAX_QUEUE
+more wait for a slot, anything beyond is rejected with 503 and Retry-After.
+On SIGTERM/SIGINT the server stops accepting connections, finishes in-flight
+requests (up to SERVER_DRAIN_TIMEOUT) and shuts the agents down, which
+flushes pending Notion logs.
+
+Usage:
+    python -m src.server --port 8080 --agents 2
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.metrics import registry
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """Turned into an HTTP error response with a JSON body."""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class AgentPool:
+    """
+    Warm GeminiAgent instances; requests go to the agent with the fewest in flight.
+
+    A GeminiAgent serves concurrent sessions itself, so several agents mainly
+    spread tool thread pools and MCP sessions.
+    """
+
+    def __init__(self, agents: List[Any]):
+        if not agents:
+            raise ValueError("AgentPool needs at least one agent.")
+        self.agents = agents
+        self._in_flight = [0] * len(agents)
+
+    @classmethod
+    def create(cls, size: int, factory: Optional[Callable[..., Any]] = None) -> "AgentPool":
+        """
+        Build `size` agents; call outside a running event loop (MCP startup runs its own loop).
+
+        The agents share the first agent's default memory and session store, so
+        no memory file is ever opened by two memories: `factory` is called with
+        `memory=` and `sessions=` for every agent after the first.
+        """
+        if factory is None:
+            from src.agent import GeminiAgent
+
+            factory = GeminiAgent
+        first = factory()
+        rest = [factory(memory=first.memory, sessions=first.sessions) for _ in range(max(1, size) - 1)]
+        return cls([first] + rest)
+
+    def acquire(self) -> int:
+        index = min(range(len(self.agents)), key=self._in_flight.__getitem__)
+        self._in_flight[index] += 1
+        return index
+
+    def release(self, index: int) -> None:
+        self._in_flight[index] -= 1
+
+    def shutdown(self) -> None:
+        # The first agent owns the shared memory: shut it down last
+        for agent in reversed(self.agents):
+            try:
+                agent.shutdown()
+            except Exception as e:
+                print(f"⚠️ Agent shutdown failed: {e}")
+
+
+class SwarmPool:
+    """Warm swarms; one task per swarm at a time (a swarm keeps per-task state)."""
+
+    def __init__(self, swarms: List[Any]):
+        self._swarms: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self.size = len(swarms)
+        for swarm in swarms:
+            self._swarms.put(swarm)
+        self._available = asyncio.Semaphore(self.size) if self.size else None
+
+    @classmethod
+    def create(cls, size: int, factory: Optional[Callable[[], Any]] = None) -> "SwarmPool":
+        if factory is None:
+            from src.swarm import SwarmOrchestrator
+
+            factory = SwarmOrchestrator
+        return cls([factory() for _ in range(max(0, size))])
+
+    async def execute(self, task: str) -> str:
+        if self._available is None:
+            raise HTTPError(404, "Swarm mode is disabled (SERVER_SWARM_POOL_SIZE=0).")
+        async with self._available:
+            swarm = self._swarms.get_nowait()
+            try:
+                return await asyncio.to_thread(swarm.execute, task, False)
+            finally:
+                swarm.reset()
+                self._swarms.put(swarm)
+
+
+class AgentServer:
+    """
+    asyncio HTTP/1.1 server in front of the agent and swarm pools.
+
+    Example usage:
+        agents, swarms = AgentPool.create(2), SwarmPool.create(1)
+        asyncio.run(AgentServer(agents, swarms).serve())
+    """
+
+    def __init__(
+        self,
+        agents: AgentPool,
+        swarms: Optional[SwarmPool] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ):
+        """
+        Args:
+            agents: Warm agent pool.
+            swarms: Warm swarm pool (None disables /swarm).
+            host: Bind address. Defaults to settings.SERVER_HOST.
+            port: Port (0 picks a free one). Defaults to settings.SERVER_PORT.
+            max_concurrency: Requests executing at once. Defaults to settings.SERVER_MAX_CONCURRENCY.
+            max_queue: Requests waiting for a slot. Defaults to settings.SERVER_MAX_QUEUE.
+        """
+        self.agents = agents
+        self.swarms = swarms or SwarmPool([])
+        self.host = host or settings.SERVER_HOST
+        self.port = settings.SERVER_PORT if port is None else port
+        self.max_concurrency = max(1, max_concurrency or settings.SERVER_MAX_CONCURRENCY)
+        self.max_queue = settings.SERVER_MAX_QUEUE if max_queue is None else max_queue
+
+        self.in_flight = 0
+        self.queued = 0
+        self.draining = False
+        self.requests = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    # Lifecycle
+
+    async def start(self) -> Tuple[str, int]:
+        """Start listening; returns the bound (host, port)."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.port = port
+        print(f"🚀 Agent server listening on http://{host}:{port} ({len(self.agents.agents)} warm agent(s))")
+        return host, port
+
+    async def serve(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Serve until `stop` is set or SIGTERM/SIGINT arrives, then drain."""
+        stop = stop or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Not on the main thread or not supported (Windows)
+        if self._server is None:
+            await self.start()
+        await stop.wait()
+        await self.drain()
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting connections and wait for in-flight requests.
+
+        Returns:
+            True if all requests finished within the timeout.
+        """
+        timeout = settings.SERVER_DRAIN_TIMEOUT if timeout is None else timeout
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        print(f"⏳ Draining {self.in_flight + self.queued} request(s)...")
+        drained = True
+        if self._idle is not None:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                drained = False
+                print(f"⚠️ Drain timeout: {self.in_flight + self.queued} request(s) still running")
+        return drained
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "draining" if self.draining else "ok",
+            "agents": len(self.agents.agents),
+            "swarms": self.swarms.size,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "requests": self.requests,
+            "rejected": self.rejected,
+        }
+
+    # Admission control
+
+    async def _admit(self) -> None:
+        if self.draining:
+            raise HTTPError(503, "Server is shutting down.", {"Retry-After": "5"})
+        if self.in_flight >= self.max_concurrency and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPError(503, "Too many requests in queue.", {"Retry-After": "1"})
+        self.queued += 1
+        self._idle.clear()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def _leave(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        if self.in_flight == 0 and self.queued == 0:
+            self._idle.set()
+
+    # HTTP
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise ConnectionResetError("Empty request")
+        try:
+            method, target, _version = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.")
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raw_length = headers.get("content-length") or "0"
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            raise HTTPError(400, "Invalid Content-Length.")
+        length = int(raw_length)
+        if length > settings.SERVER_MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def _head(status: int, content_type: str, headers: Optional[Dict[str, str]] = None, length: Optional[int] = None) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}", f"Content-Type: {content_type}", "Connection: close"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(
+        self, writer: asyncio.StreamWriter, status: int, body: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        if isinstance(body, str):
+            data, content_type = body.encode("utf-8"), "text/plain; charset=utf-8"
+        else:
+            data, content_type = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json"
+        writer.write(self._head(status, content_type, headers, len(data)) + data)
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, path, headers, body = await asyncio.wait_for(
+                    self._read_request(reader), settings.SERVER_READ_TIMEOUT
+                )
+                await self._route(method, path, body, writer)
+            except HTTPError as e:
+                await self._send(writer, e.status, {"error": e.message}, e.headers)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                pass
+            except Exception as e:
+                print(f"❌ Request failed: {e}")
+                await self._send(writer, 500, {"error": str(e)})
+        except ConnectionError:
+            pass  # Client went away while we were answering
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        if path == "/health":
+            await self._send(writer, 200, self.health())
+            return
+        if path == "/metrics":
+            await self._send(writer, 200, registry.render())
+            return
+        if path not in ("/process", "/swarm"):
+            raise HTTPError(404, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(405, "Use POST.", {"Allow": "POST"})
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Body must be JSON.")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object.")
+
+        await self._admit()
+        self.requests += 1
+        try:
+            if path == "/swarm":
+                task = self._required(payload, "task")
+                start = time.perf_counter()
+                result = await self.swarms.execute(task)
+                await self._send(writer, 200, {"result": result, "seconds": round(time.perf_counter() - start, 3)})
+            elif payload.get("stream"):
+                await self._stream_process(self._required(payload, "message"), self._session(payload), writer)
+            else:
+                message = self._required(payload, "message")
+                start = time.perf_counter()
+                reply = await self._process(message, self._session(payload))
+                await self._send(writer, 200, {"reply": reply, "seconds": round(time.perf_counter() - start, 3)})
+        finally:
+            self._leave()
+
+    @staticmethod
+    def _required(payload: Dict[str, Any], field: str) -> str:
+        value = payload.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPError(400, f"Field '{field}' (non-empty string) is required.")
+        return value
+
+    @staticmethod
+    def _session(payload: Dict[str, Any]) -> Optional[str]:
+        session_id = payload.get("session_id")
+        if session_id is None:
+            return None
+        if not isinstance(session_id, str) or not session_id:
+            raise HTTPError(400, "Field 'session_id' must be a non-empty string.")
+        return session_id
+
+    async def _process(self, message: str, session_id: Optional[str]) -> str:
+        index = self.agents.acquire()
+        try:
+            return await self.agents.agents[index].process_async(message, session_id=session_id)
+        finally:
+            self.agents.release(index)
+
+    async def _stream_process(self, message: str, session_id: Optional[str], writer: asyncio.StreamWriter) -> None:
+        index = self.agents.acquire()
+        stream = self.agents.agents[index].process_stream_async(message, session_id=session_id)
+        try:
+            writer.write(self._head(200, "text/plain; charset=utf-8"))
+            try:
+                async for chunk in stream:
+                    data = chunk.encode("utf-8")
+                    if data:
+                        writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+                        await writer.drain()
+            except ConnectionError:
+                raise
+            except Exception as e:
+                # The 200 head is already out, so no error response can follow: drop the
+                # connection without the last chunk so the client sees an incomplete reply
+                print(f"❌ Stream failed: {e}")
+                writer.transport.abort()
+                return
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            await stream.aclose()
+            self.agents.release(index)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the Emerson agent over HTTP with a warm agent pool.")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--agents", type=int, default=None, help="Warm GeminiAgent instances")
+    parser.add_argument("--swarms", type=int, default=None, help="Warm swarms (0 disables /swarm)")
+    args = parser.parse_args(argv)
+
+    # Built outside the event loop: the MCP manager runs its own loop during startup
+    agents = AgentPool.create(settings.SERVER_AGENT_POOL_SIZE if args.agents is None else args.agents)
+    swarms = SwarmPool.create(settings.SERVER_SWARM_POOL_SIZE if args.swarms is None else args.swarms)
+    server = AgentServer(agents, swarms, host=args.host, port=args.port)
+    try:
+        asyncio.run(server.serve())
+    finally:
+        agents.shutdown()
+        print("✅ Agent server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Session-scoped conversation memory.
+
+One agent process serves many conversations; each session gets its own
+MemoryManager backed by its own file under SESSION_DIR. Hot sessions stay in
+an LRU in RAM, cold ones are loaded lazily on their next message, and sessions
+idle for longer than SESSION_IDLE_TIMEOUT are flushed and dropped from RAM.
+
+Requests for different sessions never wait on each other: the store lock only
+guards the LRU bookkeeping, each session is loaded under its own lock and
+every MemoryManager has its own history lock.
+
+Example usage:
+    sessions = SessionStore()
+    memory = sessions.get("klant-42")
+    memory.add_entry("user", "Hallo")
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import settings
+from src.memory import MemoryManager
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+
+def session_filename(session_id: str) -> str:
+    """File name for a session; ids that are not filesystem-safe are hashed."""
+    if _SAFE_ID.match(session_id) and session_id not in (".", ".."):
+        return f"{session_id}.json"
+    return f"session-{hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]}.json"
+
+
+class _Slot:
+    """A session being loaded or held in RAM."""
+
+    __slots__ = ("lock", "memory", "last_used")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.memory: Optional[MemoryManager] = None
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """LRU of per-session MemoryManagers with lazy loading and idle eviction."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_sessions: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        factory: Optional[Callable[[str], MemoryManager]] = None,
+    ):
+        """
+        Args:
+            directory: Where session files live. Defaults to settings.SESSION_DIR.
+            max_sessions: Hot sessions kept in RAM. Defaults to settings.SESSION_MAX_HOT.
+            idle_timeout: Seconds before an unused session is evicted (0 = never).
+                          Defaults to settings.SESSION_IDLE_TIMEOUT.
+            factory: Builds the MemoryManager for a session file path.
+        """
+        self.directory = directory or settings.SESSION_DIR
+        self.max_sessions = max(1, max_sessions or settings.SESSION_MAX_HOT)
+        self.idle_timeout = settings.SESSION_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.factory = factory or (lambda path: MemoryManager(memory_file=path))
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        # Evicted sessions that a running request still holds are reused, never loaded twice
+        self._live: "weakref.WeakValueDictionary[str, MemoryManager]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.loads = 0
+        self.evictions = 0
+
+    def path_for(self, session_id: str) -> str:
+        return os.path.join(self.directory, session_filename(session_id))
+
+    def get(self, session_id: str) -> MemoryManager:
+        """Return the session's MemoryManager, loading it from disk on first use."""
+        if not session_id:
+            raise ValueError("session_id is required.")
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                slot = self._slots[session_id] = _Slot()
+                slot.memory = self._live.get(session_id)
+            self._slots.move_to_end(session_id)
+            slot.last_used = now
+            evicted = self._evict_locked(now)
+        self._flush(evicted)
+
+        if slot.memory is None:
+            # Only requests for this session wait for the load
+            with slot.lock:
+                if slot.memory is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    memory = self.factory(self.path_for(session_id))
+                    with self._lock:
+                        # A concurrent request may have loaded the same session through another slot
+                        slot.memory = self._live.setdefault(session_id, memory)
+                        if slot.memory is memory:
+                            self.loads += 1
+        return slot.memory
+
+    def _evict_locked(self, now: float) -> List[_Slot]:
+        """Drop least recently used sessions beyond capacity and (periodically) idle ones."""
+        evicted: List[_Slot] = []
+        while len(self._slots) > self.max_sessions:
+            evicted.append(self._slots.popitem(last=False)[1])
+        if self.idle_timeout and now - self._last_sweep >= min(self.idle_timeout, 60.0):
+            self._last_sweep = now
+            # Slots are ordered by last use, so stop at the first one that is still active
+            while self._slots:
+                slot = next(iter(self._slots.values()))
+                if now - slot.last_used < self.idle_timeout:
+                    break
+                evicted.append(self._slots.popitem(last=False)[1])
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _flush(evicted: List[_Slot]) -> None:
+        """Write out what evicted sessions still have queued, so a reload sees every message."""
+        for slot in evicted:
+            if slot.memory is not None:
+                slot.memory.save_memory()
+
+    def evict_idle(self) -> int:
+        """Evict every session idle for longer than idle_timeout; returns how many were dropped."""
+        if not self.idle_timeout:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            idle = [sid for sid, slot in self._slots.items() if now - slot.last_used >= self.idle_timeout]
+            evicted = [self._slots.pop(sid) for sid in idle]
+            self.evictions += len(evicted)
+            self._last_sweep = now
+        self._flush(evicted)
+        return len(evicted)
+
+    def close(self) -> None:
+        """Flush and release every session in RAM."""
+        with self._lock:
+            slots = list(self._slots.values())
+            self._slots.clear()
+        for slot in slots:
+            if slot.memory is not None:
+                slot.memory.close()
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._slots
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hot": len(self), "loads": self.loads, "evictions": self.evictions}
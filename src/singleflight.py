@@ -0,0 +1,140 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When several sessions or swarm workers ask for the same thing at the same
+moment (`daily_check` at 9:00, the same `list_projects` query), only the first
+call executes; concurrent callers with the same key wait for it and share its
+result (or exception). Unlike the result caches, nothing is kept after the
+call finished.
+
+Works across threads and event loops: in-flight calls are tracked with
+`concurrent.futures.Future`, which sync callers wait on directly and async
+callers await through `asyncio.wrap_future`.
+
+Example usage:
+    flights = SingleFlight()
+    projects = flights.do(make_key("list_projects", status="Active"), fetch, "Active")
+    result = await flights.do_async(key, lambda: run_tool(args))
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from src.config import settings
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Serialize arguments canonically for use in flight and cache keys.
+
+    Strings are stripped, None-valued dict entries dropped and keys sorted, so
+    `{"name": " Aura", "limit": None}` and `{"name": "Aura"}` serialize the same.
+    """
+    return json.dumps(_canonical(value), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def make_key(name: str, *args: Any, **kwargs: Any) -> str:
+    """
+    Build a key from a function name and canonicalized arguments.
+
+    `f(" Aura", x=None)` and `f("Aura")` share a flight.
+    """
+    return f"{name}:{canonical_json([list(args), kwargs])}"
+
+
+class SingleFlight:
+    """Tracks in-flight calls per key and lets duplicates share the result."""
+
+    def __init__(self):
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, is_leader) for the key."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `fn(*args, **kwargs)` unless an identical call is in flight; then wait for that one.
+
+        Args:
+            key: Flight key (see make_key).
+            fn: Callable to execute as the leader.
+
+        Returns:
+            The (shared) result; the leader's exception is raised in every caller.
+        """
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key, future)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of do: `fn` is a zero-argument coroutine function.
+
+        Shares flights with sync callers using the same key.
+        """
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await fn()
+        future, leader = self._join(key)
+        if not leader:
+            # shield: a cancelled follower must not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key, future)
+        future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        return {"executions": self.executions, "shared": self.shared, "in_flight": self.in_flight()}
+
+
+# Process-wide group shared by tool dispatch and the Notion client
+flights = SingleFlight()
@@ -0,0 +1,145 @@
+"""
+Incremental detection of tool-call JSON in a streamed model response.
+
+The agent asks the model to answer either in plain text or with a JSON action
+object (or a list of them). When streaming, plain text should reach the user
+as soon as it arrives, while JSON actions should be dispatched the moment a
+complete object has streamed instead of after the whole generation.
+
+ActionStreamDetector decides the mode from the first non-whitespace
+characters and then scans the JSON incrementally (string/escape aware brace
+matching), returning every top-level object as soon as it closes.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+
+@dataclass
+class StreamTimings:
+    """Latency markers of a streamed turn, in seconds since `started`."""
+
+    started: float = 0.0
+    first_token_s: Optional[float] = None
+    first_tool_start_s: Optional[float] = None
+    total_s: Optional[float] = None
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+
+    def mark_first_token(self) -> None:
+        if self.first_token_s is None:
+            self.first_token_s = time.perf_counter() - self.started
+
+    def mark_tool_start(self) -> None:
+        if self.first_tool_start_s is None:
+            self.first_tool_start_s = time.perf_counter() - self.started
+
+    def finish(self) -> None:
+        self.total_s = time.perf_counter() - self.started
+
+
+class ActionStreamDetector:
+    """
+    Splits a streamed response into user-visible text and completed JSON payloads.
+
+    Example usage:
+        detector = ActionStreamDetector()
+        for chunk in stream:
+            text, payloads = detector.feed(chunk)
+            ...
+        text, payloads = detector.finish()
+    """
+
+    def __init__(self):
+        self.mode = "unknown"  # unknown, text, json
+        self.raw = ""
+        self.payloads_found = 0
+        self._pos = 0  # Next character of `raw` to scan in json mode
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> Tuple[str, List[Any]]:
+        """
+        Consume the next chunk of the response.
+
+        Args:
+            chunk: Newly streamed text.
+
+        Returns:
+            Tuple of (text to show the user, JSON payloads completed in this chunk).
+        """
+        self.raw += chunk
+        if self.mode == "text":
+            return chunk, []
+        if self.mode == "unknown":
+            self._decide_mode()
+            if self.mode == "text":
+                return self.raw, []
+            if self.mode == "unknown":
+                return "", []
+        return "", self._scan()
+
+    def finish(self) -> Tuple[str, List[Any]]:
+        """
+        Flush the detector at the end of the stream.
+
+        Returns:
+            Tuple of (remaining text to show, remaining payloads). A response that
+            looked like JSON but contained no valid action object is returned as text.
+        """
+        if self.mode == "unknown":
+            self.mode = "text"
+            return self.raw, []
+        if self.mode == "json" and self.payloads_found == 0:
+            self.mode = "text"
+            return self.raw, []
+        return "", []
+
+    def _decide_mode(self) -> None:
+        stripped = self.raw.lstrip()
+        if not stripped:
+            return
+        if stripped[0] in "{[":
+            self.mode = "json"
+        elif stripped.startswith("```"):
+            self.mode = "json"
+        elif "```".startswith(stripped):
+            return  # Could still become a code fence
+        else:
+            self.mode = "text"
+
+    def _scan(self) -> List[Any]:
+        payloads: List[Any] = []
+        raw = self.raw
+        while self._pos < len(raw):
+            ch = raw[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._depth > 0:
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    candidate = raw[self._object_start:self._pos + 1]
+                    self._object_start = None
+                    try:
+                        payloads.append(json.loads(candidate))
+                        self.payloads_found += 1
+                    except json.JSONDecodeError:
+                        pass
+            self._pos += 1
+        return payloads
@@ -11,6 +11,8 @@ from src.agents.router_agent import RouterAgent
 from src.agents.coder_agent import CoderAgent
 from src.agents.reviewer_agent import ReviewerAgent
 from src.agents.researcher_agent import ResearcherAgent
+from src.tracing import span, traced
+from src.metrics import SWARM_DELEGATIONS, SWARM_LATENCY
 
 
 class MessageBus:
@@ -96,7 +98,13 @@ class SwarmOrchestrator:
         
         print(f"✅ Swarm initialized with {len(self.workers)} specialist agents!\n")
     
+    @traced("swarm.execute")
     def execute(self, user_task: str, verbose: bool = True) -> str:
+        """Execute a user task using the swarm (see _execute); records the task latency."""
+        with SWARM_LATENCY.time():
+            return self._execute(user_task, verbose)
+
+    def _execute(self, user_task: str, verbose: bool = True) -> str:
         """
         Execute a user task using the swarm.
         
@@ -115,7 +123,9 @@ class SwarmOrchestrator:
         if verbose:
             print("\n🧭 [Router] Analyzing task and creating delegation plan...")
         
-        delegations = self.router.analyze_and_delegate(user_task)
+        with span("swarm.route") as trace:
+            delegations = self.router.analyze_and_delegate(user_task)
+            trace.set(delegations=len(delegations))
         
         if verbose:
             print(f"   📋 Delegation plan created with {len(delegations)} step(s):")
@@ -150,7 +160,9 @@ class SwarmOrchestrator:
             if verbose:
                 print(f"\n🔧 [{agent_name.capitalize()}] Executing task...")
             
-            result = worker.execute(agent_task, context)
+            SWARM_DELEGATIONS.inc(agent=agent_name)
+            with span("swarm.delegate", agent=agent_name, step=i):
+                result = worker.execute(agent_task, context)
             results.append(result)
             
             # Record result in message bus
@@ -165,7 +177,8 @@ class SwarmOrchestrator:
             print(f"\n{'=' * 70}")
             print("\n🧭 [Router] Synthesizing final results...")
         
-        final_result = self.router.synthesize_results(delegations, results)
+        with span("swarm.synthesize", results=len(results)):
+            final_result = self.router.synthesize_results(delegations, results)
         
         if verbose:
             print("\n" + "=" * 70)
@@ -0,0 +1,232 @@
+"""
+TTL result cache for idempotent tools.
+
+Tools declare themselves cacheable with the `@cacheable` decorator and
+mutating tools declare the cache tags they invalidate with `@invalidates`:
+
+    @cacheable(ttl=60, tags=("notion:projects",))
+    def get_project_status(project_name: str) -> str: ...
+
+    @invalidates("notion:tasks")
+    def create_task(project_name: str, title: str) -> str: ...
+
+MCP tools are cached based on their `readOnlyHint` / `idempotentHint`
+annotations; MCP tools that are not read-only invalidate the cached results of
+their server. Results are keyed on the tool name and the normalized arguments
+and evicted LRU beyond `TOOL_CACHE_MAX_ENTRIES`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from src.config import settings
+from src.metrics import record_cache
+from src.singleflight import canonical_json
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Caching behaviour declared by a tool."""
+
+    ttl: float = 0.0
+    tags: Tuple[str, ...] = ()
+    invalidates: Tuple[str, ...] = ()
+
+    @property
+    def cacheable(self) -> bool:
+        return self.ttl > 0
+
+
+def _merge_policy(fn: Callable[..., Any], **changes: Any) -> CachePolicy:
+    current: CachePolicy = getattr(fn, "__tool_cache__", None) or CachePolicy()
+    values = {"ttl": current.ttl, "tags": current.tags, "invalidates": current.invalidates}
+    values.update(changes)
+    return CachePolicy(**values)
+
+
+def cacheable(ttl: float = 60.0, tags: Iterable[str] = ()) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Mark a tool as idempotent so its results may be cached.
+
+    Args:
+        ttl: Seconds a result stays valid.
+        tags: Cache tags; entries are dropped when a tool invalidating one of them runs.
+
+    Returns:
+        Decorator that returns the function unchanged apart from the policy attribute.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        fn.__tool_cache__ = _merge_policy(fn, ttl=float(ttl), tags=tuple(tags))
+        return fn
+    return decorator
+
+
+def invalidates(*tags: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Mark a tool as mutating: running it drops cached results with these tags.
+
+    Args:
+        tags: Cache tags to invalidate after the tool ran.
+
+    Returns:
+        Decorator that returns the function unchanged apart from the policy attribute.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        fn.__tool_cache__ = _merge_policy(fn, invalidates=tuple(tags))
+        return fn
+    return decorator
+
+
+def policy_for(fn: Callable[..., Any]) -> Optional[CachePolicy]:
+    """
+    Resolve the cache policy of a registered tool.
+
+    Args:
+        fn: Tool callable (plain function, LazyTool or MCP wrapper).
+
+    Returns:
+        The CachePolicy, or None when the tool declares nothing.
+    """
+    policy = getattr(fn, "__tool_cache__", None)
+    if policy is not None:
+        return policy
+
+    mcp_tool = getattr(fn, "mcp_tool", None)
+    if mcp_tool is None:
+        return None
+    annotations = getattr(mcp_tool, "annotations", None) or {}
+    server_tag = f"mcp:{mcp_tool.server_name}"
+    read_only = bool(annotations.get("readOnlyHint"))
+    idempotent = bool(annotations.get("idempotentHint"))
+    return CachePolicy(
+        ttl=float(settings.TOOL_CACHE_MCP_TTL) if (read_only or idempotent) else 0.0,
+        tags=(server_tag,),
+        invalidates=() if read_only else (server_tag,),
+    )
+
+
+def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+    """
+    Build a cache key from the tool name and normalized arguments.
+
+    Strings are stripped, None-valued arguments are dropped (they equal the
+    default for all current tools) and keys are sorted.
+
+    Args:
+        tool_name: Registered tool name.
+        args: Call arguments.
+
+    Returns:
+        Canonical key string.
+    """
+    return f"{tool_name}:{canonical_json(args or {})}"
+
+
+class ToolResultCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and tag-based invalidation.
+
+    Example usage:
+        cache = ToolResultCache()
+        hit, value = cache.get(key)
+        if not hit:
+            value = tool(**args)
+            cache.put(key, value, ttl=60, tags=("notion:projects",))
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries: LRU capacity. Defaults to settings.TOOL_CACHE_MAX_ENTRIES.
+        """
+        self.max_entries = settings.TOOL_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Tuple of (hit, value).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                record_cache("tool", False)
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache("tool", True)
+            return True, entry[1]
+
+    def put(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        """Store a result for `ttl` seconds."""
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """
+        Drop all entries carrying one of the tags.
+
+        Returns:
+            Number of dropped entries.
+        """
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    self._drop(key)
+                    dropped += 1
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
@@ -0,0 +1,196 @@
+"""
+Relevance-ranked tool selection for large tool registries.
+
+Rendering every tool docstring into every prompt does not scale once MCP
+servers add hundreds of tools (each MCP wrapper docstring contains a
+pretty-printed JSON schema). The ToolIndex keeps a compact entry per tool
+(name, one-line signature, summary, keywords), ranks the entries against the
+user message with BM25 and renders only the top-k plus the pinned core tools.
+"""
+
+import inspect
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import settings
+from src.retrieval import BM25Index, tokenize
+
+
+@dataclass
+class ToolEntry:
+    """Compact description of a single tool."""
+
+    name: str
+    signature: str
+    summary: str
+    keywords: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        """Render the entry as a single prompt line."""
+        return f"- {self.name}{self.signature}: {self.summary}"
+
+
+def _format_annotation(annotation: Any) -> str:
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation).replace("typing.", "")
+
+
+def compact_signature(fn: Callable[..., Any]) -> str:
+    """
+    Build a one-line parameter signature for a tool.
+
+    MCP tools are described from their JSON input schema, lazily loaded tools
+    from their manifest entry and regular tools from their Python signature.
+    Optional MCP parameters are marked with `?`.
+
+    Args:
+        fn: The tool callable.
+
+    Returns:
+        Signature string such as "(project_name: str, due_date: Optional[str] = None)".
+    """
+    mcp_tool = getattr(fn, "mcp_tool", None)
+    if mcp_tool is not None:
+        schema = mcp_tool.input_schema or {}
+        required = set(schema.get("required", []))
+        params = []
+        for name, prop in (schema.get("properties") or {}).items():
+            marker = "" if name in required else "?"
+            params.append(f"{name}{marker}: {prop.get('type', 'any')}")
+        return f"({', '.join(params)})"
+
+    # Lazily loaded tools carry their signature from the manifest
+    signature_text = getattr(fn, "signature_text", None)
+    if signature_text is not None:
+        return signature_text
+
+    try:
+        signature = inspect.signature(fn)
+    except (TypeError, ValueError):
+        return "(...)"
+
+    params = []
+    for param in signature.parameters.values():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            prefix = "*" if param.kind == param.VAR_POSITIONAL else "**"
+            params.append(f"{prefix}{param.name}")
+            continue
+        text = param.name
+        if param.annotation is not param.empty:
+            text += f": {_format_annotation(param.annotation)}"
+        if param.default is not param.empty:
+            text += f" = {param.default!r}"
+        params.append(text)
+    return f"({', '.join(params)})"
+
+
+def _summary(fn: Callable[..., Any]) -> Tuple[str, str]:
+    """Return (first line, first paragraph) of a tool's description."""
+    mcp_tool = getattr(fn, "mcp_tool", None)
+    doc = mcp_tool.description if mcp_tool is not None else (fn.__doc__ or "")
+    doc = inspect.cleandoc(doc) if doc else ""
+    paragraph = doc.split("\n\n", 1)[0].strip()
+    first_line = paragraph.splitlines()[0].strip() if paragraph else "No description provided."
+    return first_line, paragraph
+
+
+def build_entry(name: str, fn: Callable[..., Any]) -> ToolEntry:
+    """
+    Build the index entry for a tool.
+
+    Args:
+        name: Registered tool name.
+        fn: The tool callable.
+
+    Returns:
+        ToolEntry with a compact signature and keywords.
+    """
+    signature = compact_signature(fn)
+    summary, paragraph = _summary(fn)
+    name_tokens = tokenize(name.replace("_", " "))
+    # Name tokens are counted twice so they outweigh incidental docstring words
+    keywords = name_tokens * 2 + tokenize(signature) + tokenize(paragraph)
+    return ToolEntry(name=name, signature=signature, summary=summary, keywords=keywords)
+
+
+class ToolIndex:
+    """
+    Ranks registered tools against a message and renders only the relevant subset.
+
+    The index is rebuilt only when the tool registry changes.
+
+    Example usage:
+        index = ToolIndex()
+        index.build(agent.available_tools)
+        prompt_tools = index.render("status van project Aura")
+    """
+
+    def __init__(self, top_k: Optional[int] = None, pinned: Optional[List[str]] = None):
+        """
+        Initialize the tool index.
+
+        Args:
+            top_k: Max number of non-pinned tools to render. Defaults to settings.TOOL_TOP_K.
+            pinned: Tools that are always rendered. Defaults to settings.TOOL_PINNED.
+        """
+        self.top_k = settings.TOOL_TOP_K if top_k is None else top_k
+        self.pinned = list(settings.TOOL_PINNED if pinned is None else pinned)
+
+        self._fingerprint: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._entries: List[ToolEntry] = []
+        self._index = BM25Index([])
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def build(self, tools: Dict[str, Callable[..., Any]]) -> None:
+        """
+        Rebuild the index if the registry changed since the last build.
+
+        Tools whose module failed to import (`load_error`) are left out.
+
+        Args:
+            tools: Mapping of tool name to callable.
+        """
+        usable = {name: fn for name, fn in tools.items() if not getattr(fn, "load_error", "")}
+        fingerprint = tuple((name, id(fn)) for name, fn in usable.items())
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            self._entries = [build_entry(name, fn) for name, fn in usable.items()]
+            self._index = BM25Index([entry.keywords for entry in self._entries])
+            self._fingerprint = fingerprint
+            self.rebuilds += 1
+
+    def select(self, query: str) -> List[ToolEntry]:
+        """
+        Pick the pinned tools plus the top-k tools relevant to the query.
+
+        Args:
+            query: The user message.
+
+        Returns:
+            Selected entries in registry order.
+        """
+        with self._lock:
+            entries = self._entries
+            if len(entries) <= self.top_k + len(self.pinned):
+                return list(entries)
+
+            chosen = {i for i, entry in enumerate(entries) if entry.name in self.pinned}
+            for doc_id, _score in self._index.search(tokenize(query), top_k=self.top_k):
+                chosen.add(doc_id)
+            return [entries[i] for i in sorted(chosen)]
+
+    def render(self, query: str) -> str:
+        """
+        Render the selected tools, one compact line each.
+
+        Args:
+            query: The user message.
+
+        Returns:
+            Tool list for the system prompt.
+        """
+        return "\n".join(entry.render() for entry in self.select(query))
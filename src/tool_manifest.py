@@ -0,0 +1,322 @@
+"""
+Lazy, manifest-based tool discovery.
+
+Executing every module in `src/tools/` at agent startup is slow and has side
+effects (`notion_tools.py` builds a Notion client at import time). Instead,
+tool modules are scanned with `ast` for public top-level functions and the
+result (name, signature, docstring) is cached in a JSON manifest keyed on each
+file's SHA-256. The registry is built from the manifest and a module is only
+imported when one of its tools is called for the first time.
+"""
+
+import ast
+import builtins
+import hashlib
+import importlib
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.config import settings
+from src.tool_cache import CachePolicy
+
+# Bump when the manifest layout or scanner output changes
+MANIFEST_VERSION = 3
+
+
+@dataclass
+class ToolSpec:
+    """Static description of a tool function found by the AST scanner."""
+
+    module: str
+    name: str
+    signature: str
+    doc: str
+    is_async: bool = False
+    # Declared through @cacheable / @invalidates (see src.tool_cache)
+    cache_ttl: float = 0.0
+    cache_tags: List[str] = field(default_factory=list)
+    invalidates: List[str] = field(default_factory=list)
+    # Set when the module cannot be imported; such tools are not registered
+    load_error: str = ""
+
+    def cache_policy(self) -> Optional[CachePolicy]:
+        if not (self.cache_ttl or self.invalidates):
+            return None
+        return CachePolicy(
+            ttl=self.cache_ttl, tags=tuple(self.cache_tags), invalidates=tuple(self.invalidates)
+        )
+
+
+def _format_args(args: ast.arguments) -> str:
+    """Render function arguments like compact_signature does for live functions."""
+    parts: List[str] = []
+    positional = list(args.posonlyargs) + list(args.args)
+    defaults: List[Optional[ast.expr]] = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+
+    def render(arg: ast.arg, default: Optional[ast.expr]) -> str:
+        text = arg.arg
+        if arg.annotation is not None:
+            text += f": {ast.unparse(arg.annotation)}"
+        if default is not None:
+            text += f" = {ast.unparse(default)}"
+        return text
+
+    for arg, default in zip(positional, defaults):
+        parts.append(render(arg, default))
+    if args.vararg is not None:
+        parts.append(f"*{args.vararg.arg}")
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        parts.append(render(arg, default))
+    if args.kwarg is not None:
+        parts.append(f"**{args.kwarg.arg}")
+    return f"({', '.join(parts)})"
+
+
+def _decorator_name(node: ast.expr) -> Optional[str]:
+    func = node.func if isinstance(node, ast.Call) else node
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def _apply_cache_decorators(spec: ToolSpec, decorators: List[ast.expr]) -> None:
+    """Read literal @cacheable(...) / @invalidates(...) arguments into the spec."""
+    for node in decorators:
+        name = _decorator_name(node)
+        if name not in ("cacheable", "invalidates") or not isinstance(node, ast.Call):
+            continue
+        try:
+            args = [ast.literal_eval(arg) for arg in node.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg}
+        except ValueError:
+            print(f"⚠️ Non-literal @{name} arguments on {spec.module}.{spec.name} are ignored")
+            continue
+        if name == "cacheable":
+            spec.cache_ttl = float(kwargs.get("ttl", args[0] if args else 60.0))
+            spec.cache_tags = list(kwargs.get("tags", args[1] if len(args) > 1 else ()))
+        else:
+            spec.invalidates = [str(tag) for tag in args]
+
+
+def _bound_names(tree: ast.Module) -> Optional[Set[str]]:
+    """Names bound at module level, or None if a star import makes that unknowable."""
+    names: Set[str] = set()
+    pending: List[ast.AST] = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                names.add(alias.asname or alias.name.split(".")[0])
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            continue  # Their bodies run later (or bind class attributes)
+        if isinstance(node, ast.Lambda):
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _definition_time_error(tree: ast.Module) -> str:
+    """
+    Detect a NameError the module raises while defining its tool functions.
+
+    Decorators, default values and annotations of top-level functions are
+    evaluated on import; a name used there that the module never binds makes
+    the whole module unimportable.
+    """
+    lazy_annotations = any(
+        isinstance(node, ast.ImportFrom) and node.module == "__future__"
+        and any(alias.name == "annotations" for alias in node.names)
+        for node in tree.body
+    )
+    bound = _bound_names(tree)
+    if bound is None:
+        return ""
+    bound |= set(dir(builtins))
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        args = node.args
+        evaluated: List[Optional[ast.expr]] = list(node.decorator_list) + list(args.defaults) + list(args.kw_defaults)
+        if not lazy_annotations:
+            every_arg = args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]
+            evaluated += [arg.annotation for arg in every_arg if arg is not None] + [node.returns]
+        for expr in evaluated:
+            if expr is None:
+                continue
+            for name in ast.walk(expr):
+                if isinstance(name, ast.Name) and name.id not in bound:
+                    return f"name '{name.id}' is not defined"
+    return ""
+
+
+def scan_module(source: str, module: str) -> List[ToolSpec]:
+    """
+    Find the public top-level functions of a tool module without importing it.
+
+    Args:
+        source: Python source of the module.
+        module: Module name (file stem).
+
+    Returns:
+        List of ToolSpec, in source order.
+    """
+    tree = ast.parse(source)
+    load_error = _definition_time_error(tree)
+    specs = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if node.name.startswith("_"):
+            continue
+        spec = ToolSpec(
+            module=module,
+            name=node.name,
+            signature=_format_args(node.args),
+            doc=ast.get_docstring(node) or "",
+            is_async=isinstance(node, ast.AsyncFunctionDef),
+            load_error=load_error,
+        )
+        _apply_cache_decorators(spec, node.decorator_list)
+        specs.append(spec)
+    return specs
+
+
+class ToolManifest:
+    """
+    Builds and caches the tool manifest for a tools directory.
+
+    Example usage:
+        manifest = ToolManifest(Path("src/tools"))
+        specs = manifest.load()
+    """
+
+    def __init__(self, tools_dir: Path, cache_path: Optional[str] = None):
+        """
+        Args:
+            tools_dir: Directory containing the tool modules.
+            cache_path: Manifest cache file. Defaults to settings.TOOL_MANIFEST_PATH.
+        """
+        self.tools_dir = tools_dir
+        self.cache_path = Path(cache_path or settings.TOOL_MANIFEST_PATH)
+        self.scanned_files = 0
+
+    def _read_cache(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _write_cache(self, files: Dict[str, Any]) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"version": MANIFEST_VERSION, "files": files}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not write tool manifest cache: {e}")
+
+    def load(self) -> List[ToolSpec]:
+        """
+        Return the tool specs, rescanning only files whose hash changed.
+
+        Returns:
+            List of ToolSpec for all public tool functions.
+        """
+        cached = self._read_cache()
+        files: Dict[str, Any] = {}
+        specs: List[ToolSpec] = []
+
+        for tool_file in sorted(self.tools_dir.glob("*.py")):
+            if tool_file.name.startswith("_"):
+                continue
+            try:
+                source = tool_file.read_bytes()
+            except OSError as e:
+                print(f"⚠️ Failed to read tools from {tool_file.name}: {e}")
+                continue
+
+            digest = hashlib.sha256(source).hexdigest()
+            entry = cached.get(tool_file.name)
+            if entry and entry.get("sha256") == digest:
+                file_specs = [ToolSpec(**spec) for spec in entry.get("tools", [])]
+            else:
+                try:
+                    file_specs = scan_module(source.decode("utf-8"), tool_file.stem)
+                except (SyntaxError, UnicodeDecodeError) as e:
+                    print(f"⚠️ Failed to load tools from {tool_file.name}: {e}")
+                    continue
+                self.scanned_files += 1
+
+            files[tool_file.name] = {"sha256": digest, "tools": [asdict(spec) for spec in file_specs]}
+            specs.extend(file_specs)
+
+        if files != cached:
+            self._write_cache(files)
+        return specs
+
+
+class LazyTool:
+    """
+    Registry entry that imports its module on first call.
+
+    Exposes `__name__`, `__doc__` and `signature_text` from the manifest so the
+    prompt and tool index can be built without importing anything.
+    """
+
+    def __init__(self, spec: ToolSpec, package: str = "src.tools"):
+        self.spec = spec
+        self.package = package
+        self.__name__ = spec.name
+        self.__qualname__ = spec.name
+        self.__module__ = f"{package}.{spec.module}"
+        self.__doc__ = spec.doc or None
+        self.signature_text = spec.signature
+        self.is_async = spec.is_async
+        self.__tool_cache__ = spec.cache_policy()
+        self.load_error = spec.load_error
+        self._fn: Optional[Callable[..., Any]] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Callable[..., Any]:
+        """Import the tool module (once) and return the real function."""
+        if self._fn is None:
+            with self._lock:
+                if self._fn is None:
+                    try:
+                        module = importlib.import_module(self.__module__)
+                        self._fn = getattr(module, self.spec.name)
+                    except Exception as e:
+                        # Dropped from the tool index from now on
+                        self.load_error = f"{type(e).__name__}: {e}"
+                        raise
+        return self._fn
+
+    @property
+    def loaded(self) -> bool:
+        return self._fn is not None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<LazyTool {self.__module__}.{self.spec.name}{' (loaded)' if self.loaded else ''}>"
@@ -2,6 +2,8 @@ import requests
 import ast
 import operator as _operator
 
+from src.tool_cache import cacheable
+
 
 def web_search(query: str) -> str:
     """Performs a web search for the given query.
@@ -114,6 +116,7 @@ def calculate_math(expression: str) -> float:
         raise ValueError(f"Invalid expression: {exc}")
 
 
+@cacheable(ttl=300, tags=("weather",))
 def get_weather(city: str) -> dict:
     """Return mock weather data for a given city.
 
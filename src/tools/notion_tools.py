@@ -3,11 +3,13 @@ from typing import Optional
 from src.notion_client import EmersonNotionClient
 from src.escalation import EscalationHandler, EscalationResult
 from src.models import Action
+from src.tool_cache import cacheable, invalidates
 
 # Initialize clients
 notion = EmersonNotionClient()
 escalation = EscalationHandler()
 
+@cacheable(ttl=60, tags=("notion:projects",))
 def get_project_status(project_name: str) -> str:
     """Haal status en details van een project op uit Notion.
     
@@ -26,6 +28,7 @@ def get_project_status(project_name: str) -> str:
         
     return f"Project: {project.name}\nStatus: {project.status}\nLink: {project.url}"
 
+@invalidates("notion:tasks")
 def create_task(project_name: str, title: str, due_date: Optional[str] = None) -> str:
     """Maak een nieuwe taak aan in Notion, gekoppeld aan een project.
     
@@ -51,6 +54,7 @@ def create_task(project_name: str, title: str, due_date: Optional[str] = None) -
     else:
         return "❌ Er is een fout opgetreden bij het aanmaken van de taak."
 
+@cacheable(ttl=60, tags=("notion:projects", "notion:tasks"))
 def daily_check() -> str:
     """Genereer een dagelijks overzicht van actieve projecten en taken.
     
@@ -68,6 +72,7 @@ def daily_check() -> str:
         
     return "\n".join(lines)
 
+@cacheable(ttl=60, tags=("notion:projects",))
 def search_projects(query: str) -> str:
     """Zoek naar projecten in Notion op basis van een zoekterm.
     
@@ -5,39 +5,43 @@ completion endpoint (including OpenAI, Azure OpenAI, or self-hosted
 providers like Ollama/Llama.cpp that expose the same API).
 """
 
-from typing import Optional, List, Dict, Any
+import math
+from typing import Optional, List, Dict, Any, Tuple
 import requests
 
 from src.config import settings
+from src.llm_cache import get_llm_cache
 
 
-def call_openai_chat(
+class ChatCompletionError(RuntimeError):
+    """Raised by _chat_completion when the endpoint is missing, unreachable or returns no content."""
+
+
+def _chat_completion(
     prompt: str,
     system: Optional[str] = None,
     model: Optional[str] = None,
     temperature: float = 0.7,
     max_tokens: int = 512,
-) -> str:
-    """Call an OpenAI-compatible chat completion API.
+    logprobs: bool = False,
+    timeout: float = 30,
+) -> Tuple[str, Optional[float]]:
+    """Call the chat completion endpoint and return (content, mean token probability).
 
-    Args:
-        prompt: User prompt to send to the LLM.
-        system: Optional system prompt to set behavior or constraints.
-        model: Optional model override; defaults to settings.OPENAI_MODEL.
-        temperature: Sampling temperature.
-        max_tokens: Maximum tokens to generate (as supported by the backend).
+    The probability is the exponent of the mean token logprob when `logprobs`
+    is requested and the backend returns them, otherwise None.
 
-    Returns:
-        The text content returned by the LLM, or an error message on failure.
+    Raises:
+        ChatCompletionError: On configuration, transport or response errors.
     """
     base_url = settings.OPENAI_BASE_URL.rstrip("/")
     api_key = settings.OPENAI_API_KEY
     target_model = model or settings.OPENAI_MODEL
 
     if not base_url:
-        return "Error: OPENAI_BASE_URL is not configured."
+        raise ChatCompletionError("OPENAI_BASE_URL is not configured.")
     if not target_model:
-        return "Error: OPENAI_MODEL is not configured."
+        raise ChatCompletionError("OPENAI_MODEL is not configured.")
 
     url = f"{base_url}/chat/completions"
     headers = {"Content-Type": "application/json"}
@@ -49,25 +53,77 @@ def call_openai_chat(
         messages.append({"role": "system", "content": system})
     messages.append({"role": "user", "content": prompt})
 
-    payload = {
+    payload: Dict[str, Any] = {
         "model": target_model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    if logprobs:
+        payload["logprobs"] = True
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
         response.raise_for_status()
         data = response.json()
-        choice = data.get("choices", [{}])[0]
-        message = choice.get("message", {})
-        content = message.get("content")
-        if content:
-            return content
-        return str(data)
     except requests.RequestException as exc:
-        return f"Error calling OpenAI-compatible API: {exc}"
-    except ValueError:
+        raise ChatCompletionError(f"OpenAI-compatible API request failed: {exc}") from exc
+    except ValueError as exc:
         # JSON decode failed
-        return f"Error: Could not parse JSON response: {response.text[:500]}"
+        raise ChatCompletionError(f"Could not parse JSON response: {response.text[:500]}") from exc
+
+    choice = (data.get("choices") or [{}])[0]
+    content = choice.get("message", {}).get("content")
+    if not content:
+        raise ChatCompletionError(f"No content in response: {str(data)[:500]}")
+
+    token_logprobs = [
+        token.get("logprob")
+        for token in ((choice.get("logprobs") or {}).get("content") or [])
+        if isinstance(token.get("logprob"), (int, float))
+    ]
+    confidence = math.exp(sum(token_logprobs) / len(token_logprobs)) if token_logprobs else None
+    return content, confidence
+
+
+def call_openai_chat(
+    prompt: str,
+    system: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 512,
+) -> str:
+    """Call an OpenAI-compatible chat completion API.
+
+    Args:
+        prompt: User prompt to send to the LLM.
+        system: Optional system prompt to set behavior or constraints.
+        model: Optional model override; defaults to settings.OPENAI_MODEL.
+        temperature: Sampling temperature.
+        max_tokens: Maximum tokens to generate (as supported by the backend).
+
+    Returns:
+        The text content returned by the LLM, or an error message on failure.
+    """
+    base_url = settings.OPENAI_BASE_URL.rstrip("/")
+    target_model = model or settings.OPENAI_MODEL
+
+    if not base_url:
+        return "Error: OPENAI_BASE_URL is not configured."
+    if not target_model:
+        return "Error: OPENAI_MODEL is not configured."
+
+    # Identical requests are served from the response cache (see src.llm_cache)
+    cache = get_llm_cache()
+    cache_prompt = f"{system or ''}\n\n{prompt}"
+    cache_params = {"base_url": base_url, "temperature": temperature, "max_tokens": max_tokens}
+    cached = cache.get(target_model, cache_prompt, cache_params)
+    if cached is not None:
+        return cached
+
+    try:
+        content, _confidence = _chat_completion(prompt, system, target_model, temperature, max_tokens)
+    except ChatCompletionError as exc:
+        return f"Error: {exc}"
+    cache.put(target_model, cache_prompt, content, cache_params)
+    return content
@@ -0,0 +1,386 @@
+"""
+In-process span tracing of agent phases.
+
+A `process` call is split into nested spans (context load, prompt build,
+Gemini call, tool execution, Notion log, formatting call), each with a
+duration and attributes such as the tool name, prompt size and status. The
+active span is tracked in a contextvar, so nesting follows asyncio tasks and
+(via `contextvars.copy_context`) work handed to thread pools.
+
+- `TRACE_ENABLED=False` (default): `span()` returns a shared no-op object, so
+  instrumented code pays one settings lookup per span.
+- `TRACE_SAMPLE_RATE`: the decision is taken once per trace (root span); all
+  spans of an unsampled trace are no-ops.
+- Finished spans are kept in a bounded buffer and appended per trace to
+  `TRACE_JSONL_PATH`; `export_chrome` writes the Chrome trace event format
+  (open it in chrome://tracing or https://ui.perfetto.dev).
+
+Example usage:
+    with span("agent.process", message_chars=len(message)) as root:
+        ...
+        root.set(path="fast")
+    tracer.export_chrome("trace.json")
+
+Convert a JSONL trace file:
+    python -m src.tracing .cache/traces.jsonl -o trace.json
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+from src.config import settings
+
+# Wall-clock offset for the monotonic span timestamps
+_EPOCH_NS = time.time_ns() - time.perf_counter_ns()
+# Context marker for "inside an unsampled trace"
+_UNSAMPLED = object()
+_current: ContextVar[Any] = ContextVar("trace_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@dataclass
+class Span:
+    """One timed phase; `end_ns` is 0 while the span is open."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    end_ns: int = 0
+    status: str = "ok"
+    thread_id: int = 0
+    thread_name: str = ""
+    _tracer: Optional["Tracer"] = field(default=None, repr=False, compare=False)
+
+    def set(self, **attributes: Any) -> "Span":
+        """Add or overwrite attributes."""
+        self.attributes.update(attributes)
+        return self
+
+    def end(self, status: Optional[str] = None) -> None:
+        """Finish a span started with `start_span` (context-managed spans end themselves)."""
+        if self.end_ns:
+            return
+        if status:
+            self.status = status
+        self.end_ns = time.perf_counter_ns()
+        if self._tracer is not None:
+            self._tracer._finish(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_us": (self.start_ns + _EPOCH_NS) // 1000,
+            "duration_us": (self.end_ns - self.start_ns) // 1000,
+            "status": self.status,
+            "thread_id": self.thread_id,
+            "thread_name": self.thread_name,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> "_NoopSpan":
+        return self
+
+    def end(self, status: Optional[str] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Scope:
+    """Context manager that makes a span (or the unsampled marker) current."""
+
+    __slots__ = ("_value", "_token")
+
+    def __init__(self, value: Any):
+        self._value = value
+        self._token = None
+
+    def __enter__(self) -> Any:
+        self._token = _current.set(self._value)
+        return self._value if isinstance(self._value, Span) else _NOOP
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Exited in another context (e.g. an async generator closed elsewhere)
+            pass
+        if isinstance(self._value, Span):
+            if exc_type is not None:
+                self._value.attributes.setdefault("error", f"{exc_type.__name__}: {exc}"[:200])
+                self._value.end("error")
+            else:
+                self._value.end()
+        return False
+
+
+class Tracer:
+    """Creates spans, buffers finished ones and exports them."""
+
+    def __init__(self, max_spans: Optional[int] = None):
+        """
+        Args:
+            max_spans: Finished spans kept in memory. Defaults to settings.TRACE_BUFFER_SIZE.
+        """
+        self._spans: Deque[Span] = deque(maxlen=max_spans or settings.TRACE_BUFFER_SIZE)
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self.traces = 0
+        self.dropped_traces = 0
+
+    # Span creation
+
+    def _open(self, name: str, attributes: Dict[str, Any]) -> Any:
+        """Return a new Span, _UNSAMPLED or None (tracing off)."""
+        if not settings.TRACE_ENABLED:
+            return None
+        parent = _current.get()
+        if parent is _UNSAMPLED:
+            return _UNSAMPLED
+        if parent is None:
+            if random.random() >= settings.TRACE_SAMPLE_RATE:
+                with self._lock:
+                    self.dropped_traces += 1
+                return _UNSAMPLED
+            trace_id, parent_id = uuid.uuid4().hex, None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        thread = threading.current_thread()
+        return Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=_new_id(),
+            parent_id=parent_id,
+            start_ns=time.perf_counter_ns(),
+            attributes=attributes,
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            _tracer=self,
+        )
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """
+        Context manager for a nested span; yields the Span (or a no-op stand-in).
+
+        Exceptions mark the span as `error` and propagate.
+        """
+        opened = self._open(name, attributes)
+        return _NOOP if opened is None else _Scope(opened)
+
+    def start_span(self, name: str, **attributes: Any) -> Any:
+        """
+        Start a span without making it current; call `.end()` on it.
+
+        For phases that cannot be wrapped in a `with` block, such as the
+        lifetime of an async generator.
+        """
+        opened = self._open(name, attributes)
+        return opened if isinstance(opened, Span) else _NOOP
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        current = _current.get()
+        return current if isinstance(current, Span) else None
+
+    # Buffering and export
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if span.parent_id is None:
+                self.traces += 1
+            if not settings.TRACE_JSONL_PATH:
+                return
+            self._pending.append(span)
+            # Written per finished trace (or in batches for long traces)
+            if span.parent_id is not None and len(self._pending) < 256:
+                return
+            pending, self._pending = self._pending, []
+        self._write_jsonl(pending)
+
+    def _write_jsonl(self, spans: List[Span]) -> None:
+        path = Path(settings.TRACE_JSONL_PATH)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as handle:
+                for span in spans:
+                    handle.write(json.dumps(span.to_dict(), default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write traces to {path}: {e}")
+
+    def flush(self) -> None:
+        """Write spans of unfinished traces that are still pending to the JSONL file."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending and settings.TRACE_JSONL_PATH:
+            self._write_jsonl(pending)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._pending = []
+
+    def export_jsonl(self, path: str) -> int:
+        """Write the buffered spans as JSON lines; returns the number of spans."""
+        spans = self.spans()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            for span in spans:
+                handle.write(json.dumps(span.to_dict(), default=str) + "\n")
+        return len(spans)
+
+    def export_chrome(self, path: str) -> int:
+        """Write the buffered spans in the Chrome trace event format; returns the number of spans."""
+        spans = [span.to_dict() for span in self.spans()]
+        write_chrome(spans, path)
+        return len(spans)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"traces": self.traces, "dropped_traces": self.dropped_traces, "buffered_spans": len(self._spans)}
+
+
+def chrome_events(spans: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert span dicts (see Span.to_dict) to Chrome trace events.
+
+    Every span becomes a complete event (`ph: "X"`); thread names are emitted
+    as metadata events so the viewer labels the rows.
+    """
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = []
+    threads: Dict[int, str] = {}
+    for span in spans:
+        tid = span.get("thread_id", 0)
+        threads.setdefault(tid, span.get("thread_name", ""))
+        args = dict(span.get("attributes") or {})
+        args.update(status=span.get("status"), trace_id=span.get("trace_id"))
+        events.append({
+            "name": span["name"],
+            "cat": span["name"].split(".", 1)[0],
+            "ph": "X",
+            "ts": span["start_us"],
+            "dur": span["duration_us"],
+            "pid": pid,
+            "tid": tid,
+            "args": args,
+        })
+    for tid, name in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    return events
+
+
+def write_chrome(spans: Iterable[Dict[str, Any]], path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"traceEvents": chrome_events(spans), "displayTimeUnit": "ms"}, handle, default=str)
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read span dicts from a JSONL trace file, skipping malformed lines."""
+    spans = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+# Process-wide tracer used by the instrumented modules
+tracer = Tracer()
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Open a span on the process-wide tracer (see Tracer.span)."""
+    return tracer.span(name, **attributes)
+
+
+def start_span(name: str, **attributes: Any) -> Any:
+    """Start an unscoped span on the process-wide tracer (see Tracer.start_span)."""
+    return tracer.start_span(name, **attributes)
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator that runs a (sync or async) function inside a span.
+
+    Args:
+        name: Span name. Defaults to the function's qualified name.
+        attributes: Static span attributes.
+    """
+
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.span(span_name, **attributes):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert a JSONL trace file to the Chrome trace event format.")
+    parser.add_argument("jsonl", nargs="?", default=None, help="Trace file (defaults to TRACE_JSONL_PATH)")
+    parser.add_argument("-o", "--out", default="trace.json", help="Chrome trace output path")
+    args = parser.parse_args(argv)
+    spans = load_jsonl(args.jsonl or settings.TRACE_JSONL_PATH)
+    write_chrome(spans, args.out)
+    print(f"✅ {len(spans)} spans → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
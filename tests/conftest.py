@@ -11,3 +11,37 @@ import sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolate_cache_files(tmp_path, monkeypatch):
+    """Keep on-disk caches written by the agent out of the working tree."""
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "TOOL_MANIFEST_PATH", str(tmp_path / "tool_manifest.json"))
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", str(tmp_path / "llm_responses.sqlite3"))
+    monkeypatch.setattr(settings, "NOTION_LOG_JOURNAL", str(tmp_path / "notion_log_journal.jsonl"))
+    monkeypatch.setattr(settings, "TRACE_JSONL_PATH", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(settings, "SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(settings, "MEMORY_FILE", str(tmp_path / "agent_memory.json"))
+    # Timing-sensitive tests must not depend on tokens spent by earlier tests
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_RPS", 0.0)
+    # Scripted fake clients expect every call to reach them; tests opt in explicitly
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+
+
+@pytest.fixture
+def live_agent():
+    """GeminiAgent with real memory in tmp_path (see above) and a mocked Notion client; shut down afterwards."""
+    from unittest.mock import MagicMock
+
+    from src.agent import GeminiAgent
+
+    agent = GeminiAgent()
+    agent.notion.flush_logs(0)  # Release the real client's share of the log sink
+    agent.notion = MagicMock()
+    yield agent
+    agent.shutdown()
@@ -1,3 +1,7 @@
+import asyncio
+import json
+import time
+
 import pytest
 from unittest.mock import MagicMock, patch
 from src.agent import GeminiAgent
@@ -37,3 +41,209 @@ def test_agent_tools_integration():
     from src.tools.example_tool import web_search
     result = web_search("test query")
     assert "Search results for: test query" in result
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeClient:
+    """genai-like client returning scripted replies, with an optional async delay."""
+
+    def __init__(self, replies=None, delay=0.0):
+        self.replies = list(replies or [])
+        self.delay = delay
+        self.prompts = []
+        client = self
+
+        class _Models:
+            def generate_content(self, model, contents):
+                client.prompts.append(contents)
+                return _FakeResponse(client._next())
+
+        class _AsyncModels:
+            async def generate_content(self, model, contents):
+                client.prompts.append(contents)
+                if client.delay:
+                    await asyncio.sleep(client.delay)
+                return _FakeResponse(client._next())
+
+        class _Aio:
+            models = _AsyncModels()
+
+        self.models = _Models()
+        self.aio = _Aio()
+
+    def _next(self):
+        return self.replies.pop(0) if self.replies else "Done"
+
+
+def test_process_returns_plain_reply(live_agent):
+    live_agent.client = _FakeClient(["Hallo!"])
+    assert live_agent.process("Hoi") == "Hallo!"
+    assert live_agent.memory.get_history()[0]["content"] == "Hoi"
+
+
+def test_process_executes_tool_and_formats(live_agent):
+    live_agent.client = _FakeClient(['{"action": "reverse_text", "args": {"text": "abc"}}', "Resultaat: cba"])
+
+    assert live_agent.process("Draai abc om") == "Resultaat: cba"
+    assert "output: cba" in live_agent.client.prompts[-1]
+    live_agent.notion.log_event.assert_called_once()
+
+
+def test_process_async_serves_sessions_concurrently(live_agent):
+    live_agent.client = _FakeClient(delay=0.2)
+
+    async def run_many():
+        return await asyncio.gather(*(live_agent.process_async(f"vraag {i}") for i in range(10)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_many())
+    elapsed = time.perf_counter() - start
+
+    assert results == ["Done"] * 10
+    assert elapsed < 1.0
+    assert len(live_agent.memory.get_history()) == 10
+
+
+def test_process_runs_independent_actions_in_parallel(live_agent):
+    calls = []
+
+    def slow_status(project_name: str) -> str:
+        """Slow project status lookup."""
+        time.sleep(0.2)
+        calls.append(project_name)
+        return f"{project_name}: Active"
+
+    live_agent.available_tools["slow_status"] = slow_status
+    actions = [{"action": "slow_status", "args": {"project_name": p}} for p in ("A", "B", "C")]
+    live_agent.client = _FakeClient([json.dumps(actions), "Alle drie actief"])
+
+    start = time.perf_counter()
+    result = live_agent.process("Status van project A, B en C?")
+    elapsed = time.perf_counter() - start
+
+    assert result == "Alle drie actief"
+    assert sorted(calls) == ["A", "B", "C"]
+    assert elapsed < 0.5
+    observation_prompt = live_agent.client.prompts[-1]
+    assert "A: Active" in observation_prompt and "C: Active" in observation_prompt
+    assert live_agent.notion.log_event.call_count == 3
+
+
+def test_process_stops_after_max_steps(live_agent, monkeypatch):
+    monkeypatch.setattr(live_agent.settings, "AGENT_MAX_STEPS", 2)
+    action = '{"action": "reverse_text", "args": {"text": "abc"}}'
+    live_agent.client = _FakeClient([action, action, "Klaar"])
+
+    assert live_agent.process("Blijf omdraaien") == "Klaar"
+    assert len(live_agent.client.prompts) == 3
+    assert "Format het resultaat" in live_agent.client.prompts[-1]
+
+
+def test_blocked_action_is_not_executed(live_agent):
+    live_agent.client = _FakeClient(['{"action": "reverse_text", "args": {"text": "x", "amount": 5000}}'])
+
+    result = live_agent.process("Dure actie")
+
+    assert "geblokkeerd" in result
+    live_agent.notion.log_event.assert_not_called()
+
+
+class _StreamingClient(_FakeClient):
+    """Fake client whose async stream yields scripted chunks with delays."""
+
+    def __init__(self, streams, chunk_delay=0.0):
+        super().__init__()
+        self.streams = list(streams)
+        self.chunk_delay = chunk_delay
+        client = self
+
+        async def generate_content_stream(model, contents):
+            client.prompts.append(contents)
+            chunks = client.streams.pop(0) if client.streams else ["Done"]
+
+            async def _iter():
+                for chunk in chunks:
+                    if client.chunk_delay:
+                        await asyncio.sleep(client.chunk_delay)
+                    yield _FakeResponse(chunk)
+            return _iter()
+
+        self.aio.models.generate_content_stream = generate_content_stream
+
+
+def test_process_stream_yields_text_chunks(live_agent):
+    from src.streaming import StreamTimings
+    live_agent.client = _StreamingClient([["Hallo ", "daar", "!"]])
+    timings = StreamTimings()
+
+    chunks = list(live_agent.process_stream("Hoi", timings=timings))
+
+    assert "".join(chunks) == "Hallo daar!"
+    assert len(chunks) == 3
+    assert timings.first_token_s is not None
+    assert timings.first_tool_start_s is None
+
+
+def test_process_stream_dispatches_tool_before_stream_ends(live_agent):
+    from src.streaming import StreamTimings
+    started = []
+
+    def mark(text: str) -> str:
+        """Record when the tool started."""
+        started.append(time.perf_counter())
+        return text.upper()
+
+    live_agent.available_tools["mark"] = mark
+    live_agent.client = _StreamingClient(
+        [['[{"action": "mark", ', '"args": {"text": "a"}}', ", ", '{"action": "mark", "args": {"text": "b"}}]'],
+         ["Resultaat: ", "A en B"]],
+        chunk_delay=0.1,
+    )
+    timings = StreamTimings()
+
+    result = "".join(live_agent.process_stream("Markeer a en b", timings=timings))
+
+    assert result == "Resultaat: A en B"
+    assert len(started) == 2
+    # The first action started after chunk 2, well before the 4-chunk stream ended
+    assert timings.first_tool_start_s < 0.35
+    assert "Tool 'mark' output: A" in live_agent.client.prompts[-1]
+
+
+def test_structured_result_skips_formatting_call(live_agent):
+    live_agent.client = _FakeClient(['{"action": "get_weather", "args": {"city": "Utrecht"}, "final": true}'])
+
+    reply = live_agent.process("Wat voor weer is het in Utrecht?")
+
+    assert reply == "🌤️ Weer in Utrecht: 21.5°C, Partly Cloudy."
+    assert len(live_agent.client.prompts) == 1
+
+
+def test_renderable_step_does_not_end_a_dependent_plan(live_agent):
+    created = []
+
+    def get_project_status(project_name: str) -> str:
+        """Project status lookup."""
+        return f"Project {project_name} (id: p-42) is actief"
+
+    def create_task(project_id: str, title: str) -> str:
+        """Create a task."""
+        created.append((project_id, title))
+        return f"Taak '{title}' aangemaakt"
+
+    live_agent.available_tools.update(get_project_status=get_project_status, create_task=create_task)
+    live_agent.client = _FakeClient([
+        '{"action": "get_project_status", "args": {"project_name": "Aura"}}',
+        '{"action": "create_task", "args": {"project_id": "p-42", "title": "Offerte"}}',
+        "Taak Offerte aangemaakt bij project Aura",
+    ])
+
+    reply = live_agent.process("Maak een taak Offerte aan bij project Aura")
+
+    assert created == [("p-42", "Offerte")]
+    assert reply == "Taak Offerte aangemaakt bij project Aura"
+    assert "id: p-42" in live_agent.client.prompts[1]
@@ -0,0 +1,102 @@
+"""Smoke tests for the benchmark suite and its fake backends."""
+
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeBackendError, FakeGenAIClient, FakeNotionClient, LatencyProfile
+from benchmarks.run import BenchConfig, compare, main, run_benchmarks, summarize
+from src.config import settings
+
+
+def _quick_config(**overrides):
+    config = BenchConfig(
+        iterations=2,
+        warmup=0,
+        concurrency=2,
+        history_sizes=(20,),
+        mcp_servers=2,
+        llm=LatencyProfile(),
+        notion=LatencyProfile(),
+        mcp=LatencyProfile(),
+    )
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def test_latency_profile_distributions_and_errors():
+    assert LatencyProfile(mean_s=0.2).sample() == 0.2
+    uniform = LatencyProfile(mean_s=0.2, jitter_s=0.1, distribution="uniform", seed=1)
+    assert all(0.1 <= uniform.sample() <= 0.3 for _ in range(50))
+    lognormal = LatencyProfile(mean_s=0.2, jitter_s=0.1, distribution="lognormal", seed=1)
+    samples = [lognormal.sample() for _ in range(2000)]
+    assert sum(samples) / len(samples) == pytest.approx(0.2, rel=0.1)
+
+    failing = LatencyProfile(error_rate=1.0, error_code=429)
+    with pytest.raises(FakeBackendError) as info:
+        failing.wait("notion")
+    assert info.value.status == 429
+    with pytest.raises(ValueError):
+        LatencyProfile(distribution="pareto")
+
+
+def test_fake_clients_mimic_the_real_apis():
+    genai = FakeGenAIClient()
+    assert "reverse_text" in genai.models.generate_content(model="m", contents="Draai om").text
+    reply = asyncio.run(genai.aio.models.generate_content(model="m", contents="[Stap 1]\nklaar"))
+    assert reply.text.startswith("Klaar")
+    assert genai.calls == 2
+
+    notion = FakeNotionClient(projects=3)
+    assert len(notion.data_sources.query(data_source_id="db")["results"]) == 3
+    assert notion.pages.retrieve(page_id="project-1")["id"] == "project-1"
+    assert notion.pages.create(parent={}, properties={})["url"].startswith("https://notion.so/")
+
+
+def test_run_benchmarks_produces_comparable_report(tmp_path, monkeypatch):
+    checkout = tmp_path / "checkout"
+    monkeypatch.setattr(settings, "MEMORY_FILE", str(checkout / "agent_memory.json"))
+    monkeypatch.setattr(settings, "SESSION_DIR", str(checkout / "sessions"))
+    report = run_benchmarks(
+        _quick_config(workdir=str(tmp_path / "work")), only=["process", "memory", "tool_loading", "mcp_initialize"]
+    )
+
+    # The agent's memory stays in the work directory, not in the checkout
+    assert not checkout.exists()
+    assert (tmp_path / "work" / "agent_memory.jsonl").exists()
+
+    results = report["results"]
+    assert results["process"]["sequential"]["count"] == 2
+    assert results["process"]["sequential"]["errors"] == 0
+    assert results["memory"]["history_20"]["add_entry"]["count"] == 2
+    assert results["tool_loading"]["manifest_cold"]["count"] == 1
+    assert results["mcp_initialize"]["tools"] == 10
+    assert report["meta"]["profiles"]["llm"]["mean_s"] == 0.0
+    json.dumps(report)
+
+    rows = compare(report, report)
+    assert rows and not any(row["regression"] for row in rows)
+
+
+def test_compare_flags_slowdowns_above_threshold():
+    baseline = {"results": {"memory": {"add_entry": summarize([0.010, 0.010])}}}
+    slower = {"results": {"memory": {"add_entry": summarize([0.020, 0.020])}}}
+    noise = {"results": {"memory": {"add_entry": summarize([0.0104, 0.0104])}}}
+
+    assert all(row["regression"] for row in compare(slower, baseline, threshold=0.2))
+    assert not any(row["regression"] for row in compare(noise, baseline, threshold=0.02))
+
+
+def test_cli_exits_non_zero_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"tool_loading": {"manifest_cold": summarize([0.000001])}}}))
+
+    code = main([
+        "--quick", "--only", "tool_loading", "--out", str(tmp_path / "run.json"),
+        "--baseline", str(baseline), "--threshold", "0.0",
+    ])
+
+    assert (tmp_path / "run.json").exists()
+    assert code == 1
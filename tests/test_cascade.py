@@ -0,0 +1,79 @@
+"""Tests for the local-first model cascade."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.cascade import CascadeRouter
+from src.config import settings
+
+
+@pytest.fixture
+def cascade_on(monkeypatch):
+    monkeypatch.setattr(settings, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://localhost:11434/v1")
+
+
+def _local(reply, confidence=None):
+    calls = []
+
+    def model(prompt):
+        calls.append(prompt)
+        return reply, confidence
+
+    model.calls = calls
+    return model
+
+
+def test_accepts_confident_local_reply():
+    router = CascadeRouter(local_model=_local("Hallo!", 0.9))
+
+    assert router.try_local("Hoi") == "Hallo!"
+    assert router.stats()["escalation_rate"] == 0.0
+    assert router.stats()["local"]["calls"] == 1
+
+
+def test_escalation_reasons():
+    long_prompt = "woord " * 1000
+    router = CascadeRouter(local_model=_local("antwoord", 0.3), max_local_tokens=100)
+    assert router.try_local(long_prompt) is None
+    assert router.try_local("kort") is None
+
+    failing = CascadeRouter(local_model=MagicMock(side_effect=ConnectionError("down")))
+    assert failing.try_local("kort") is None
+
+    invalid = CascadeRouter(local_model=_local("{broken"))
+    assert invalid.try_local("kort", validate=lambda reply: "parse_failure") is None
+
+    assert router.stats()["escalations"] == {"long_context": 1, "low_confidence": 1}
+    assert failing.stats()["escalations"] == {"local_error": 1}
+    assert invalid.stats()["escalation_rate"] == 1.0
+
+
+def test_chat_completion_reports_mean_token_probability(monkeypatch):
+    from src.tools import openai_proxy
+
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://localhost:11434/v1")
+    response = MagicMock()
+    response.json.return_value = {
+        "choices": [{
+            "message": {"content": "ok"},
+            "logprobs": {"content": [{"logprob": 0.0}, {"logprob": 0.0}]},
+        }]
+    }
+    with patch.object(openai_proxy.requests, "post", return_value=response):
+        assert openai_proxy._chat_completion("ping", logprobs=True) == ("ok", 1.0)
+
+
+def test_agent_uses_local_tier_and_escalates_invalid_actions(live_agent, cascade_on):
+    gemini = MagicMock(spec=["models"])
+    gemini.models.generate_content.return_value = MagicMock(text="Gemini antwoord")
+    live_agent.client = gemini
+    live_agent.cascade = CascadeRouter(local_model=_local("Lokaal antwoord", 0.95))
+    assert live_agent.process("Hoi") == "Lokaal antwoord"
+    gemini.models.generate_content.assert_not_called()
+
+    live_agent.cascade = CascadeRouter(local_model=_local('{"action": "does_not_exist", "args": {}}'))
+    assert live_agent.process("Doe iets") == "Gemini antwoord"
+    assert live_agent.cascade.stats()["escalations"] == {"unknown_tool": 1}
+    assert live_agent.cascade.stats()["gemini"]["calls"] == 1
@@ -0,0 +1,68 @@
+"""Tests for the in-process context cache."""
+
+from src.context_cache import ContextCache
+
+
+def _make_cache():
+    return ContextCache(check_interval=0, use_watcher=False)
+
+
+def test_second_lookup_does_not_read_files(tmp_path):
+    (tmp_path / "rules.md").write_text("Rule 1", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("Note", encoding="utf-8")
+    cache = _make_cache()
+
+    first = cache.get_text([tmp_path])
+    second = cache.get_text([tmp_path])
+
+    assert first == second
+    assert "--- notes.md (from " in first
+    assert first.index("notes.md") < first.index("rules.md")
+    assert cache.stats()["file_reads"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    rules = tmp_path / "rules.md"
+    rules.write_text("Rule 1", encoding="utf-8")
+    cache = _make_cache()
+    cache.get_text([tmp_path])
+    version = cache.version
+
+    rules.write_text("Rule 1 and a longer rule 2", encoding="utf-8")
+    text = cache.get_text([tmp_path])
+
+    assert "longer rule 2" in text
+    assert cache.version > version
+    assert cache.stats()["file_reads"] == 2
+
+
+def test_added_and_removed_files(tmp_path):
+    (tmp_path / "a.md").write_text("A", encoding="utf-8")
+    cache = _make_cache()
+    cache.get_text([tmp_path])
+
+    (tmp_path / "b.md").write_text("B", encoding="utf-8")
+    assert [f.path.name for f in cache.get_files([tmp_path])] == ["a.md", "b.md"]
+
+    (tmp_path / "a.md").unlink()
+    assert [f.path.name for f in cache.get_files([tmp_path])] == ["b.md"]
+
+
+def test_missing_directory_is_skipped(tmp_path):
+    cache = _make_cache()
+    assert cache.get_text([tmp_path / "missing"]) == ""
+
+
+def test_check_interval_skips_revalidation(tmp_path):
+    (tmp_path / "a.md").write_text("A", encoding="utf-8")
+    cache = ContextCache(check_interval=3600, use_watcher=False)
+    cache.get_text([tmp_path])
+
+    (tmp_path / "a.md").write_text("AAAA", encoding="utf-8")
+    assert "AAAA" not in cache.get_text([tmp_path])
+    assert cache.stats()["revalidations"] == 1
+
+    cache.invalidate()
+    assert "AAAA" in cache.get_text([tmp_path])
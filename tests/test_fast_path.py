@@ -0,0 +1,60 @@
+"""Tests for the deterministic intent fast path."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.fast_path import IntentMatcher
+
+PROJECTS = ["Aura", "Building Emerson", "Van Gogh Museum"]
+
+
+@pytest.fixture
+def matcher():
+    return IntentMatcher(project_names=lambda: PROJECTS)
+
+
+def test_daily_check_phrases(matcher):
+    for message in ("Wat staat er vandaag op de planning?", "dagelijks overzicht", "Daily check"):
+        match = matcher.match(message)
+        assert match is not None and match.tool == "daily_check" and match.args == {}
+
+
+def test_project_status_is_fuzzy_matched_to_known_name(matcher):
+    match = matcher.match("status van project building emersn")
+
+    assert match.tool == "get_project_status"
+    assert match.args == {"project_name": "Building Emerson"}
+    assert 0.85 <= match.confidence < 1.0
+
+
+def test_unknown_project_or_free_text_falls_through(matcher):
+    assert matcher.match("status van project Onbekend Ding") is None
+    assert matcher.match("Maak een taak aan voor Aura en stuur een mail") is None
+
+
+def test_rules_for_missing_tools_are_skipped(matcher):
+    assert matcher.match("daily check", available_tools={"get_project_status": object()}) is None
+
+
+def test_project_names_are_cached():
+    names = MagicMock(return_value=PROJECTS)
+    matcher = IntentMatcher(project_names=names)
+
+    matcher.match("status van project Aura")
+    matcher.match("status van project Van Gogh Museum")
+
+    assert names.call_count == 1
+
+
+def test_agent_answers_fast_path_without_llm(live_agent):
+    live_agent.notion.list_projects.return_value = []
+    live_agent.client = MagicMock(spec=["models"])
+    live_agent.available_tools["daily_check"] = lambda: "📅 **Dagelijks Overzicht**"
+
+    reply = live_agent.process("Wat staat er vandaag op de planning?")
+
+    assert reply == "📅 **Dagelijks Overzicht**"
+    live_agent.client.models.generate_content.assert_not_called()
+    assert live_agent.fast_path.stats.summary()["hits"] == 1
+    assert live_agent.memory.get_history()[-1]["content"] == "Wat staat er vandaag op de planning?"
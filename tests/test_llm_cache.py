@@ -0,0 +1,120 @@
+"""Tests for the persistent LLM response cache."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config import settings
+from src.llm_cache import LLMResponseCache, bypass, make_key
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+
+
+def test_key_ignores_cosmetic_whitespace_but_not_params():
+    assert make_key("m", "Hallo  \r\nwereld\n") == make_key("m", "Hallo\nwereld")
+    assert make_key("m", "Hallo") != make_key("other", "Hallo")
+    assert make_key("m", "Hallo", {"temperature": 0.2}) != make_key("m", "Hallo", {"temperature": 0.7})
+
+
+def test_responses_persist_across_instances(tmp_path, enabled):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMResponseCache(path)
+    assert cache.get("m", "prompt") is None
+    cache.put("m", "prompt", "antwoord")
+    cache.close()
+
+    reopened = LLMResponseCache(path)
+    assert reopened.get("m", "prompt") == "antwoord"
+    assert reopened.stats()["hit_ratio"] == 1.0
+
+
+def test_lru_eviction_by_size(tmp_path, enabled):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.put("m", "a", "12345")
+    cache.put("m", "b", "12345")
+    cache.get("m", "a")
+    cache.put("m", "c", "12345")
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == "12345"
+    assert cache.evictions == 1
+
+
+def test_bypass_and_disabled_skip_cache(tmp_path, enabled, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("m", "prompt", "antwoord")
+    with bypass():
+        assert cache.get("m", "prompt") is None
+        cache.put("m", "other", "x")
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    assert cache.get("m", "prompt") is None
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    assert cache.get("m", "other") is None
+
+
+def test_agent_reuses_cached_gemini_reply(enabled):
+    from src.agent import GeminiAgent
+
+    agent = GeminiAgent()
+    agent.client = MagicMock(spec=["models"])
+    agent.client.models.generate_content.return_value = MagicMock(text="Antwoord")
+    try:
+        assert agent._call_gemini("Dagelijkse check") == "Antwoord"
+        assert agent._call_gemini("Dagelijkse check") == "Antwoord"
+        assert agent.client.models.generate_content.call_count == 1
+    finally:
+        agent.shutdown()
+
+
+def test_agent_does_not_replay_mutating_actions(enabled):
+    from src.agent import GeminiAgent
+    from src.llm_cache import get_llm_cache
+    from src.tool_cache import cacheable, invalidates
+
+    @cacheable(ttl=60, tags=("notion:tasks",))
+    def list_tasks() -> str:
+        """List tasks."""
+        return "geen taken"
+
+    @invalidates("notion:tasks")
+    def create_task(title: str) -> str:
+        """Create a task."""
+        return "aangemaakt"
+
+    agent = GeminiAgent()
+    agent.available_tools.update({"list_tasks": list_tasks, "create_task": create_task})
+    agent.client = MagicMock(spec=["models"])
+    generate = agent.client.models.generate_content
+    try:
+        generate.return_value = MagicMock(text='{"action": "create_task", "args": {"title": "Offerte"}}')
+        agent._call_gemini("Maak een taak")
+        agent._call_gemini("Maak een taak")
+        assert generate.call_count == 2
+
+        # An entry written before this check existed is not replayed either
+        get_llm_cache().put(settings.GEMINI_MODEL_NAME, "Oud plan", '{"action": "create_task", "args": {}}')
+        agent._call_gemini("Oud plan")
+        assert generate.call_count == 3
+
+        generate.return_value = MagicMock(text='{"action": "list_tasks", "args": {}}')
+        agent._call_gemini("Welke taken?")
+        agent._call_gemini("Welke taken?")
+        assert generate.call_count == 4
+    finally:
+        agent.shutdown()
+
+
+def test_call_openai_chat_uses_cache(enabled, monkeypatch):
+    from src.tools import openai_proxy
+
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://localhost:11434/v1")
+    response = MagicMock()
+    response.json.return_value = {"choices": [{"message": {"content": "pong"}}]}
+    with patch.object(openai_proxy.requests, "post", return_value=response) as post:
+        assert openai_proxy.call_openai_chat("ping", temperature=0) == "pong"
+        assert openai_proxy.call_openai_chat("ping", temperature=0) == "pong"
+        assert openai_proxy.call_openai_chat("ping", temperature=0.5) == "pong"
+    assert post.call_count == 2
@@ -0,0 +1,187 @@
+"""Tests for the shared LLM gateway."""
+
+import asyncio
+import time
+
+import pytest
+
+from src.config import settings
+from src.llm_gateway import DummyClient, LLMGateway, TokenBucket, is_retryable
+
+
+class _RateLimited(Exception):
+    code = 429
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FlakyClient:
+    """Fails with 429 a number of times, then answers; optional per-call delays."""
+
+    def __init__(self, failures=0, delays=()):
+        self.failures = failures
+        self.delays = list(delays)
+        self.calls = 0
+        client = self
+
+        class _Models:
+            def generate_content(self, model, contents):
+                return client._answer()
+
+        class _AsyncModels:
+            async def generate_content(self, model, contents):
+                delay = client._delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                return client._answer()
+
+        class _Aio:
+            models = _AsyncModels()
+
+        self.models = _Models()
+        self.aio = _Aio()
+
+    def _delay(self):
+        return self.delays.pop(0) if self.delays else 0.0
+
+    def _answer(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise _RateLimited("429 RESOURCE_EXHAUSTED")
+        return _Response(f"answer {self.calls}")
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.02)
+
+
+def test_retryable_errors():
+    assert is_retryable(_RateLimited())
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, burst=1)
+    start = time.perf_counter()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_generate_retries_rate_limits(fast_retries):
+    client = _FlakyClient(failures=2)
+    gateway = LLMGateway(client)
+
+    assert gateway.generate("m", "hi").text == "answer 3"
+    assert gateway.retries == 2
+
+
+def test_counters_are_exact_under_concurrent_callers():
+    from concurrent.futures import ThreadPoolExecutor
+
+    gateway = LLMGateway(_FlakyClient())
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: gateway.generate("m", f"hi {i}"), range(400)))
+
+    assert gateway.stats()["requests"] == 400
+
+
+def test_generate_gives_up_after_max_retries(fast_retries, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 1)
+    gateway = LLMGateway(_FlakyClient(failures=5))
+
+    with pytest.raises(_RateLimited):
+        gateway.generate("m", "hi")
+
+
+def test_async_hedge_returns_faster_duplicate(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 3)
+    client = _FlakyClient(delays=[0.01, 0.01, 0.01, 1.0, 0.01])
+    gateway = LLMGateway(client)
+
+    async def run():
+        for _ in range(3):
+            await gateway.generate_async("m", "warmup")
+        start = time.perf_counter()
+        response = await gateway.generate_async("m", "slow")
+        return response, time.perf_counter() - start
+
+    response, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.5
+    assert gateway.hedges == 1 and gateway.hedge_wins == 1
+    assert response.text == "answer 4"  # the slow primary was cancelled
+
+
+class _ScriptedClient:
+    """Async client whose calls follow a script of (delay, error or None)."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        client = self
+
+        class _AsyncModels:
+            async def generate_content(self, model, contents):
+                client.calls += 1
+                call = client.calls
+                delay, error = client.script.pop(0) if client.script else (0.0, None)
+                await asyncio.sleep(delay)
+                if error is not None:
+                    raise error
+                return _Response(f"answer {call}")
+
+        class _Aio:
+            models = _AsyncModels()
+
+        self.aio = _Aio()
+
+
+def _warm_hedging(monkeypatch, gateway):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    for _ in range(3):
+        gateway._tracker("m").record(0.01)
+
+
+def test_fast_failing_hedge_does_not_hide_a_slower_success(monkeypatch):
+    client = _ScriptedClient([(0.2, None), (0.0, ValueError("bad gateway"))])
+    gateway = LLMGateway(client)
+    _warm_hedging(monkeypatch, gateway)
+
+    response = asyncio.run(gateway.generate_async("m", "slow"))
+
+    assert response.text == "answer 1"  # the primary's answer, after the hedge failed
+    assert gateway.hedges == 1 and gateway.hedge_wins == 0
+
+
+def test_hedge_takes_a_rate_limit_token(monkeypatch):
+    client = _ScriptedClient([(0.1, None), (0.0, None)])
+    gateway = LLMGateway(client)
+    _warm_hedging(monkeypatch, gateway)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_RPS", 1.0)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_BURST", 1.0)
+
+    response = asyncio.run(gateway.generate_async("m", "slow"))
+
+    # The only token went to the primary request, so no hedge was sent
+    assert response.text == "answer 1"
+    assert gateway.hedges == 0 and client.calls == 1
+
+
+def test_agents_share_one_client(live_agent):
+    from src.agents.base_agent import BaseAgent
+
+    worker = BaseAgent("coder", "You write code.")
+    assert live_agent.client is live_agent.gateway.client
+    assert worker.gateway is live_agent.gateway
+    assert isinstance(worker.client, DummyClient)
+    assert worker.execute("task") == "[coder] Task completed"
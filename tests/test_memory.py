@@ -1,5 +1,10 @@
 import json
+import threading
+
+import pytest
+
 from src.memory import MemoryManager
+from src.memory_store import JournalStore, JSONFileStore
 
 
 def test_context_window_without_overflow(tmp_path):
@@ -48,3 +53,243 @@ def test_loads_legacy_memory_format(tmp_path):
 
     assert manager.summary == ""
     assert manager.get_history() == legacy_payload
+
+
+def test_journal_appends_one_record_per_entry_and_reloads(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    for i in range(3):
+        manager.add_entry("user", f"msg {i}")
+    manager.save_memory()
+
+    journal = tmp_path / "memory.jsonl"
+    assert len(journal.read_text(encoding="utf-8").splitlines()) == 3
+    assert not (tmp_path / "memory.json").exists()
+
+    reloaded = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    assert [m["content"] for m in reloaded.get_history()] == ["msg 0", "msg 1", "msg 2"]
+    manager.close()
+
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    legacy_file = tmp_path / "memory.json"
+    legacy_file.write_text(json.dumps({"summary": "oud", "history": [{"role": "user", "content": "hoi", "metadata": {}}]}))
+
+    manager = MemoryManager(memory_file=str(legacy_file))
+    manager.add_entry("assistant", "hallo")
+    manager.close()
+    legacy_file.write_text(json.dumps({"summary": "genegeerd", "history": []}))
+
+    reloaded = MemoryManager(memory_file=str(legacy_file))
+    assert reloaded.summary == "oud"
+    assert [m["content"] for m in reloaded.get_history()] == ["hoi", "hallo"]
+
+
+def test_tail_loading_reads_only_recent_messages(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"), tail=0)
+    for i in range(50):
+        manager.add_entry("user", f"msg {i}")
+    manager.get_context_window("SYS", max_messages=40)
+    for i in range(50, 55):
+        manager.add_entry("user", f"msg {i}")
+    manager.close()
+
+    tail = MemoryManager(memory_file=str(tmp_path / "memory.json"), tail=5)
+
+    assert [m["content"] for m in tail.get_history()] == [f"msg {i}" for i in range(50, 55)]
+    assert tail.history_offset == 50
+    assert tail.summary.startswith("user: msg 0")
+
+
+def test_fsync_always_survives_concurrent_writers(tmp_path):
+    store = JournalStore(str(tmp_path / "memory.jsonl"), fsync="always")
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"), store=store)
+    start = threading.Barrier(16)
+
+    def write(worker):
+        start.wait()
+        for i in range(4):
+            manager.add_entry("user", f"{worker}-{i}")
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every add_entry returned after its fsync, but waiting happens outside the
+    # manager's lock, so concurrent writers share group commits
+    assert store.commits < 64
+    reloaded = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    history = reloaded.get_history()
+    assert len(history) == 64
+    assert len({m["content"] for m in history}) == 64
+
+
+def test_failed_write_is_reported_to_every_waiter_of_the_batch(tmp_path, monkeypatch):
+    store = JournalStore(str(tmp_path / "memory.jsonl"), fsync="always")
+    real_open = store._open
+    attempts = []
+
+    def flaky_open():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        return real_open()
+
+    monkeypatch.setattr(store, "_open", flaky_open)
+    with store._cond:  # Both records land in the same batch
+        first = store.append_nowait({"role": "user", "content": "een"})
+        second = store.append_nowait({"role": "user", "content": "twee"})
+
+    for ticket in (first, second, first):
+        with pytest.raises(OSError, match="disk full"):
+            store.wait(ticket)
+
+    store.wait(store.append_nowait({"role": "user", "content": "drie"}))
+    store.close()
+    assert [m["content"] for m in JournalStore(str(tmp_path / "memory.jsonl")).load().history] == ["drie"]
+
+
+def test_journal_compacts_superseded_summaries_and_skips_torn_records(tmp_path):
+    store = JournalStore(str(tmp_path / "memory.jsonl"), compact_min_bytes=200)
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"), store=store)
+    manager.add_entry("user", "eerste")
+    manager.clear_memory()
+    manager.add_entry("user", "blijft")
+    for i in range(30):
+        store.set_summary(f"samenvatting {i} " + "x" * 20, 1)
+    manager.save_memory()
+    manager.close()
+    with open(tmp_path / "memory.jsonl", "ab") as f:
+        f.write(b'{"op":"append","seq":1,"entry":{"role":"us')  # crashed mid-write
+
+    assert store.compactions >= 1
+    reloaded = MemoryManager(memory_file=str(tmp_path / "memory.json"), tail=0)
+    assert [m["content"] for m in reloaded.get_history()] == ["blijft"]
+    assert reloaded.summary.startswith("samenvatting 29")
+    reloaded.add_entry("assistant", "na crash")
+    reloaded.close()
+    assert [m["content"] for m in MemoryManager(memory_file=str(tmp_path / "memory.json")).get_history()] == [
+        "blijft", "na crash"
+    ]
+
+
+def test_json_backend_rewrites_the_file(tmp_path):
+    memory_file = tmp_path / "memory.json"
+    manager = MemoryManager(memory_file=str(memory_file), store=JSONFileStore(str(memory_file)))
+    manager.add_entry("user", "Hello")
+
+    assert json.loads(memory_file.read_text())["history"][0]["content"] == "Hello"
+
+
+def _recording_summarizer(calls):
+    def summarizer(old_msgs, prev_summary):
+        calls.append([msg["content"] for msg in old_msgs])
+        return "; ".join(filter(None, [prev_summary, *(msg["content"] for msg in old_msgs)]))
+
+    return summarizer
+
+
+def test_only_newly_evicted_messages_are_summarized(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    calls = []
+    summarizer = _recording_summarizer(calls)
+    for i in range(4):
+        manager.add_entry("user", f"msg {i}")
+
+    manager.get_context_window("SYS", max_messages=2, summarizer=summarizer)
+    manager.get_context_window("SYS", max_messages=2, summarizer=summarizer)  # nothing evicted since
+    manager.add_entry("user", "msg 4")
+    window = manager.get_context_window("SYS", max_messages=2, summarizer=summarizer)
+
+    assert calls == [["msg 0", "msg 1"], ["msg 2"]]
+    assert manager.summarize_calls == 2
+    assert manager.summary == "msg 0; msg 1; msg 2"
+    assert [m["content"] for m in window[2:]] == ["msg 3", "msg 4"]
+
+    manager.close()
+    reloaded = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    reloaded.get_context_window("SYS", max_messages=2, summarizer=summarizer)
+    assert reloaded.summarized_upto == 3
+    assert len(calls) == 2
+
+
+def test_background_summary_keeps_the_reply_off_the_summarizer(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    release = threading.Event()
+    calls = []
+
+    def slow_summarizer(old_msgs, prev_summary):
+        release.wait(5)
+        return _recording_summarizer(calls)(old_msgs, prev_summary)
+
+    for i in range(4):
+        manager.add_entry("user", f"msg {i}")
+
+    window = manager.get_context_window("SYS", max_messages=2, summarizer=slow_summarizer, background=True)
+    # The summary is not ready yet: evicted messages stay in the window verbatim
+    assert [m["content"] for m in window] == ["SYS", "msg 0", "msg 1", "msg 2", "msg 3"]
+
+    release.set()
+    assert manager.wait_for_summary(5)
+    window = manager.get_context_window("SYS", max_messages=2, summarizer=slow_summarizer, background=True)
+    assert window[1]["content"] == "Previous Summary: msg 0; msg 1"
+    assert [m["content"] for m in window[2:]] == ["msg 2", "msg 3"]
+    assert calls == [["msg 0", "msg 1"]]
+
+
+def test_legacy_summary_without_watermark_is_not_resummarized(tmp_path):
+    legacy_file = tmp_path / "memory.json"
+    history = [{"role": "user", "content": f"msg {i}", "metadata": {}} for i in range(5)]
+    legacy_file.write_text(json.dumps({"summary": "oud", "history": history}))
+    calls = []
+
+    manager = MemoryManager(memory_file=str(legacy_file))
+    window = manager.get_context_window("SYS", max_messages=2, summarizer=_recording_summarizer(calls))
+
+    assert calls == []
+    assert window[1]["content"] == "Previous Summary: oud"
+    assert [m["content"] for m in window[2:]] == ["msg 3", "msg 4"]
+
+
+def test_token_budget_packs_recent_messages_and_summary(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    manager.add_entry("user", "oud bericht")
+    manager.add_entry("user", "LOG " * 400)  # ~400 tokens
+    for i in range(20):
+        manager.add_entry("user", f"kort {i}")
+    calls = []
+
+    window = manager.get_context_window("SYS", token_budget=150, summarizer=_recording_summarizer(calls))
+
+    contents = [m["content"] for m in window]
+    assert contents[-1] == "kort 19"
+    assert "kort 0" in contents  # twenty short messages fit, the pasted log does not
+    assert not any(c.startswith("LOG") for c in contents)
+    assert calls[0][0] == "oud bericht" and len(calls[0]) == 2
+    assert manager.last_window_tokens <= 150 + 1
+    assert manager.get_history()[-1]["metadata"]["tokens"] > 0
+
+
+def test_token_budget_cuts_an_oversized_newest_message(tmp_path):
+    manager = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    manager.add_entry("user", "x" * 4000)
+
+    window = manager.get_context_window("SYS", token_budget=50)
+
+    assert len(window) == 2
+    assert window[1]["content"].endswith("…[ingekort]")
+    assert len(window[1]["content"]) < 220
+    assert manager.get_history()[0]["content"] == "x" * 4000
+
+
+def test_token_estimates_are_cached_in_metadata(tmp_path):
+    legacy_file = tmp_path / "memory.json"
+    legacy_file.write_text(json.dumps([{"role": "user", "content": "zonder schatting"}]))
+    manager = MemoryManager(memory_file=str(legacy_file))
+
+    manager.get_context_window("SYS", token_budget=100)
+
+    assert manager.get_history()[0]["metadata"]["tokens"] == 6
+    with pytest.raises(ValueError):
+        manager.get_context_window("SYS")
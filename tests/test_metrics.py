@@ -0,0 +1,136 @@
+"""Tests for the Prometheus-style metrics registry."""
+
+import asyncio
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.metrics import (
+    CACHE_HIT_RATIO,
+    NOTION_CALLS,
+    NOTION_RATE_LIMITED,
+    TOOL_LATENCY,
+    MetricsRegistry,
+    dump,
+    record_cache,
+    registry,
+    start_http_server,
+    stop_http_server,
+)
+
+
+def test_counter_and_gauge_render_text_format():
+    local = MetricsRegistry()
+    calls = local.counter("notion_calls_total", "Calls.", ("database",))
+    calls.inc(database="projects")
+    calls.inc(2, database="projects")
+    calls.inc(database='lo"gs')
+    queue = local.gauge("queue_depth", "Queued events.")
+    queue.set(3)
+    queue.dec()
+
+    text = local.render()
+
+    assert "# TYPE notion_calls_total counter" in text
+    assert 'notion_calls_total{database="projects"} 3' in text
+    assert 'notion_calls_total{database="lo\\"gs"} 1' in text
+    assert "queue_depth 2" in text
+    with pytest.raises(ValueError):
+        calls.inc(-1, database="projects")
+    with pytest.raises(ValueError):
+        calls.inc(table="projects")
+
+
+def test_histogram_buckets_are_cumulative():
+    local = MetricsRegistry()
+    latency = local.histogram("llm_seconds", "Latency.", ("model",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, model="flash")
+
+    text = local.render()
+
+    assert 'llm_seconds_bucket{model="flash",le="0.1"} 1' in text
+    assert 'llm_seconds_bucket{model="flash",le="1"} 3' in text
+    assert 'llm_seconds_bucket{model="flash",le="+Inf"} 4' in text
+    assert 'llm_seconds_count{model="flash"} 4' in text
+    assert latency.sum(model="flash") == pytest.approx(4.25)
+
+
+def test_histogram_time_records_failures_too():
+    local = MetricsRegistry()
+    save = local.histogram("save_seconds", "Save time.")
+    with pytest.raises(OSError):
+        with save.time():
+            raise OSError("disk full")
+    assert save.count() == 1
+
+
+def test_registry_rejects_conflicting_registration():
+    local = MetricsRegistry()
+    assert local.counter("x_total", "X.", ("a",)) is local.counter("x_total", "X.", ("a",))
+    with pytest.raises(ValueError):
+        local.gauge("x_total", "X.", ("a",))
+
+
+def test_cache_hit_ratio_is_derived_at_render_time():
+    record_cache("test_cache", True)
+    record_cache("test_cache", True)
+    record_cache("test_cache", False)
+
+    text = registry.render()
+
+    assert CACHE_HIT_RATIO.value(cache="test_cache") == pytest.approx(2 / 3)
+    assert 'cache_hit_ratio{cache="test_cache"}' in text
+
+
+def test_http_endpoint_and_dump(tmp_path):
+    server = start_http_server(port=0, host="127.0.0.1")
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        stop_http_server()
+    assert "# TYPE llm_request_seconds histogram" in body
+
+    path = tmp_path / "metrics.prom"
+    dump(str(path))
+    assert "# TYPE tool_call_seconds histogram" in path.read_text()
+
+
+def test_notion_calls_and_rate_limits_are_counted():
+    from src.notion_client import EmersonNotionClient
+
+    class RateLimited(Exception):
+        status = 429
+
+    client = EmersonNotionClient()
+    client.client = MagicMock()
+    client.client.pages.retrieve.side_effect = RateLimited("slow down")
+    calls_before = NOTION_CALLS.value(database="projects", operation="pages.retrieve")
+    limited_before = NOTION_RATE_LIMITED.value(database="projects")
+
+    assert client._get_project("page-1") is None
+
+    assert NOTION_CALLS.value(database="projects", operation="pages.retrieve") == calls_before + 1
+    assert NOTION_RATE_LIMITED.value(database="projects") == limited_before + 1
+
+
+def test_agent_records_tool_latency(live_agent):
+    before = TOOL_LATENCY.count(tool="reverse_text", status="ok")
+
+    outcomes = asyncio.run(live_agent._act([("reverse_text", {"text": "abc"})]))
+
+    assert outcomes[0].output == "cba"
+    assert TOOL_LATENCY.count(tool="reverse_text", status="ok") == before + 1
+
+
+def test_unknown_tool_names_share_one_label(live_agent):
+    before = TOOL_LATENCY.count(tool="unknown", status="not_found")
+
+    asyncio.run(live_agent._act([("verzonnen_tool_1", {}), ("verzonnen_tool_2", {})]))
+
+    assert TOOL_LATENCY.count(tool="unknown", status="not_found") == before + 2
+    assert TOOL_LATENCY.count(tool="verzonnen_tool_1", status="not_found") == 0
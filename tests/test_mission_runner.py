@@ -0,0 +1,91 @@
+"""Tests for the mission batch runner."""
+
+import asyncio
+import json
+import time
+
+from src.config import settings
+from src.mission_runner import (
+    build_report,
+    discover_missions,
+    percentile,
+    run_batch,
+    run_missions,
+    write_artifacts,
+)
+
+
+def _missions(tmp_path, count=4):
+    for i in range(count):
+        (tmp_path / f"mission_test_{i}.md").write_text(f"# Mission {i}", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("not a mission", encoding="utf-8")
+    return tmp_path
+
+
+def test_discover_missions_from_dir_and_glob(tmp_path):
+    _missions(tmp_path, 3)
+
+    from_dir = discover_missions([str(tmp_path)])
+    from_glob = discover_missions([str(tmp_path / "mission_test_*.md"), str(tmp_path / "mission_test_0.md")])
+
+    assert [p.name for p in from_dir] == ["mission_test_0.md", "mission_test_1.md", "mission_test_2.md"]
+    assert from_glob == from_dir
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_run_missions_respects_concurrency(tmp_path):
+    missions = discover_missions([str(_missions(tmp_path, 4))])
+    in_flight, peak = 0, 0
+
+    async def execute(text):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        if "3" in text:
+            raise RuntimeError("boom")
+        return text.upper()
+
+    start = time.perf_counter()
+    results = asyncio.run(run_missions(missions, execute, concurrency=2))
+
+    assert peak == 2
+    assert time.perf_counter() - start < 0.35
+    assert [r.status for r in results] == ["ok", "ok", "ok", "error"]
+    assert results[0].output == "# MISSION 0"
+
+
+def test_report_and_artifacts(tmp_path):
+    (tmp_path / "in").mkdir()
+    missions = discover_missions([str(_missions(tmp_path / "in", 2))])
+
+    async def execute(text):
+        return "klaar"
+
+    results = asyncio.run(run_missions(missions, execute, concurrency=2))
+    report = build_report(results, wall_s=0.5, mode="agent", concurrency=2)
+    report_path = write_artifacts(results, report, tmp_path / "out")
+
+    saved = json.loads(report_path.read_text(encoding="utf-8"))
+    assert saved["missions"] == 2 and saved["ok"] == 2
+    assert saved["throughput_per_min"] == 240.0
+    assert "klaar" in (tmp_path / "out" / "mission_test_0.result.md").read_text(encoding="utf-8")
+
+
+def test_run_batch_with_warm_agent(tmp_path, monkeypatch):
+    # The warm agent stores every mission in its memory: keep that out of the tracked agent_memory.json
+    monkeypatch.setattr(settings, "MEMORY_FILE", str(tmp_path / "memory.json"))
+    _missions(tmp_path, 2)
+
+    report = run_batch([str(tmp_path / "*.md")], concurrency=2, out_dir=str(tmp_path / "out"))
+
+    assert report["missions"] == 2
+    assert report["errors"] == 0
+    assert (tmp_path / "out" / "report.json").exists()
+    assert (tmp_path / "memory.jsonl").exists()
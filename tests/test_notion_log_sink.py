@@ -0,0 +1,101 @@
+"""Tests for the background Notion log sink."""
+
+import json
+import threading
+import time
+
+from src.config import settings
+from src.notion_log_sink import LogEvent, NotionLogSink, coalesce, release_log_sink, shared_log_sink
+
+
+class _Writer:
+    def __init__(self, fail=False):
+        self.events = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        if self.fail:
+            raise ConnectionError("Notion unreachable")
+        with self.lock:
+            self.events.append(event)
+
+
+def test_coalesce_merges_identical_events():
+    events = [
+        LogEvent("P2", "Tool executed: a", {"args": {}}),
+        LogEvent("P2", "Tool executed: b", {"args": {}}),
+        LogEvent("P2", "Tool executed: a", {"args": {}}),
+    ]
+
+    merged = coalesce(events)
+
+    assert [(e.event, e.count) for e in merged] == [("Tool executed: a", 2), ("Tool executed: b", 1)]
+
+
+def test_submit_does_not_block_and_bursts_are_coalesced(tmp_path):
+    writer = _Writer()
+    sink = NotionLogSink(writer, journal_path=str(tmp_path / "j.jsonl"), window=0.2, rate_limit=0)
+
+    start = time.perf_counter()
+    for _ in range(5):
+        sink.submit("P2", "Tool executed: daily_check", {"args": {}})
+    assert time.perf_counter() - start < 0.1
+
+    assert sink.flush(timeout=2)
+    sink.close()
+    assert [(e.event, e.count) for e in writer.events] == [("Tool executed: daily_check", 5)]
+    assert sink.coalesced == 4
+
+
+def test_rate_limit_spaces_writes(tmp_path):
+    writer = _Writer()
+    sink = NotionLogSink(writer, journal_path=str(tmp_path / "j.jsonl"), window=0, rate_limit=20)
+
+    start = time.perf_counter()
+    for i in range(4):
+        sink.submit("P2", f"event {i}", {})
+    sink.close(timeout=2)
+
+    assert len(writer.events) == 4
+    assert time.perf_counter() - start >= 0.15
+
+
+def test_failed_writes_are_journaled_and_replayed_on_restart(tmp_path):
+    journal = tmp_path / "j.jsonl"
+    sink = NotionLogSink(_Writer(fail=True), journal_path=str(journal), window=0, rate_limit=0)
+    sink.submit("P1", "Escalation", {"amount": 900})
+    sink.close(timeout=2)
+
+    lines = journal.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["event"] == "Escalation"
+
+    writer = _Writer()
+    restarted = NotionLogSink(writer, journal_path=str(journal), window=0, rate_limit=0)
+    restarted.resume_journal()
+    assert restarted.flush(timeout=2)
+    restarted.close()
+
+    assert [e.event for e in writer.events] == ["Escalation"]
+    assert restarted.replayed == 1
+    assert not journal.exists()
+
+
+def test_shared_sink_stays_open_until_its_last_user_releases_it(monkeypatch):
+    monkeypatch.setattr(settings, "NOTION_LOG_WINDOW", 0.0)
+    monkeypatch.setattr(settings, "NOTION_LOG_RATE_LIMIT", 0.0)
+    writer = _Writer()
+    first = shared_log_sink(writer)
+    second = shared_log_sink(_Writer())
+    assert first is second
+
+    first.submit("P2", "Tool executed: a", {})
+    release_log_sink(first, timeout=2)  # one pooled agent shuts down
+    second.submit("P2", "Tool executed: b", {})
+    assert second.flush(timeout=2)
+    release_log_sink(second, timeout=2)
+
+    assert [e.event for e in writer.events] == ["Tool executed: a", "Tool executed: b"]
+    fresh = shared_log_sink(writer)
+    assert fresh is not first
+    release_log_sink(fresh)
@@ -0,0 +1,106 @@
+"""Tests for the long-term recall index."""
+
+from src.memory import MemoryManager
+from src.recall import RecallIndex, features, recall_path_for
+from src.retrieval import estimate_tokens
+
+
+def test_search_ranks_similar_messages_and_respects_before():
+    index = RecallIndex(min_score=0.0)
+    index.add(0, "user", "De offerte voor Aura heeft code PRO-202")
+    index.add(1, "assistant", "Het weer in Utrecht is zonnig")
+    index.add(2, "user", "Stuur de offerte voor Aura morgen op")
+
+    hits = index.search("wat was de code van de offerte voor Aura?", k=2)
+    assert [hit.seq for hit in hits] == [0, 2]
+    assert hits[0].score > hits[1].score
+
+    assert [hit.seq for hit in index.search("offerte Aura", k=3, before=2)] == [0]
+    assert index.search("", k=3) == []
+    assert features("de het een") == set()
+
+
+def test_sidecar_is_reloaded_and_backfilled_once(tmp_path):
+    path = str(tmp_path / "memory.recall.jsonl")
+    index = RecallIndex(path, backfill=[(0, "user", "Projectcode ZEPHYR-7 voor de migratie")])
+    index.add(1, "user", "Lunch om twaalf uur")
+    assert len(index) == 2
+
+    reloaded = RecallIndex(path, backfill=[(0, "user", "wordt genegeerd, de sidecar bestaat al")])
+    reloaded.open_in_background().join(5)
+    assert len(reloaded) == 2
+    assert reloaded.search("projectcode migratie", k=1)[0].seq == 0
+
+    reloaded.clear()
+    assert len(RecallIndex(path)) == 0
+    assert recall_path_for("agent_memory.json") == "agent_memory.recall.jsonl"
+
+
+def test_sidecar_keeps_one_handle_and_loads_only_the_tail(tmp_path):
+    path = str(tmp_path / "memory.recall.jsonl")
+    index = RecallIndex(path)
+    for seq in range(10):
+        index.add(seq, "user", f"Offerte nummer {seq} voor klant Aura")
+    handle = index._handle
+    index.add(10, "user", "Offerte nummer 10 voor klant Aura")
+    assert index._handle is handle and not handle.closed
+    index.close()
+    assert handle.closed
+
+    tail = RecallIndex(path, load_tail=3, min_score=0.0)
+    assert sorted(hit.seq for hit in tail.search("offerte Aura", k=10)) == [8, 9, 10]
+    assert len(tail) == 3
+    everything = RecallIndex(path, load_tail=0)
+    everything.open_in_background().join(5)
+    assert len(everything) == 11
+
+
+def test_common_features_do_not_widen_the_search():
+    index = RecallIndex(max_df=0.05, max_postings=100)
+    for seq in range(5000):
+        index.add(seq, "user", f"status update nummer {seq} van het project")
+    index.add(5000, "user", "Het wachtwoord van de testomgeving staat in de kluis")
+
+    hits = index.search("status van het project en de kluis van de testomgeving", k=1)
+
+    assert hits[0].seq == 5000
+    # "status", "project" ... are in every message and are skipped
+    assert index.stats()["avg_candidates"] < 10
+
+
+def test_memory_window_injects_recalled_messages(tmp_path):
+    memory = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    memory.add_entry("user", "Het klantnummer van Aura is 88231")
+    for i in range(12):
+        memory.add_entry("user", f"Vraag {i} over iets anders")
+    memory.add_entry("user", "Wat was het klantnummer van Aura?")
+
+    window = memory.get_context_window(
+        "Systeem", max_messages=4, summarizer=lambda msgs, prev: "samenvatting", recall_query="klantnummer Aura", recall_k=2
+    )
+    memory.close()
+
+    recalled = [m["content"] for m in window if m["content"].startswith("Relevant earlier messages")]
+    assert recalled == ["Relevant earlier messages:\n- user: Het klantnummer van Aura is 88231"]
+    assert memory.last_recall_hits == 1
+    assert window[-1]["content"] == "Wat was het klantnummer van Aura?"
+
+
+def test_recalled_block_does_not_drop_messages_between_summary_and_window(tmp_path):
+    memory = MemoryManager(memory_file=str(tmp_path / "memory.json"))
+    memory.add_entry("user", "Het klantnummer van Aura is 88231 en de offerte staat klaar")
+    for i in range(30):
+        memory.add_entry("user", f"Bericht {i}: " + "planning overleg " * 6)
+    memory.add_entry("user", "Wat was het klantnummer en de offerte van Aura?")
+
+    window = memory.get_context_window(
+        "Systeem", token_budget=200, summarizer=lambda msgs, prev: "samenvatting",
+        recall_query="klantnummer offerte Aura", recall_k=2,
+    )
+    memory.close()
+
+    verbatim = [m for m in window if m["role"] != "system"]
+    assert memory.last_recall_hits == 1
+    # Every message is either folded into the summary or in the window
+    assert memory.summarized_upto == len(memory.get_history()) - len(verbatim)
+    assert memory.last_window_tokens <= 200 + estimate_tokens("Systeem")  # the system prompt is not budgeted
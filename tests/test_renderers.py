@@ -0,0 +1,39 @@
+"""Tests for deterministic tool result renderers."""
+
+from src import renderers
+from src.renderers import get_renderer, register_renderer, render_results
+
+
+def test_weather_dict_is_rendered_from_template():
+    output = {"city": "Utrecht", "temperature_c": 21.5, "condition": "Partly Cloudy"}
+
+    assert render_results([("get_weather", {"city": "Utrecht"}, output)]) == (
+        "🌤️ Weer in Utrecht: 21.5°C, Partly Cloudy."
+    )
+
+
+def test_notion_text_is_passed_through():
+    output = "Project: Aura\nStatus: Active\nLink: https://notion.so/aura"
+
+    assert render_results([("get_project_status", {"project_name": "Aura"}, output)]) == output
+
+
+def test_unknown_tool_or_free_form_output_needs_model():
+    assert render_results([("reverse_text", {"text": "abc"}, "cba")]) is None
+    assert render_results([("get_weather", {"city": "X"}, "sunny")]) is None
+    assert render_results([
+        ("get_project_status", {}, "Project: Aura"),
+        ("reverse_text", {}, "cba"),
+    ]) is None
+
+
+def test_failing_renderer_falls_back(monkeypatch):
+    # Register into a copy so the process-wide registry is restored afterwards
+    monkeypatch.setattr(renderers, "_renderers", dict(renderers._renderers))
+
+    def broken(output, args):
+        raise KeyError("x")
+
+    register_renderer("broken_tool", broken)
+    assert get_renderer("broken_tool") is broken
+    assert render_results([("broken_tool", {}, {})]) is None
@@ -0,0 +1,79 @@
+"""Tests for token-budgeted context retrieval."""
+
+from pathlib import Path
+
+from src.context_cache import ContextFile
+from src.retrieval import BM25Index, ContextRetriever, chunk_markdown, estimate_tokens, tokenize
+
+
+def _file(source: str, name: str, content: str) -> ContextFile:
+    return ContextFile(path=Path(source) / name, source=source, content=content, mtime_ns=0, size=len(content))
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("De status van het Project Aura") == ["status", "project", "aura"]
+
+
+def test_bm25_ranks_matching_document_first():
+    docs = [tokenize("invoices and budget"), tokenize("project status overview"), tokenize("weather")]
+    index = BM25Index(docs)
+
+    ranked = index.search(tokenize("project status"))
+
+    assert ranked[0][0] == 1
+    assert all(score > 0 for _, score in ranked)
+
+
+def test_chunk_markdown_splits_on_headings():
+    content = "# Title\nintro\n## A\nalpha\n## B\nbeta"
+    assert chunk_markdown(content, max_tokens=100) == ["# Title\nintro", "## A\nalpha", "## B\nbeta"]
+
+
+def test_chunk_markdown_splits_long_sections():
+    paragraph = "word " * 40
+    content = "# Long\n\n" + "\n\n".join([paragraph] * 5)
+    chunks = chunk_markdown(content, max_tokens=60)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 120 for c in chunks)
+
+
+def test_retriever_pins_rules_and_selects_relevant_chunks():
+    files = [
+        _file(".context", "notion_os.md", "## Projects\nproject status lives in Notion\n## Invoices\nfacturen database"),
+        _file(".emerson", "rules.md", "## Never\nno bank transfers"),
+    ]
+    retriever = ContextRetriever(token_budget=1000, top_k=1, pinned_files=[".emerson/rules.md"])
+    retriever.build(files, version=1)
+
+    text = retriever.render("what is the project status?")
+
+    assert "no bank transfers" in text
+    assert "project status lives in Notion" in text
+    assert "facturen" not in text
+    assert "--- rules.md (from .emerson) ---" in text
+
+
+def test_retriever_respects_token_budget():
+    files = [_file(".context", "big.md", "## Status\n" + "status " * 200 + "\n## Small\nstatus short")]
+    retriever = ContextRetriever(token_budget=20, top_k=5, pinned_files=[])
+    retriever.build(files, version=1)
+
+    chunks = retriever.select("status")
+
+    assert [c.text for c in chunks] == ["## Small\nstatus short"]
+
+
+def test_retriever_deduplicates_identical_chunks():
+    shared = "## Shared\nidentical guidance about tasks"
+    files = [
+        _file(".context", "a.md", shared),
+        _file(".antigravity", "b.md", shared),
+        _file(".emerson", "rules.md", shared),
+    ]
+    retriever = ContextRetriever(token_budget=1000, top_k=5, pinned_files=[".emerson/rules.md"])
+    retriever.build(files, version=1)
+
+    chunks = retriever.select("tasks guidance")
+
+    assert len(chunks) == 1
+    assert chunks[0].pinned
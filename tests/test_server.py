@@ -0,0 +1,204 @@
+"""Tests for the HTTP server with a warm agent pool."""
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from src.server import AgentPool, AgentServer, SwarmPool
+
+
+class FakeAgent:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.messages = []
+        self.closed = False
+
+    async def process_async(self, message, session_id=None):
+        self.messages.append((session_id, message))
+        await asyncio.sleep(self.delay)
+        return f"echo: {message}"
+
+    async def process_stream_async(self, message, timings=None, session_id=None):
+        for word in message.split():
+            await asyncio.sleep(0)
+            if word == "boem":
+                raise RuntimeError("model went away")
+            yield word + " "
+
+    def shutdown(self):
+        self.closed = True
+
+
+class FakeSwarm:
+    def __init__(self):
+        self.resets = 0
+
+    def execute(self, task, verbose=True):
+        return f"done: {task}"
+
+    def reset(self):
+        self.resets += 1
+
+
+@contextmanager
+def running(server: AgentServer):
+    """Run the server on its own event loop thread; yields (loop, port)."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    _, port = asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    try:
+        yield loop, port
+    finally:
+        asyncio.run_coroutine_threadsafe(server.drain(timeout=2), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = conn.getresponse()
+    data = response.read().decode("utf-8")
+    conn.close()
+    return response, data
+
+
+def test_process_swarm_and_health():
+    agents = AgentPool([FakeAgent(), FakeAgent()])
+    swarm = FakeSwarm()
+    server = AgentServer(agents, SwarmPool([swarm]), host="127.0.0.1", port=0)
+
+    with running(server) as (_, port):
+        response, data = request(port, "POST", "/process", {"message": "hallo", "session_id": "klant-1"})
+        assert response.status == 200
+        assert json.loads(data)["reply"] == "echo: hallo"
+        assert ("klant-1", "hallo") in agents.agents[0].messages + agents.agents[1].messages
+
+        response, data = request(port, "POST", "/swarm", {"task": "Build a calculator"})
+        assert json.loads(data)["result"] == "done: Build a calculator"
+        assert swarm.resets == 1
+
+        response, data = request(port, "GET", "/health")
+        health = json.loads(data)
+        assert health["status"] == "ok"
+        assert health["requests"] == 2
+        assert health["in_flight"] == 0
+
+        assert request(port, "POST", "/process", {"text": "x"})[0].status == 400
+        assert request(port, "GET", "/process")[0].status == 405
+        assert request(port, "GET", "/nope")[0].status == 404
+
+
+def test_streaming_reply_is_chunked():
+    server = AgentServer(AgentPool([FakeAgent()]), host="127.0.0.1", port=0)
+
+    with running(server) as (_, port):
+        response, data = request(port, "POST", "/process", {"message": "een twee drie", "stream": True})
+
+    assert response.status == 200
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert data == "een twee drie "
+
+
+def test_error_mid_stream_aborts_instead_of_sending_a_second_response():
+    server = AgentServer(AgentPool([FakeAgent()]), host="127.0.0.1", port=0)
+    body = json.dumps({"message": "een boem twee", "stream": True}).encode("utf-8")
+
+    with running(server) as (_, port):
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(b"POST /process HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            raw = b""
+            while chunk := sock.recv(4096):
+                raw += chunk
+
+        # The server keeps serving
+        assert request(port, "GET", "/health")[0].status == 200
+
+    head, _, chunks = raw.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    assert chunks == b"4\r\neen \r\n"  # no 500 response and no terminating chunk
+    assert server.in_flight == 0
+
+
+def test_invalid_or_oversized_content_length_is_rejected(monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "SERVER_MAX_BODY_BYTES", 100)
+    server = AgentServer(AgentPool([FakeAgent()]), host="127.0.0.1", port=0)
+
+    def status_for(content_length):
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(b"POST /process HTTP/1.1\r\nContent-Length: " + content_length + b"\r\n\r\n")
+            return sock.recv(4096).split(b"\r\n", 1)[0]
+
+    with running(server) as (_, port):
+        assert status_for(b"abc") == b"HTTP/1.1 400 Bad Request"
+        assert status_for(b"-5") == b"HTTP/1.1 400 Bad Request"
+        assert status_for("²".encode("latin-1")) == b"HTTP/1.1 400 Bad Request"
+        assert status_for(b"101") == b"HTTP/1.1 413 Payload Too Large"
+
+
+def test_requests_beyond_the_queue_are_rejected():
+    server = AgentServer(AgentPool([FakeAgent(delay=0.5)]), host="127.0.0.1", port=0, max_concurrency=1, max_queue=0)
+
+    with running(server) as (_, port):
+        slow = threading.Thread(target=request, args=(port, "POST", "/process", {"message": "traag"}))
+        slow.start()
+        try:
+            for _ in range(50):
+                if server.in_flight:
+                    break
+                threading.Event().wait(0.01)
+            response, _ = request(port, "POST", "/process", {"message": "te veel"})
+        finally:
+            slow.join(5)
+
+    assert response.status == 503
+    assert response.getheader("Retry-After") == "1"
+    assert server.rejected == 1
+
+
+def test_drain_waits_for_in_flight_requests():
+    agent = FakeAgent(delay=0.3)
+    server = AgentServer(AgentPool([agent]), host="127.0.0.1", port=0)
+    results = []
+
+    with running(server) as (loop, port):
+        slow = threading.Thread(target=lambda: results.append(request(port, "POST", "/process", {"message": "bezig"})))
+        slow.start()
+        for _ in range(50):
+            if server.in_flight:
+                break
+            threading.Event().wait(0.01)
+        drained = asyncio.run_coroutine_threadsafe(server.drain(timeout=5), loop).result(10)
+        slow.join(5)
+
+    assert drained is True
+    assert results[0][0].status == 200
+    with pytest.raises(ValueError):
+        AgentPool([])
+
+
+def test_pooled_agents_share_one_memory():
+    from src.config import settings
+    from src.memory import MemoryManager
+
+    pool = AgentPool.create(2)
+    first, second = pool.agents
+    try:
+        assert second.memory is first.memory
+        assert second.sessions is first.sessions
+        second.process("via agent twee")
+    finally:
+        pool.shutdown()
+
+    reloaded = MemoryManager(memory_file=settings.MEMORY_FILE)
+    assert [m["content"] for m in reloaded.get_history()][:1] == ["via agent twee"]
+    reloaded.close()
@@ -0,0 +1,86 @@
+"""Tests for session-scoped memory."""
+
+import threading
+import time
+
+from src.config import settings
+from src.memory import MemoryManager
+from src.sessions import SessionStore, session_filename
+
+
+def test_sessions_are_isolated_and_reloaded_after_eviction(tmp_path):
+    store = SessionStore(directory=str(tmp_path), max_sessions=2, idle_timeout=0)
+
+    store.get("a").add_entry("user", "van a")
+    store.get("b").add_entry("user", "van b")
+    store.get("c").add_entry("user", "van c")  # evicts "a", the least recently used
+
+    assert "a" not in store
+    assert len(store) == 2
+    assert store.evictions == 1
+    assert [m["content"] for m in store.get("a").get_history()] == ["van a"]
+    assert [m["content"] for m in store.get("c").get_history()] == ["van c"]
+    assert store.loads == 4
+
+
+def test_idle_sessions_are_evicted(tmp_path):
+    store = SessionStore(directory=str(tmp_path), idle_timeout=0.05)
+    store.get("oud")
+    time.sleep(0.06)
+    store.get("nieuw")  # the periodic sweep on access drops "oud"
+
+    assert "oud" not in store
+    assert "nieuw" in store
+    time.sleep(0.06)
+    assert store.evict_idle() == 1
+    assert len(store) == 0
+
+
+def test_evicted_session_still_in_use_is_not_loaded_twice(tmp_path):
+    store = SessionStore(directory=str(tmp_path), max_sessions=1, idle_timeout=0)
+    held = store.get("a")
+    store.get("b")  # evicts "a" while a request still holds it
+
+    assert store.get("a") is held
+
+
+def test_loading_one_session_does_not_block_others(tmp_path):
+    release = threading.Event()
+
+    def factory(path):
+        if path.endswith("traag.json"):
+            release.wait(5)
+        return MemoryManager(memory_file=path)
+
+    store = SessionStore(directory=str(tmp_path), factory=factory)
+    slow = threading.Thread(target=store.get, args=("traag",))
+    slow.start()
+    try:
+        start = time.perf_counter()
+        store.get("snel").add_entry("user", "hoi")
+        assert time.perf_counter() - start < 1.0
+    finally:
+        release.set()
+        slow.join(5)
+
+
+def test_unsafe_session_ids_are_hashed():
+    assert session_filename("klant-42") == "klant-42.json"
+    name = session_filename("../../etc/passwd")
+    assert name.startswith("session-") and "/" not in name
+    assert session_filename("..") != "...json"
+
+
+def test_agent_keeps_memory_per_session(live_agent, monkeypatch):
+    from benchmarks.fakes import FakeGenAIClient
+
+    monkeypatch.setattr(settings, "FAST_PATH_ENABLED", False)
+    live_agent.client = FakeGenAIClient(reply=lambda prompt: "Genoteerd.")
+
+    live_agent.process("Ik ben klant A", session_id="a")
+    live_agent.process("Ik ben klant B", session_id="b")
+    live_agent.process("Zonder sessie")
+
+    assert [m["content"] for m in live_agent.sessions.get("a").get_history()] == ["Ik ben klant A"]
+    assert [m["content"] for m in live_agent.sessions.get("b").get_history()] == ["Ik ben klant B"]
+    assert [m["content"] for m in live_agent.memory.get_history()] == ["Zonder sessie"]
@@ -0,0 +1,121 @@
+"""Tests for single-flight coalescing of identical in-flight calls."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+
+from src.singleflight import SingleFlight, make_key
+from src.tool_cache import make_key as tool_cache_key
+
+
+def test_make_key_canonicalizes_args():
+    assert make_key("f", " Aura", x=None) == make_key("f", "Aura")
+    assert make_key("f", status="Active") != make_key("f", status="Done")
+    # Same canonical form as the tool cache keys
+    assert make_key("f", klant="Zoë ") == 'f:[[], {"klant": "Zoë"}]'
+    assert tool_cache_key("f", {"klant": "Zoë "}) == 'f:{"klant": "Zoë"}'
+
+
+def test_sync_callers_share_one_execution():
+    group = SingleFlight()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return [value]
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: group.do("k", slow, "x"), range(5)))
+
+    assert calls == ["x"]
+    assert results == [["x"]] * 5
+    assert group.shared == 4 and group.in_flight() == 0
+
+
+def test_async_and_sync_callers_share_flights():
+    group = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def run():
+        sync_result = []
+        thread = threading.Thread(
+            target=lambda: (time.sleep(0.02), sync_result.append(group.do("k", lambda: "own")))
+        )
+        thread.start()
+        results = await asyncio.gather(*(group.do_async("k", fetch) for _ in range(3)))
+        await asyncio.to_thread(thread.join)
+        return results, sync_result
+
+    results, sync_result = asyncio.run(run())
+
+    assert calls == [1]
+    assert results == ["result"] * 3
+    assert sync_result == ["result"]
+
+
+def test_leader_exception_reaches_followers():
+    group = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.05)
+        raise ValueError("Notion down")
+
+    async def run():
+        return await asyncio.gather(*(group.do_async("k", boom) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert group.in_flight() == 0
+
+
+def test_notion_list_projects_is_coalesced():
+    from src.notion_client import EmersonNotionClient
+
+    client = EmersonNotionClient()
+    client.client = MagicMock()
+
+    def query(**kwargs):
+        time.sleep(0.1)
+        return {"results": []}
+
+    client.client.data_sources.query.side_effect = query
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: client.list_projects(status="Active"), range(4)))
+
+    assert client.client.data_sources.query.call_count == 1
+
+
+def test_concurrent_sessions_share_idempotent_tool(monkeypatch):
+    from src.agent import GeminiAgent
+    from src.tool_cache import cacheable
+
+    calls = []
+
+    @cacheable(ttl=60, tags=("notion:projects",))
+    async def daily(day: str) -> str:
+        """Daily overview."""
+        calls.append(day)
+        await asyncio.sleep(0.1)
+        return "overzicht"
+
+    agent = GeminiAgent()
+    agent.notion = MagicMock()
+    agent.available_tools["daily"] = daily
+    try:
+        async def run():
+            return await asyncio.gather(*(agent._act([("daily", {"day": "ma"})]) for _ in range(3)))
+
+        results = asyncio.run(run())
+        assert [r[0].output for r in results] == ["overzicht"] * 3
+        assert calls == ["ma"]
+    finally:
+        agent.shutdown()
@@ -0,0 +1,34 @@
+"""Tests for incremental tool-call detection in streamed responses."""
+
+from src.streaming import ActionStreamDetector
+
+
+def test_plain_text_is_passed_through():
+    detector = ActionStreamDetector()
+    assert detector.feed("  ") == ("", [])
+    assert detector.feed("Hallo") == ("  Hallo", [])
+    assert detector.feed(" wereld") == (" wereld", [])
+    assert detector.finish() == ("", [])
+
+
+def test_objects_are_returned_as_soon_as_they_close():
+    detector = ActionStreamDetector()
+    assert detector.feed('[{"action": "a", "args": {"x": "}"') == ("", [])
+    text, payloads = detector.feed('}}, {"action": ')
+    assert payloads == [{"action": "a", "args": {"x": "}"}}]
+    text, payloads = detector.feed('"b"}]')
+    assert payloads == [{"action": "b"}]
+
+
+def test_code_fence_is_detected_as_json():
+    detector = ActionStreamDetector()
+    assert detector.feed("``") == ("", [])
+    text, payloads = detector.feed('`json\n{"action": "daily_check", "args": {}}\n```')
+    assert text == ""
+    assert payloads == [{"action": "daily_check", "args": {}}]
+
+
+def test_bracketed_text_without_json_falls_back_to_text():
+    detector = ActionStreamDetector()
+    detector.feed("[Stap 1] klaar")
+    assert detector.finish() == ("[Stap 1] klaar", [])
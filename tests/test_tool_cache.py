@@ -0,0 +1,150 @@
+"""Tests for the TTL result cache for idempotent tools."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from src.mcp_client import MCPTool
+from src.tool_cache import (
+    CachePolicy,
+    ToolResultCache,
+    cacheable,
+    invalidates,
+    make_key,
+    policy_for,
+)
+from src.tool_manifest import LazyTool, scan_module
+
+
+def test_make_key_normalizes_arguments():
+    assert make_key("search", {"query": " Aura ", "limit": None}) == make_key("search", {"query": "Aura"})
+    assert make_key("search", {"b": 1, "a": 2}) == make_key("search", {"a": 2, "b": 1})
+    assert make_key("search", {"query": "Aura"}) != make_key("status", {"query": "Aura"})
+
+
+def test_entries_expire_after_ttl():
+    cache = ToolResultCache()
+    cache.put("k", "v", ttl=0.05)
+    assert cache.get("k") == (True, "v")
+    time.sleep(0.06)
+    assert cache.get("k") == (False, None)
+
+
+def test_lru_eviction_and_tag_invalidation():
+    cache = ToolResultCache(max_entries=2)
+    cache.put("a", 1, ttl=60, tags=("notion:projects",))
+    cache.put("b", 2, ttl=60, tags=("notion:tasks",))
+    cache.get("a")
+    cache.put("c", 3, ttl=60, tags=("notion:tasks",))
+
+    assert cache.get("b") == (False, None)
+    assert cache.evictions == 1
+
+    assert cache.invalidate(["notion:tasks"]) == 1
+    assert cache.get("c") == (False, None)
+    assert cache.get("a") == (True, 1)
+
+
+def test_decorators_merge_policy():
+    @cacheable(ttl=30, tags=("x",))
+    @invalidates("y")
+    def tool() -> str:
+        return ""
+
+    assert policy_for(tool) == CachePolicy(ttl=30.0, tags=("x",), invalidates=("y",))
+
+
+def test_policy_from_manifest_decorators():
+    source = '''
+@cacheable(ttl=45, tags=("notion:projects",))
+def lookup(name: str) -> str:
+    return name
+
+
+@invalidates("notion:tasks")
+def create(name: str) -> str:
+    return name
+'''
+    lookup, create = (LazyTool(spec) for spec in scan_module(source, "sample"))
+
+    assert policy_for(lookup) == CachePolicy(ttl=45.0, tags=("notion:projects",))
+    assert policy_for(create) == CachePolicy(invalidates=("notion:tasks",))
+
+
+def test_policy_from_mcp_annotations():
+    def wrapper():
+        pass
+
+    wrapper.mcp_tool = MCPTool(
+        name="github_get_issue", description="", server_name="github", input_schema={},
+        original_name="get_issue", annotations={"readOnlyHint": True},
+    )
+    policy = policy_for(wrapper)
+    assert policy.cacheable and policy.tags == ("mcp:github",) and not policy.invalidates
+
+    wrapper.mcp_tool.annotations = {}
+    policy = policy_for(wrapper)
+    assert not policy.cacheable and policy.invalidates == ("mcp:github",)
+
+
+def test_agent_serves_repeated_lookup_from_cache(tmp_path):
+    from src.agent import GeminiAgent
+
+    calls = []
+
+    @cacheable(ttl=60, tags=("notion:projects",))
+    def lookup(name: str) -> str:
+        """Look up a project."""
+        calls.append(name)
+        return f"status of {name}"
+
+    @invalidates("notion:projects")
+    def rename(name: str) -> str:
+        """Rename a project."""
+        return "ok"
+
+    agent = GeminiAgent()
+    agent.notion = MagicMock()
+    agent.available_tools.update({"lookup": lookup, "rename": rename})
+    try:
+        async def run():
+            first = await agent._act([("lookup", {"name": "Aura"})])
+            second = await agent._act([("lookup", {"name": " Aura"})])
+            await agent._act([("rename", {"name": "Aura"})])
+            third = await agent._act([("lookup", {"name": "Aura"})])
+            return first, second, third
+
+        first, second, third = asyncio.run(run())
+        assert [o.output for o in (first[0], second[0], third[0])] == ["status of Aura"] * 3
+        assert calls == ["Aura", "Aura"]
+        assert agent.tool_cache.hits == 1
+    finally:
+        agent.shutdown()
+
+
+def test_failing_mcp_tool_is_not_cached_and_recovers(live_agent):
+    from src.config import MCPServerConfig
+    from src.mcp_client import MCPClientManager, MCPServerConnection
+
+    session = MagicMock()
+    session.call_tool = AsyncMock(side_effect=[
+        ConnectionError("server busy"),
+        MagicMock(isError=False, content=[MagicMock(text="3 open issues")]),
+    ])
+    connection = MCPServerConnection(config=MCPServerConfig(name="github"), session=session, connected=True)
+    tool = MCPTool(
+        name="list_issues", description="List issues", server_name="github",
+        input_schema={}, original_name="list_issues", annotations={"readOnlyHint": True},
+    )
+    wrapper = MCPClientManager()._create_tool_wrapper(connection, tool)
+    live_agent.available_tools[wrapper.__name__] = wrapper
+
+    async def run():
+        first = await live_agent._act([(wrapper.__name__, {"repo": "aura"})])
+        second = await live_agent._act([(wrapper.__name__, {"repo": "aura"})])
+        return first[0], second[0]
+
+    first, second = asyncio.run(run())
+    assert first.status == "error" and "server busy" in str(first.output)
+    assert (second.status, second.output) == ("ok", "3 open issues")
+    assert session.call_tool.await_count == 2
@@ -0,0 +1,93 @@
+"""Tests for relevance-ranked tool selection."""
+
+from typing import Optional
+
+from src.config import MCPServerConfig
+from src.mcp_client import MCPClientManager, MCPServerConnection, MCPTool
+from src.tool_index import ToolIndex, compact_signature
+
+
+def get_project_status(project_name: str) -> str:
+    """Haal status en details van een project op uit Notion.
+
+    Args:
+        project_name: De naam van het project.
+    """
+    return project_name
+
+
+def create_invoice(amount: float, note: Optional[str] = None) -> str:
+    """Create an invoice for a client."""
+    return ""
+
+
+def get_weather(city: str) -> dict:
+    """Return weather data for a given city."""
+    return {}
+
+
+def _registry(extra: int = 0):
+    tools = {
+        "get_project_status": get_project_status,
+        "create_invoice": create_invoice,
+        "get_weather": get_weather,
+    }
+    for i in range(extra):
+        def filler(x: str) -> str:
+            """Unrelated filler tool."""
+            return x
+        tools[f"filler_{i}"] = filler
+    return tools
+
+
+def test_compact_signature_for_python_tool():
+    assert compact_signature(create_invoice) == "(amount: float, note: Optional[str] = None)"
+
+
+def test_compact_signature_for_mcp_tool():
+    config = MCPServerConfig(name="github", transport="stdio", command="echo")
+    connection = MCPServerConnection(config=config, connected=True)
+    tool = MCPTool(
+        name="create_issue",
+        description="Create a GitHub issue",
+        server_name="github",
+        input_schema={
+            "type": "object",
+            "properties": {"title": {"type": "string"}, "body": {"type": "string"}},
+            "required": ["title"],
+        },
+        original_name="create_issue",
+    )
+    wrapper = MCPClientManager()._create_tool_wrapper(connection, tool)
+
+    assert compact_signature(wrapper) == "(title: string, body?: string)"
+
+
+def test_select_returns_relevant_and_pinned_tools():
+    index = ToolIndex(top_k=1, pinned=["get_project_status"])
+    index.build(_registry(extra=10))
+
+    names = [entry.name for entry in index.select("what is the weather in Utrecht?")]
+
+    assert names == ["get_project_status", "get_weather"]
+
+
+def test_rendered_line_is_compact():
+    index = ToolIndex(top_k=1, pinned=[])
+    index.build(_registry(extra=10))
+
+    rendered = index.render("invoice")
+
+    assert rendered == "- create_invoice(amount: float, note: Optional[str] = None): Create an invoice for a client."
+
+
+def test_index_rebuilds_only_when_registry_changes():
+    index = ToolIndex(top_k=1, pinned=[])
+    tools = _registry()
+    index.build(tools)
+    index.build(dict(tools))
+    assert index.rebuilds == 1
+
+    tools["get_weather_v2"] = get_weather
+    index.build(tools)
+    assert index.rebuilds == 2
@@ -0,0 +1,97 @@
+"""Tests for lazy, manifest-based tool discovery."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.tool_manifest import LazyTool, ToolManifest, ToolSpec, scan_module
+
+
+SOURCE = '''
+from typing import Optional
+from os.path import join
+
+
+def create_task(project_name: str, title: str, due_date: Optional[str] = None) -> str:
+    """Maak een nieuwe taak aan."""
+    return title
+
+
+async def fetch(url: str, *, retries: int = 3) -> str:
+    """Fetch a URL."""
+    return url
+
+
+def _private() -> None:
+    pass
+'''
+
+
+def test_scan_module_finds_public_functions_only():
+    specs = scan_module(SOURCE, "sample")
+
+    assert [spec.name for spec in specs] == ["create_task", "fetch"]
+    assert specs[0].signature == "(project_name: str, title: str, due_date: Optional[str] = None)"
+    assert specs[0].doc == "Maak een nieuwe taak aan."
+    assert specs[1].is_async
+    assert specs[1].signature == "(url: str, retries: int = 3)"
+
+
+def test_manifest_is_cached_per_file_hash(tmp_path):
+    tools_dir = tmp_path / "tools"
+    tools_dir.mkdir()
+    (tools_dir / "a.py").write_text(SOURCE, encoding="utf-8")
+    (tools_dir / "b.py").write_text("def ping() -> str:\n    return 'pong'\n", encoding="utf-8")
+    cache = tmp_path / "manifest.json"
+
+    first = ToolManifest(tools_dir, cache_path=str(cache))
+    assert len(first.load()) == 3
+    assert first.scanned_files == 2
+
+    (tools_dir / "b.py").write_text("def ping() -> str:\n    return 'pong!'\n", encoding="utf-8")
+    second = ToolManifest(tools_dir, cache_path=str(cache))
+    assert [spec.name for spec in second.load()] == ["create_task", "fetch", "ping"]
+    assert second.scanned_files == 1
+
+
+def test_lazy_tool_imports_module_on_first_call():
+    sys.modules.pop("src.tools.demo_tool", None)
+    tools_dir = Path(__file__).parent.parent / "src" / "tools"
+    spec = next(s for s in ToolManifest(tools_dir).load() if s.name == "reverse_text")
+    tool = LazyTool(spec)
+
+    assert tool.__name__ == "reverse_text"
+    assert "Reverses" in tool.__doc__
+    assert not tool.loaded
+    assert "src.tools.demo_tool" not in sys.modules
+
+    assert tool(text="abc") == "cba"
+    assert tool.loaded
+
+
+def test_agent_registry_is_lazy(live_agent):
+    assert isinstance(live_agent.available_tools["get_project_status"], LazyTool)
+    assert not live_agent.available_tools["get_project_status"].loaded
+
+
+def test_unimportable_tools_are_not_registered_or_indexed(live_agent):
+    from src.tool_index import ToolIndex
+
+    broken = scan_module("import os\n\ndef sync_note(path: Optional[str] = None) -> str:\n    return ''\n", "broken")
+    assert broken[0].load_error == "name 'Optional' is not defined"
+    assert scan_module("from __future__ import annotations\n\ndef f(x: Optional[str]) -> str:\n    return ''\n", "ok")[0].load_error == ""
+    assert scan_module(SOURCE, "sample")[0].load_error == ""
+
+    # obsidian_tools.py uses Optional without importing it
+    assert "add_markdown_metadata" not in live_agent.available_tools
+    assert "reverse_text" in live_agent.available_tools
+
+    tool = LazyTool(ToolSpec(module="does_not_exist", name="ghost", signature="()", doc="Spook."))
+    index = ToolIndex(top_k=5, pinned=[])
+    index.build({"ghost": tool})
+    assert [entry.name for entry in index.select("spook")] == ["ghost"]
+    with pytest.raises(ImportError):
+        tool()
+    index.build({"ghost": tool})
+    assert index.select("spook") == []
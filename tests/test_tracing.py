@@ -0,0 +1,163 @@
+"""Tests for in-process span tracing."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.config import settings
+from src.tracing import Tracer, chrome_events, load_jsonl, traced, tracer
+
+
+@pytest.fixture
+def tracing_on(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    tracer.clear()
+    yield
+    tracer.clear()
+
+
+def test_disabled_tracer_records_nothing():
+    local = Tracer()
+    with local.span("agent.process", message_chars=3) as root:
+        root.set(path="llm")
+        with local.span("llm.gemini"):
+            pass
+    local.start_span("llm.gemini_stream").end()
+
+    assert local.spans() == []
+    assert local.current_span() is None
+
+
+def test_nested_spans_with_attributes_and_errors(tracing_on):
+    local = Tracer()
+    with local.span("agent.process", message_chars=5) as root:
+        with local.span("tool.reverse_text", tool="reverse_text") as child:
+            child.set(outcome="ok")
+            assert local.current_span() is child
+        with pytest.raises(ValueError):
+            with local.span("llm.gemini"):
+                raise ValueError("boom")
+        assert local.current_span() is root
+
+    spans = {span.name: span for span in local.spans()}
+    root = spans["agent.process"]
+    assert root.parent_id is None
+    assert spans["tool.reverse_text"].parent_id == root.span_id
+    assert spans["tool.reverse_text"].trace_id == root.trace_id
+    assert spans["tool.reverse_text"].attributes == {"tool": "reverse_text", "outcome": "ok"}
+    assert spans["llm.gemini"].status == "error"
+    assert "ValueError: boom" in spans["llm.gemini"].attributes["error"]
+    assert root.duration_ms >= spans["tool.reverse_text"].duration_ms
+
+
+def test_sampling_is_decided_per_trace(tracing_on, monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 0.0)
+    local = Tracer()
+    with local.span("agent.process"):
+        with local.span("llm.gemini") as child:
+            child.set(prompt_chars=10)
+
+    assert local.spans() == []
+    assert local.stats()["dropped_traces"] == 1
+
+
+def test_spans_follow_asyncio_tasks(tracing_on):
+    local = Tracer()
+
+    async def tool(name):
+        with local.span(f"tool.{name}"):
+            await asyncio.sleep(0.01)
+
+    async def run():
+        with local.span("agent.process"):
+            await asyncio.gather(tool("a"), tool("b"))
+
+    asyncio.run(run())
+
+    spans = {span.name: span for span in local.spans()}
+    root_id = spans["agent.process"].span_id
+    assert spans["tool.a"].parent_id == root_id
+    assert spans["tool.b"].parent_id == root_id
+
+
+def test_traced_decorator_wraps_sync_and_async(tracing_on):
+    @traced("notion.list_projects")
+    def list_projects():
+        return ["Aura"]
+
+    @traced()
+    async def fetch():
+        return 42
+
+    assert list_projects() == ["Aura"]
+    assert asyncio.run(fetch()) == 42
+    names = [span.name for span in tracer.spans()]
+    assert "notion.list_projects" in names
+    assert any(name.endswith("fetch") for name in names)
+
+
+def test_jsonl_and_chrome_export(tracing_on, tmp_path):
+    local = Tracer()
+    with local.span("agent.process"):
+        with local.span("llm.gemini", prompt_chars=12):
+            pass
+
+    # Finished traces are appended to TRACE_JSONL_PATH
+    written = load_jsonl(settings.TRACE_JSONL_PATH)
+    assert [span["name"] for span in written] == ["llm.gemini", "agent.process"]
+
+    out = tmp_path / "trace.json"
+    assert local.export_chrome(str(out)) == 2
+    events = json.loads(out.read_text())["traceEvents"]
+    complete = [event for event in events if event["ph"] == "X"]
+    assert {event["name"] for event in complete} == {"agent.process", "llm.gemini"}
+    gemini = next(event for event in complete if event["name"] == "llm.gemini")
+    assert gemini["cat"] == "llm"
+    assert gemini["args"]["prompt_chars"] == 12
+    assert gemini["dur"] >= 0
+    assert any(event["ph"] == "M" for event in events)
+    assert chrome_events([]) == []
+
+
+class _ScriptedClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        client = self
+
+        class _Response:
+            def __init__(self, text):
+                self.text = text
+
+        class _AsyncModels:
+            async def generate_content(self, model, contents):
+                return _Response(client.replies.pop(0) if client.replies else "Klaar")
+
+        class _Aio:
+            models = _AsyncModels()
+
+        self.aio = _Aio()
+
+
+def test_agent_process_is_traced_per_phase(tracing_on, live_agent, monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_RENDERERS_ENABLED", False)
+    live_agent.client = _ScriptedClient(['{"action": "reverse_text", "args": {"text": "abc"}}', "Resultaat: cba"])
+
+    assert live_agent.process("Draai abc om") == "Resultaat: cba"
+
+    spans = tracer.spans()
+    by_name = {span.name: span for span in spans}
+    root = by_name["agent.process"]
+    assert root.attributes["path"] == "llm"
+    assert {span.trace_id for span in spans if span.name != "agent.process"} <= {root.trace_id}
+    for name in ("agent.prompt_build", "agent.context_load", "agent.memory_window",
+                 "tool.reverse_text", "agent.format"):
+        assert name in by_name, name
+    assert by_name["agent.context_load"].parent_id == by_name["agent.prompt_build"].span_id
+    assert by_name["tool.reverse_text"].attributes["outcome"] == "ok"
+    gemini_calls = [span for span in spans if span.name == "llm.gemini"]
+    assert len(gemini_calls) == 2
+    assert all(span.attributes["prompt_chars"] > 0 for span in gemini_calls)
+    # The observation call is nested in the format span
+    assert any(span.parent_id == by_name["agent.format"].span_id for span in gemini_calls)